@@ -0,0 +1,404 @@
+import re
+
+import pandas as pd
+import numpy as np
+from scipy import sparse
+
+from instrumentation import instrumenter
+from overlays import OVERLAY_COLS, exploser_overlays, binariser_long
+from pipeline import Pipeline
+
+MODELES_DEFAUT = ("Logistic Regression", "Decision Tree", "Random Forest")
+
+
+def creer_modele(nom):
+    """Instancie un modèle de la section 4 à partir de son nom."""
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.tree import DecisionTreeClassifier
+    from sklearn.ensemble import RandomForestClassifier
+
+    fabriques = {
+        "Logistic Regression": lambda: LogisticRegression(max_iter=1000),
+        "Decision Tree": lambda: DecisionTreeClassifier(random_state=42),
+        "Random Forest": lambda: RandomForestClassifier(n_estimators=100, random_state=42),
+    }
+    if nom not in fabriques:
+        raise ValueError(f"Modèle inconnu : {nom} (disponibles : {list(fabriques)})")
+    return fabriques[nom]()
+
+
+def decouper_virgules(texte):
+    """Tokenizer INCI (séparation sur les virgules), picklable contrairement à une lambda."""
+    return texte.split(",")
+
+
+def normalize_inci(name):
+    """Supprime les variantes syntaxiques d'un nom INCI (parenthèses, crochets, espaces)."""
+    name = name.upper()
+    name = re.sub(r"\(.*?\)", "", name)   # enlève ()
+    name = re.sub(r"\[.*?\]", "", name)   # enlève []
+    name = re.sub(r"\s+", " ", name)      # espaces multiples
+    return name.strip()
+
+
+@instrumenter("read_excel")
+def charger(chemin):
+    """Charge l'export Excel (section 1)."""
+    return pd.read_excel(chemin)
+
+
+@instrumenter("clean")
+def nettoyer(df):
+    """Supprime les doublons et harmonise les noms INCI (sections 3.1 et 3.2)."""
+    df_clean = df.drop_duplicates()
+    print("Nombre de doublons supprimés :", len(df) - len(df_clean))
+
+    df_clean = df_clean.copy()
+    df_clean["Ingrédients"] = (
+        df_clean["Ingrédients"]
+        .astype(str)
+        .str.strip()
+        .str.replace(r"\s+", " ", regex=True)   # supprime espaces multiples
+        .str.upper()                             # INCI = majuscules
+    )
+    return df_clean
+
+
+@instrumenter("dedup")
+def dedoublonner(df_clean, seuil_jaccard=0.9):
+    """
+    Fusionne les produits de même formulation (ensemble d'ingrédients
+    identique ou Jaccard >= seuil) avant l'entraînement. seuil_jaccard=None
+    désactive la fusion.
+    """
+    from dedoublonnage import fusionner_doublons
+
+    if seuil_jaccard is None:
+        return df_clean
+    return fusionner_doublons(df_clean, "Ingrédients", seuil_jaccard)
+
+
+@instrumenter("split_overlay")
+def decouper_overlays(df_clean, colonnes=OVERLAY_COLS):
+    """Table longue (product_id, attribute, value) des colonnes multi-valuées (section 3.4)."""
+    return exploser_overlays(df_clean, colonnes)
+
+
+@instrumenter("MultiLabelBinarizer")
+def binariser(long, df_clean):
+    """
+    Désagrège la liste d'ingrédients en matrice binaire creuse (section 3.5),
+    directement depuis les codes de la table longue.
+
+    Returns:
+    --------
+    dict : 'matrice' (CSR produits x ingrédients), 'colonnes' (noms des
+    ingrédients) et 'index' (index des produits)
+    """
+    matrice, colonnes = binariser_long(long, "Ingrédients", nb_produits=len(df_clean))
+    print("Dimensions du dataset désagrégé :", matrice.shape)
+    return {'matrice': matrice, 'colonnes': colonnes, 'index': df_clean.index}
+
+
+def fusionner_colonnes(matrice, standards):
+    """
+    Fusionne (OU logique) les colonnes portant le même nom standard.
+
+    Parameters:
+    -----------
+    matrice : scipy.sparse matrix
+        Matrice binaire produits x ingrédients d'origine
+    standards : array-like
+        Nom standard de chaque colonne d'origine
+
+    Returns:
+    --------
+    tuple : (matrice CSR fusionnée, noms des colonnes standard)
+    """
+    noms, codes = np.unique(np.asarray(standards), return_inverse=True)
+    projection = sparse.csr_matrix(
+        (np.ones(len(codes), dtype=np.int8), (np.arange(len(codes)), codes)),
+        shape=(len(codes), len(noms))
+    )
+    fusion = (sparse.csr_matrix(matrice) @ projection).tocsr()
+    fusion.data = np.minimum(fusion.data, 1).astype(np.int8)
+    return fusion, noms
+
+
+@instrumenter("TF-IDF clustering")
+def standardiser(binaire, distance_threshold=0.25):
+    """
+    Regroupe les variantes d'un même ingrédient par clustering hiérarchique
+    sur des n-grammes de caractères TF-IDF (section 3.6).
+
+    Returns:
+    --------
+    dict : 'matrice' (CSR standardisée), 'colonnes' (noms standard) et
+    'ingredients' (table original / normalized / cluster / standard)
+    """
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.cluster import AgglomerativeClustering
+
+    ingredients = pd.DataFrame({"original": binaire['colonnes']})
+    ingredients["normalized"] = ingredients["original"].apply(normalize_inci)
+    print("Nombre d'ingrédients uniques (avant) :", ingredients.shape[0])
+
+    X = TfidfVectorizer(analyzer="char_wb", ngram_range=(3, 5)).fit_transform(ingredients["normalized"])
+    clustering = AgglomerativeClustering(
+        n_clusters=None,
+        distance_threshold=distance_threshold,
+        linkage="average",
+        metric="cosine"
+    )
+    ingredients["cluster"] = clustering.fit_predict(X.toarray())
+
+    # Forme canonique la plus courte par cluster
+    cluster_to_standard = (
+        ingredients
+        .groupby("cluster")["normalized"]
+        .apply(lambda x: x.sort_values(key=lambda s: s.str.len()).iloc[0])
+    )
+    ingredients["standard"] = ingredients["cluster"].map(cluster_to_standard)
+
+    matrice, colonnes = fusionner_colonnes(binaire['matrice'], ingredients["standard"])
+    print("Nombre de colonnes APRÈS standardisation :", matrice.shape[1])
+    return {'matrice': matrice, 'colonnes': colonnes, 'index': binaire['index'], 'ingredients': ingredients}
+
+
+@instrumenter("target")
+def preparer_cible(df_clean):
+    """Crée la cible TALC et retire le talc des ingrédients (sections 4.1 et 4.2)."""
+    y = df_clean["Ingrédients"].str.contains("TALC", na=False).astype(int)
+    sans_talc = (
+        df_clean["Ingrédients"]
+        .astype(str)
+        .str.upper()
+        .str.replace(r"TALC\*?", "", regex=True) # supprime TALC ou TALC* partout
+        .str.replace(r"[\[\]]", "", regex=True) # enlève [ et ]
+        .str.replace(r"\s*,\s*", ",", regex=True) # uniformise les virgules
+        .str.strip(", ") # enlève virgules/espaces début/fin
+    )
+    return {'textes': sans_talc, 'y': y}
+
+
+@instrumenter("vectorize")
+def vectoriser(cible, nb_features=None, n_jobs=1):
+    """
+    Vectorisation binaire des ingrédients sans talc (section 4.3).
+
+    Par défaut, un vocabulaire est construit (CountVectorizer). Avec
+    nb_features, les ingrédients sont hachés dans un nombre fixe de colonnes
+    (voir vectorisation_hachee) : mémoire bornée, transformation par blocs
+    parallélisable, mais colonnes anonymes ('#<numéro>') et collisions
+    possibles.
+
+    Parameters:
+    -----------
+    cible : dict
+        Résultat de preparer_cible()
+    nb_features : int, optional
+        Nombre de colonnes du mode hachage (None : mode vocabulaire)
+    n_jobs : int, optional
+        Processus utilisés par le mode hachage. Par défaut 1
+
+    Returns:
+    --------
+    dict : 'X' (CSR), 'y' (Series) et 'colonnes' (noms des ingrédients)
+    """
+    if nb_features is not None:
+        import vectorisation_hachee
+
+        X_vect = vectorisation_hachee.transformer(
+            cible['textes'], vectorisation_hachee.creer_vectoriseur(nb_features), n_jobs=n_jobs)
+        colonnes = np.array([f"#{i}" for i in range(nb_features)], dtype=object)
+        return {'X': X_vect, 'y': cible['y'], 'colonnes': colonnes}
+
+    from sklearn.feature_extraction.text import CountVectorizer
+
+    vectorizer = CountVectorizer(tokenizer=decouper_virgules, token_pattern=None, binary=True)
+    X_vect = vectorizer.fit_transform(cible['textes'])
+    return {'X': X_vect, 'y': cible['y'], 'colonnes': vectorizer.get_feature_names_out()}
+
+
+@instrumenter("train")
+def comparer_modeles(vect, modeles=MODELES_DEFAUT, test_size=0.2, random_state=42):
+    """Entraîne les modèles de baseline et renvoie F1-macro et Balanced Accuracy (section 4.4)."""
+    from sklearn.model_selection import train_test_split
+    from sklearn.metrics import f1_score, balanced_accuracy_score
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        vect['X'], vect['y'], test_size=test_size, random_state=random_state, stratify=vect['y']
+    )
+    results = []
+    for name in modeles:
+        model = creer_modele(name)
+        model.fit(X_train, y_train)
+        y_pred = model.predict(X_test)
+        results.append({
+            "Modèle": name,
+            "F1-macro": f1_score(y_test, y_pred, average="macro"),
+            "Balanced Accuracy": balanced_accuracy_score(y_test, y_pred)
+        })
+    return pd.DataFrame(results)
+
+
+@instrumenter("multi-target")
+def comparer_cibles(standard, cibles, modeles=MODELES_DEFAUT, exclure=()):
+    """
+    Modèles de présence pour plusieurs ingrédients cibles, directement depuis
+    la matrice standardisée (voir multi_cibles.comparer_cibles).
+    """
+    import multi_cibles
+
+    return multi_cibles.comparer_cibles(standard['matrice'], standard['colonnes'], list(cibles), modeles, exclure)
+
+
+@instrumenter("communities")
+def regrouper_familles(vect, resolution=1.0, avec_ingredients=False):
+    """
+    Familles d'ingrédients (communautés du graphe de co-occurrences) utilisées
+    comme variables groupées (voir communautes.caracteristiques_familles).
+    """
+    import communautes
+
+    familles = communautes.detecter_familles(vect['X'], vect['colonnes'], resolution=resolution)
+    return communautes.caracteristiques_familles(vect, familles, avec_ingredients=avec_ingredients)
+
+
+@instrumenter("coefficients")
+def coefficients_logistiques(vect):
+    """Coefficients de la régression logistique entraînée sur tout le dataset (section 5.1)."""
+    model = creer_modele("Logistic Regression")
+    model.fit(vect['X'], vect['y'])
+    importance_df = pd.DataFrame({"Ingrédient": vect['colonnes'], "Coefficient": model.coef_[0]})
+    importance_df["AbsCoeff"] = importance_df["Coefficient"].abs()
+    return importance_df.sort_values(by="AbsCoeff", ascending=False)
+
+
+@instrumenter("importance")
+def importances_stables(vect, modele="Logistic Regression", nb_sous_echantillons=100):
+    """
+    Classement des ingrédients par importance de permutation sur plis de test
+    et stabilité de sélection L1 (voir importance.classer_ingredients).
+    """
+    import importance
+
+    return importance.classer_ingredients(vect, modele=modele, nb_sous_echantillons=nb_sous_echantillons)
+
+
+@instrumenter("apriori")
+def regles_apriori(vect, min_support=0.1, min_threshold=0.7):
+    """Règles d'association concluant à TALC, triées par lift (section 5.2)."""
+    from mlxtend.frequent_patterns import apriori, association_rules
+
+    X_apriori = pd.DataFrame(vect['X'].toarray().astype(bool), columns=vect['colonnes'])
+    X_apriori["TALC"] = vect['y'].to_numpy().astype(bool)
+
+    frequent_itemsets = apriori(X_apriori, min_support=min_support, use_colnames=True)
+    rules = association_rules(frequent_itemsets, metric="confidence", min_threshold=min_threshold)
+    rules_talc = rules[rules['consequents'].apply(lambda x: 'TALC' in x)]
+    return rules_talc.sort_values(by='lift', ascending=False)
+
+
+@instrumenter("apriori (approché)")
+def regles_approchees(vect, min_support=0.1, min_threshold=0.7, epsilon=0.02, delta=0.05, budget_s=5.0):
+    """
+    Règles concluant à TALC par extraction approchée (échantillon puis passe
+    de vérification exacte, voir itemsets_approches.extraire_itemsets) :
+    mêmes règles que regles_apriori (conséquents contenant TALC), supports
+    exacts.
+    """
+    import itemsets_approches
+
+    X = sparse.hstack([vect['X'], sparse.csr_matrix(vect['y'].to_numpy().astype(np.int8)[:, None])], format='csr')
+    colonnes = np.r_[np.asarray(vect['colonnes'], dtype=object), ["TALC"]]
+    resultat = itemsets_approches.extraire_itemsets(X, colonnes, min_support, epsilon, delta, budget_s=budget_s)
+    return itemsets_approches.regles_cible(resultat['itemsets'], "TALC", min_threshold)
+
+
+@instrumenter("rule bootstrap")
+def stabiliser_regles(regles, vect, nb_repliques=2000, min_support=0.1, min_threshold=0.7):
+    """
+    Intervalles de confiance bootstrap et stabilité des règles concluant à
+    TALC (voir regles_compilees.ReglesCompilees.stabilite).
+    """
+    from regles_compilees import ReglesCompilees
+
+    controle = ReglesCompilees(regles)
+    bitsets = controle.encoder(vect['X'], vect['colonnes'], {"TALC": vect['y'].to_numpy()})
+    return controle.stabilite(bitsets, nb_repliques, min_support=min_support, min_threshold=min_threshold)
+
+
+def construire_pipeline(chemin, distance_threshold=0.25, min_support=0.1, min_threshold=0.7,
+                        modeles=MODELES_DEFAUT, seuil_jaccard=0.9, cibles=None, nb_features=None,
+                        familles=False, repliques_regles=None, importances=False, apriori_approche=False,
+                        dossier_cache='.cache_pipeline'):
+    """
+    Construit le graphe d'étapes de l'analyse talcsense.
+
+    Parameters:
+    -----------
+    chemin : str
+        Export Excel à analyser
+    distance_threshold : float, optional
+        Seuil du clustering des noms INCI. Par défaut 0.25
+    min_support : float, optional
+        Support minimal d'apriori. Par défaut 0.1
+    min_threshold : float, optional
+        Confiance minimale des règles. Par défaut 0.7
+    modeles : tuple of str, optional
+        Modèles à comparer (voir creer_modele)
+    seuil_jaccard : float, optional
+        Seuil de fusion des quasi-doublons avant l'entraînement et la
+        binarisation, pour que des quasi-copies ne soient pas réparties
+        entre train et test (None : aucune fusion). Par défaut 0.9
+    cibles : list of str, optional
+        Ingrédients standard à prédire en plus du talc (étape "multi_cibles",
+        ajoutée seulement si renseigné)
+    nb_features : int, optional
+        Vectorisation par hachage dans nb_features colonnes (None : vocabulaire)
+    familles : bool, optional
+        Compare aussi les modèles sur les familles d'ingrédients (étapes
+        "familles" et "modeles_familles"). Par défaut False
+    repliques_regles : int, optional
+        Nombre de répliques bootstrap des règles (étape "stabilite_regles",
+        ajoutée seulement si renseigné)
+    importances : bool, optional
+        Classe les ingrédients par importance de permutation et stabilité de
+        sélection (étape "importances"). Par défaut False
+    apriori_approche : bool, optional
+        Étape "regles" par extraction approchée sur échantillon, vérifiée sur
+        tout le catalogue (voir regles_approchees). Par défaut False
+    dossier_cache : str, optional
+        Dossier du cache des résultats d'étapes
+
+    Returns:
+    --------
+    Pipeline : à exécuter avec .executer()
+    """
+    pipeline = Pipeline(dossier_cache=dossier_cache)
+    pipeline.etape("charger", charger, chemin=chemin)
+    pipeline.etape("nettoyer", nettoyer, entrees=("charger",))
+    pipeline.etape("dedoublonner", dedoublonner, entrees=("nettoyer",), seuil_jaccard=seuil_jaccard)
+    # Matrice standardisée sur les produits dédoublonnés : "multi_cibles" s'entraîne dessus
+    pipeline.etape("overlays", decouper_overlays, entrees=("dedoublonner",))
+    pipeline.etape("binariser", binariser, entrees=("overlays", "dedoublonner"))
+    pipeline.etape("standardiser", standardiser, entrees=("binariser",), distance_threshold=distance_threshold)
+    pipeline.etape("cible", preparer_cible, entrees=("dedoublonner",))
+    pipeline.etape("vectoriser", vectoriser, entrees=("cible",), nb_features=nb_features)
+    pipeline.etape("modeles", comparer_modeles, entrees=("vectoriser",), modeles=tuple(modeles))
+    pipeline.etape("coefficients", coefficients_logistiques, entrees=("vectoriser",))
+    if importances:
+        pipeline.etape("importances", importances_stables, entrees=("vectoriser",))
+    pipeline.etape("regles", regles_approchees if apriori_approche else regles_apriori, entrees=("vectoriser",),
+                   min_support=min_support, min_threshold=min_threshold)
+    if repliques_regles:
+        pipeline.etape("stabilite_regles", stabiliser_regles, entrees=("regles", "vectoriser"),
+                       nb_repliques=repliques_regles, min_support=min_support, min_threshold=min_threshold)
+    if familles:
+        pipeline.etape("familles", regrouper_familles, entrees=("vectoriser",))
+        pipeline.etape("modeles_familles", comparer_modeles, entrees=("familles",), modeles=tuple(modeles))
+    if cibles:
+        pipeline.etape("multi_cibles", comparer_cibles, entrees=("standardiser",),
+                       cibles=tuple(cibles), modeles=tuple(modeles))
+    return pipeline
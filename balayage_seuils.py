@@ -0,0 +1,132 @@
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from analyse_talc import fusionner_colonnes, normalize_inci
+
+SEUILS_DEFAUT = (0.05, 0.1, 0.15, 0.2, 0.25, 0.3, 0.35, 0.4, 0.5)
+
+
+def arbre_liaison(normalises):
+    """
+    Arbre de liaison moyenne (distance cosinus sur n-grammes de caractères
+    TF-IDF, comme standardiser()), calculé une seule fois pour tous les seuils.
+
+    Les vecteurs TF-IDF étant normés, les similarités cosinus sont obtenues
+    par un produit creux X @ X.T : seule la matrice des distances entre
+    ingrédients est densifiée, jamais celle des n-grammes.
+
+    Parameters:
+    -----------
+    normalises : array-like of str
+        Noms INCI normalisés (voir normalize_inci)
+
+    Returns:
+    --------
+    np.ndarray : matrice de liaison scipy ((n - 1) x 4)
+    """
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from scipy.cluster.hierarchy import linkage
+    from scipy.spatial.distance import squareform
+
+    X = TfidfVectorizer(analyzer="char_wb", ngram_range=(3, 5)).fit_transform(normalises)
+    distances = 1.0 - (X @ X.T).toarray()
+    np.clip(distances, 0.0, 2.0, out=distances)
+    np.fill_diagonal(distances, 0.0)
+    return linkage(squareform(distances, checks=False), method="average")
+
+
+def couper(arbre, seuil):
+    """
+    Clusters obtenus en coupant l'arbre à un seuil de distance.
+
+    Comme AgglomerativeClustering(distance_threshold=seuil), deux clusters ne
+    sont fusionnés que si leur distance est strictement inférieure au seuil.
+
+    Returns:
+    --------
+    np.ndarray : numéro de cluster de chaque ingrédient (à partir de 0)
+    """
+    from scipy.cluster.hierarchy import fcluster
+
+    return fcluster(arbre, np.nextafter(seuil, 0), criterion="distance") - 1
+
+
+def formes_standard(normalises, clusters):
+    """Forme canonique de chaque ingrédient : le nom normalisé le plus court de son cluster."""
+    table = pd.DataFrame({"normalized": np.asarray(normalises, dtype=object), "cluster": clusters})
+    ordre = table["normalized"].str.len().sort_values(kind="stable").index
+    courts = table.loc[ordre].groupby("cluster")["normalized"].first()
+    return table["cluster"].map(courts).to_numpy(dtype=object)
+
+
+def _tailles(clusters):
+    """Résumé de la distribution des tailles de clusters."""
+    tailles = np.bincount(clusters)
+    tailles = tailles[tailles > 0]
+    return {
+        "clusters_fusionnes": int((tailles > 1).sum()),
+        "taille_moyenne": float(tailles.mean()),
+        "taille_p95": float(np.percentile(tailles, 95)),
+        "taille_max": int(tailles.max()),
+    }
+
+
+def _scores_cible(matrice, colonnes, cible, modeles, test_size, random_state):
+    """F1-macro des modèles prédisant la colonne cible à partir des autres colonnes standard."""
+    from multi_cibles import _evaluer_cible, separer_cibles
+
+    if cible not in set(colonnes):
+        return {f"F1 {nom}": np.nan for nom in modeles}
+    X, Y, _ = separer_cibles(matrice, colonnes, [cible])
+    lignes = _evaluer_cible(X, Y[:, 0], cible, tuple(modeles), test_size, random_state)
+    return {f"F1 {ligne['Modèle']}": ligne["F1-macro"] for ligne in lignes}
+
+
+def balayer_seuils(binaire, seuils=SEUILS_DEFAUT, cible="TALC", modeles=("Logistic Regression",),
+                   test_size=0.2, random_state=42):
+    """
+    Courbe de réglage du seuil de standardisation (section 3.6) : l'arbre de
+    liaison est calculé une fois puis coupé à chaque seuil, au lieu de
+    relancer AgglomerativeClustering pour chaque valeur essayée.
+
+    Parameters:
+    -----------
+    binaire : dict
+        Résultat de analyse_talc.binariser()
+    seuils : iterable of float, optional
+        Seuils de distance cosinus à évaluer
+    cible : str, optional
+        Ingrédient standard prédit pour mesurer l'effet en aval (None : pas
+        de modèles). Par défaut "TALC"
+    modeles : tuple of str, optional
+        Modèles évalués (voir analyse_talc.creer_modele)
+    test_size, random_state :
+        Découpage train/test (voir multi_cibles.comparer_cibles)
+
+    Returns:
+    --------
+    pd.DataFrame : une ligne par seuil (colonnes standard, distribution des
+    tailles de clusters, F1-macro de chaque modèle et temps de la coupe)
+    """
+    normalises = pd.Series(binaire['colonnes']).map(normalize_inci).to_numpy(dtype=object)
+    debut = time.perf_counter()
+    arbre = arbre_liaison(normalises)
+    duree_arbre = time.perf_counter() - debut
+    print(f"Arbre de liaison : {len(normalises)} ingrédients en {duree_arbre:.2f} s")
+
+    matrice = sparse.csr_matrix(binaire['matrice'])
+    lignes = []
+    for seuil in seuils:
+        debut = time.perf_counter()
+        clusters = couper(arbre, seuil)
+        fusion, colonnes = fusionner_colonnes(matrice, formes_standard(normalises, clusters))
+        ligne = {"seuil": seuil, "colonnes": fusion.shape[1], **_tailles(clusters),
+                 "temps_coupe_s": time.perf_counter() - debut}
+        if cible is not None:
+            ligne.update(_scores_cible(fusion, colonnes, cible, modeles, test_size, random_state))
+        lignes.append(ligne)
+        print(f"Seuil {seuil:.2f} : {fusion.shape[1]} colonnes standard")
+    return pd.DataFrame(lignes)
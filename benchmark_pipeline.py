@@ -0,0 +1,240 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import pandas as pd
+import numpy as np
+
+import separer as sp
+import analyse_talc as at
+import explications as ex
+import generateur_catalogue as gc
+
+DOSSIER = os.path.dirname(os.path.abspath(__file__))
+FICHIER_SOURCE = os.path.join(DOSSIER, '375_cosmetikwatch_19_08_2025.xlsx')
+FICHIER_REFERENCES = os.path.join(DOSSIER, 'benchmark_references.json')
+TAILLES_DEFAUT = [10_000, 100_000, 1_000_000]
+
+# Codes de sortie de main()
+SORTIE_OK = 0
+SORTIE_REGRESSION = 1
+SORTIE_SANS_REFERENCE = 2   # état « enregistrer d'abord » : aucune référence pour cette machine
+
+# Taille maximale par étape : au-delà, les étapes quadratiques (ou denses)
+# dépasseraient le budget d'une exécution et sont marquées comme ignorées
+TAILLES_MAX = {
+    'separer_ingredients_binaire': 10_000,
+    'suggerer_fusions': 100_000,
+    'split_overlay': 1_000_000,
+    'MultiLabelBinarizer': 1_000_000,
+    'TF-IDF clustering': 10_000,
+    'vectorize': 1_000_000,
+    'vectorize (hachage)': 1_000_000,
+    'train': 100_000,
+    'apriori': 100_000,
+    'apriori (approché)': 1_000_000,
+    'explications': 100_000,
+}
+
+
+def _etape_separer(catalogue):
+    with open(os.devnull, 'w') as muet:
+        sortie, sys.stdout = sys.stdout, muet
+        try:
+            sp.separer_ingredients_binaire(catalogue, 'Ingrédients')
+        finally:
+            sys.stdout = sortie
+
+
+def _etape_fusions(catalogue):
+    tous = sp._extraire_tous_ingredients(catalogue, 'Ingrédients', ',')
+    tous = sp._filtrer_ingredients_indesirables(tous)
+    with open(os.devnull, 'w') as muet:
+        sortie, sys.stdout = sys.stdout, muet
+        try:
+            sp.suggerer_fusions(tous, seuil=0.85)
+        finally:
+            sys.stdout = sortie
+
+
+def _etape_overlay(catalogue):
+    at.decouper_overlays(catalogue)
+
+
+def _etape_binarizer(catalogue):
+    at.binariser(at.decouper_overlays(catalogue, colonnes=['Ingrédients']), catalogue)
+
+
+def _etape_clustering(catalogue):
+    at.standardiser(at.binariser(at.decouper_overlays(catalogue, colonnes=['Ingrédients']), catalogue))
+
+
+def _etape_vectorize(catalogue):
+    at.vectoriser(at.preparer_cible(catalogue))
+
+
+def _etape_vectorize_hachage(catalogue):
+    at.vectoriser(at.preparer_cible(catalogue), nb_features=2 ** 18)
+
+
+def _etape_train(catalogue):
+    at.comparer_modeles(at.vectoriser(at.preparer_cible(catalogue)))
+
+
+def _etape_apriori(catalogue):
+    at.regles_apriori(at.vectoriser(at.preparer_cible(catalogue)))
+
+
+def _etape_apriori_approche(catalogue):
+    at.regles_approchees(at.vectoriser(at.preparer_cible(catalogue)))
+
+
+def _etape_explications(catalogue):
+    # Modèles entraînés sur un échantillon : seul le débit d'explication du catalogue est mesuré
+    vect = at.vectoriser(at.preparer_cible(catalogue))
+    echantillon = slice(0, 10_000)
+    for nom in ("Logistic Regression", "Random Forest"):
+        modele = at.creer_modele(nom).fit(vect['X'][echantillon], vect['y'].iloc[echantillon])
+        debit = ex.mesurer_debit(modele, vect['X'], vect['colonnes'])
+        print(f"  {debit['modele']:<28} {debit['produits_par_s']:>12,.0f} produits/s")
+
+
+ETAPES = {
+    'separer_ingredients_binaire': _etape_separer,
+    'suggerer_fusions': _etape_fusions,
+    'split_overlay': _etape_overlay,
+    'MultiLabelBinarizer': _etape_binarizer,
+    'TF-IDF clustering': _etape_clustering,
+    'vectorize': _etape_vectorize,
+    'vectorize (hachage)': _etape_vectorize_hachage,
+    'train': _etape_train,
+    'apriori': _etape_apriori,
+    'apriori (approché)': _etape_apriori_approche,
+    'explications': _etape_explications,
+}
+
+
+def executer_benchmark(tailles=None, etapes=None, graine=0):
+    """
+    Chronomètre chaque étape du pipeline sur des catalogues synthétiques.
+
+    Parameters:
+    -----------
+    tailles : list of int, optional
+        Nombres de produits à générer. Par défaut 10k, 100k et 1M
+    etapes : list of str, optional
+        Étapes à mesurer. Par défaut toutes celles de ETAPES
+    graine : int, optional
+        Graine du générateur. Par défaut 0
+
+    Returns:
+    --------
+    pd.DataFrame : une ligne par (étape, taille) avec le temps en secondes
+    (NaN si l'étape dépasse sa taille maximale)
+    """
+    tailles = tailles or TAILLES_DEFAUT
+    etapes = etapes or list(ETAPES)
+    modele = gc.apprendre_distributions(pd.read_excel(FICHIER_SOURCE))
+
+    resultats = []
+    for taille in tailles:
+        catalogue = gc.generer_catalogue(modele, taille, graine=graine)
+        for nom in etapes:
+            if taille > TAILLES_MAX.get(nom, taille):
+                resultats.append({'etape': nom, 'taille': taille, 'temps_s': np.nan})
+                print(f"{nom:<30} {taille:>9} produits : ignorée (> {TAILLES_MAX[nom]})")
+                continue
+            debut = time.perf_counter()
+            ETAPES[nom](catalogue.copy())
+            duree = time.perf_counter() - debut
+            resultats.append({'etape': nom, 'taille': taille, 'temps_s': duree})
+            print(f"{nom:<30} {taille:>9} produits : {duree:.3f} s")
+
+    return pd.DataFrame(resultats)
+
+
+def comparer_references(resultats, chemin=FICHIER_REFERENCES, tolerance=0.25):
+    """
+    Compare les temps mesurés aux références enregistrées.
+
+    Parameters:
+    -----------
+    resultats : pd.DataFrame
+        Résultat de executer_benchmark()
+    chemin : str, optional
+        Fichier JSON des références
+    tolerance : float, optional
+        Ralentissement relatif toléré avant de signaler une régression. Par défaut 25%
+
+    Returns:
+    --------
+    pd.DataFrame : lignes en régression (vide si aucune)
+    """
+    with open(chemin, encoding='utf-8') as f:
+        references = json.load(f)
+
+    regressions = []
+    for _, row in resultats.dropna(subset=['temps_s']).iterrows():
+        reference = references.get(row['etape'], {}).get(str(row['taille']))
+        if reference is not None and row['temps_s'] > reference * (1 + tolerance):
+            regressions.append({
+                'etape': row['etape'],
+                'taille': row['taille'],
+                'temps_s': row['temps_s'],
+                'reference_s': reference,
+                'ratio': row['temps_s'] / reference,
+            })
+    return pd.DataFrame(regressions, columns=['etape', 'taille', 'temps_s', 'reference_s', 'ratio'])
+
+
+def enregistrer_references(resultats, chemin=FICHIER_REFERENCES):
+    """Enregistre les temps mesurés comme nouvelles références."""
+    references = {}
+    for _, row in resultats.dropna(subset=['temps_s']).iterrows():
+        references.setdefault(row['etape'], {})[str(row['taille'])] = round(row['temps_s'], 4)
+    with open(chemin, 'w', encoding='utf-8') as f:
+        json.dump(references, f, ensure_ascii=False, indent=2)
+    print(f"Références enregistrées: {chemin}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark de passage à l'échelle du pipeline TALC",
+        epilog=f"Les références sont propres à la machine de mesure et ne sont pas versionnées : "
+               f"lancer d'abord avec --enregistrer sur cette machine. Codes de sortie : {SORTIE_OK} aucune "
+               f"régression (ou références enregistrées), {SORTIE_REGRESSION} régression détectée, "
+               f"{SORTIE_SANS_REFERENCE} aucune référence ({os.path.basename(FICHIER_REFERENCES)}) à comparer."
+    )
+    parser.add_argument('--tailles', type=int, nargs='+', default=TAILLES_DEFAUT)
+    parser.add_argument('--etapes', nargs='+', choices=list(ETAPES), default=None)
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    parser.add_argument('--enregistrer', action='store_true',
+                        help="enregistre les temps mesurés comme références")
+    args = parser.parse_args(argv)
+
+    # Vérifié avant de mesurer : sans références, l'exécution ne pourrait rien comparer
+    if not args.enregistrer and not os.path.exists(FICHIER_REFERENCES):
+        print(f"Aucune référence ({FICHIER_REFERENCES}) : enregistrer d'abord une exécution de référence "
+              f"sur cette machine avec --enregistrer")
+        return SORTIE_SANS_REFERENCE
+
+    resultats = executer_benchmark(args.tailles, args.etapes)
+    print("\n" + resultats.pivot(index='etape', columns='taille', values='temps_s').to_string())
+
+    if args.enregistrer:
+        enregistrer_references(resultats)
+        return SORTIE_OK
+
+    regressions = comparer_references(resultats, tolerance=args.tolerance)
+    if len(regressions):
+        print("\nRÉGRESSIONS DÉTECTÉES")
+        print(regressions.to_string(index=False))
+        return SORTIE_REGRESSION
+    print("\nAucune régression.")
+    return SORTIE_OK
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,113 @@
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import os
+
+DOSSIER = os.path.dirname(os.path.abspath(__file__))
+
+# Socle importé avant la mesure : son coût est commun à tout le projet et
+# n'est pas imputé aux modules
+PRELUDE = "import numpy, pandas"
+
+# Budget (ms) du temps d'import cumulé de chaque module, socle déjà chargé.
+# None : pas de socle, le module doit se charger sans pandas
+BUDGETS = {
+    'predcompact': (None, 15),
+    'instrumentation': (None, 30),
+    'separer': (PRELUDE, 60),
+    'tableau_dynamique': (PRELUDE, 60),
+    'histogramme_marques': (PRELUDE, 60),
+    'camembert_pays': (PRELUDE, 60),
+    'parseur_inci': (PRELUDE, 60),
+    'schema': (PRELUDE, 60),
+    'analyse_talc': (PRELUDE, 200),
+    'explications': (PRELUDE, 200),
+}
+
+# Bibliothèques lourdes qu'un simple import ne doit jamais charger
+INTERDITS = ('matplotlib', 'IPython', 'sklearn', 'seaborn', 'plotly', 'networkx', 'mlxtend', 'streamlit')
+
+
+def mesurer(module, prelude=None):
+    """
+    Temps d'import cumulé d'un module (python -X importtime, processus neuf).
+
+    Parameters:
+    -----------
+    module : str
+        Module à importer
+    prelude : str, optional
+        Instructions exécutées avant l'import (modules déjà chargés non comptés)
+
+    Returns:
+    --------
+    tuple : (temps en ms, bibliothèques interdites chargées)
+    """
+    code = (f"{prelude or 'pass'}\nimport {module}\nimport json, sys\n"
+            f"print(json.dumps([m for m in {list(INTERDITS)!r} if m in sys.modules]))")
+    resultat = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        capture_output=True, text=True, cwd=DOSSIER, check=True
+    )
+    cumul = None
+    for ligne in resultat.stderr.splitlines():
+        # "import time:  self [us] | cumulative | imported package" ; niveau 0 sans indentation
+        champs = ligne.split('|')
+        if len(champs) == 3 and champs[2].rstrip() == f" {module}":
+            cumul = int(champs[1])
+    charges = json.loads(resultat.stdout.strip().splitlines()[-1])
+    return (cumul or 0) / 1000, charges
+
+
+def verifier(budgets=None, repetitions=3, marge=1.0):
+    """
+    Vérifie les budgets d'import (médiane de plusieurs processus).
+
+    Parameters:
+    -----------
+    budgets : dict, optional
+        {module: (prelude, budget_ms)}. Par défaut BUDGETS
+    repetitions : int, optional
+        Nombre de mesures par module. Par défaut 3
+    marge : float, optional
+        Facteur appliqué aux budgets (machines lentes). Par défaut 1.0
+
+    Returns:
+    --------
+    list of dict : une ligne par module, avec 'ok'
+    """
+    budgets = budgets or BUDGETS
+    lignes = []
+    for module, (prelude, budget) in budgets.items():
+        mesures = [mesurer(module, prelude) for _ in range(repetitions)]
+        temps = statistics.median(m[0] for m in mesures)
+        charges = sorted(set().union(*(m[1] for m in mesures)))
+        ok = temps <= budget * marge and not charges
+        lignes.append({'module': module, 'temps_ms': temps, 'budget_ms': budget * marge,
+                       'interdits': charges, 'ok': ok})
+        etat = "OK " if ok else "DÉPASSÉ"
+        print(f"{etat:<8} {module:<22} {temps:>8.1f} ms / {budget * marge:>6.0f} ms"
+              + (f"  charge : {', '.join(charges)}" if charges else ""))
+    return lignes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Budget des temps d'import (python -X importtime)")
+    parser.add_argument('--repetitions', type=int, default=3)
+    parser.add_argument('--marge', type=float, default=1.0,
+                        help="facteur appliqué aux budgets (ex: 2 sur une machine d'intégration lente)")
+    args = parser.parse_args(argv)
+
+    lignes = verifier(repetitions=args.repetitions, marge=args.marge)
+    echecs = [ligne['module'] for ligne in lignes if not ligne['ok']]
+    if echecs:
+        print(f"\nBudget d'import dépassé : {', '.join(echecs)}")
+        return 1
+    print("\nTous les budgets d'import sont respectés.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
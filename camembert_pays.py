@@ -1,7 +1,10 @@
 import pandas as pd
-import matplotlib.pyplot as plt
 
-def creer_camembert_pays(data_ingredient, seuil_pourcentage=2, figsize=(18, 8)):
+from instrumentation import instrumenter
+from schema import MADE_IN, compter
+
+@instrumenter()
+def creer_camembert_pays(data_ingredient, seuil_pourcentage=2, figsize=(18, 8), comptage=None):
     """
     Crée deux diagrammes camembert côte à côte :
     - Le premier montre la répartition des pays avec >= seuil_pourcentage%, les autres regroupés dans "Autres"
@@ -15,13 +18,18 @@ def creer_camembert_pays(data_ingredient, seuil_pourcentage=2, figsize=(18, 8)):
         Seuil en pourcentage pour séparer les pays principaux. Par défaut 2%
     figsize : tuple, optional
         Taille de la figure (largeur, hauteur). Par défaut (18, 8)
+    comptage : pd.Series, optional
+        Effectifs par pays déjà calculés (ex: produits contenant du TALC, voir
+        prevalence.Prevalences.effectifs). Par défaut compter(data_ingredient['Made in'])
     
     Returns:
     --------
     tuple : (fig, pays_principaux, pays_autres, pourcentages)
     """
-    # Compter les produits par pays (Made in)
-    produits_par_pays = data_ingredient['Made in'].value_counts()
+    import matplotlib.pyplot as plt
+
+    # Compter les produits par pays (Made in), sur les codes entiers si la colonne est catégorielle
+    produits_par_pays = compter(data_ingredient[MADE_IN]) if comptage is None else comptage
     
     # Calculer les pourcentages
     pourcentages = (produits_par_pays / produits_par_pays.sum() * 100).round(1)
@@ -100,7 +108,7 @@ def creer_camembert_pays(data_ingredient, seuil_pourcentage=2, figsize=(18, 8)):
     return fig, pays_principaux, pays_autres, pourcentages
 
 
-def afficher_camembert_pays(data_ingredient, seuil_pourcentage=2, figsize=(18, 8)):
+def afficher_camembert_pays(data_ingredient, seuil_pourcentage=2, figsize=(18, 8), comptage=None):
     """
     Crée et affiche les diagrammes camembert avec statistiques détaillées.
     
@@ -112,15 +120,19 @@ def afficher_camembert_pays(data_ingredient, seuil_pourcentage=2, figsize=(18, 8
         Seuil en pourcentage pour séparer les pays principaux. Par défaut 2%
     figsize : tuple, optional
         Taille de la figure (largeur, hauteur). Par défaut (18, 8)
+    comptage : pd.Series, optional
+        Effectifs par pays déjà calculés (voir creer_camembert_pays)
     """
+    import matplotlib.pyplot as plt
+
     _, pays_principaux, pays_autres, pourcentages = creer_camembert_pays(
-        data_ingredient, seuil_pourcentage, figsize
+        data_ingredient, seuil_pourcentage, figsize, comptage
     )
     
     plt.show()
     
     # Afficher les statistiques détaillées
-    produits_par_pays = data_ingredient['Made in'].value_counts()
+    produits_par_pays = compter(data_ingredient[MADE_IN]) if comptage is None else comptage
     
     print("\n" + "="*60)
     print(f"PAYS PRINCIPAUX (≥ {seuil_pourcentage}%)")
@@ -0,0 +1,301 @@
+import hashlib
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+MESURES = ('pmi', 'npmi', 'lift')
+_CACHE = {}
+
+
+def graphe_cooccurrence(matrice, mesure='pmi', seuil=0.0, min_cooccurrences=3):
+    """
+    Graphe pondéré ingrédient x ingrédient tiré des co-occurrences (Xᵀ X
+    creux), normalisées par l'information mutuelle ponctuelle ou le lift.
+
+    Parameters:
+    -----------
+    matrice : scipy.sparse matrix
+        Matrice binaire produits x ingrédients
+    mesure : str, optional
+        'pmi' (log du lift), 'npmi' (PMI normalisée dans [-1, 1]) ou 'lift'.
+        Par défaut 'pmi'
+    seuil : float, optional
+        Poids minimal (exclu) d'une arête conservée. Par défaut 0 (pour le
+        lift, un seuil inférieur à 1 est relevé à 1 : seules les associations
+        positives sont gardées)
+    min_cooccurrences : int, optional
+        Nombre minimal de produits communs : écarte les paires rares dont la
+        PMI est instable. Par défaut 3
+
+    Returns:
+    --------
+    scipy.sparse.csr_matrix : matrice d'adjacence symétrique (float64), sans diagonale
+    """
+    if mesure not in MESURES:
+        raise ValueError(f"Mesure inconnue : {mesure} (disponibles : {list(MESURES)})")
+    X = sparse.csr_matrix(matrice, dtype=np.int32)
+    X.data[:] = 1
+    n = X.shape[0]
+    frequences = np.asarray(X.sum(axis=0)).ravel().astype(np.float64)
+
+    cooc = sparse.triu(X.T @ X, k=1).tocoo()
+    garder = cooc.data >= min_cooccurrences
+    lignes, colonnes, nombres = cooc.row[garder], cooc.col[garder], cooc.data[garder].astype(np.float64)
+
+    lift = n * nombres / (frequences[lignes] * frequences[colonnes])
+    if mesure == 'lift':
+        poids, seuil = lift, max(seuil, 1.0)
+    else:
+        poids = np.log(lift)
+        if mesure == 'npmi':
+            # Paires présentes dans tous les produits : -log p = 0, PMI nulle
+            poids = np.divide(poids, -np.log(nombres / n), out=np.zeros_like(poids), where=nombres < n)
+    garder = poids > max(seuil, 0.0)
+
+    nb = X.shape[1]
+    graphe = sparse.coo_matrix((poids[garder], (lignes[garder], colonnes[garder])), shape=(nb, nb))
+    return (graphe + graphe.T).tocsr()
+
+
+def modularite(graphe, communautes, resolution=1.0):
+    """Modularité (Newman) d'une partition d'un graphe pondéré."""
+    graphe = sparse.csr_matrix(graphe)
+    degres = np.asarray(graphe.sum(axis=1)).ravel()
+    total = degres.sum()
+    if total == 0:
+        return 0.0
+    coo = graphe.tocoo()
+    interne = coo.data[communautes[coo.row] == communautes[coo.col]].sum()
+    volumes = np.bincount(communautes, weights=degres)
+    return float(interne / total - resolution * np.sum((volumes / total) ** 2))
+
+
+def _deplacements(graphe, resolution, rng, fraction, max_iterations):
+    """
+    Phase de déplacements locaux de Louvain, vectorisée : à chaque itération,
+    tous les nœuds évaluent en une fois le gain de modularité vers chaque
+    communauté voisine (somme creuse des poids par (nœud, communauté)) et
+    une fraction aléatoire des nœuds améliorables change de communauté
+    (mises à jour partielles : évite les oscillations des mises à jour
+    synchrones). La meilleure partition rencontrée est conservée.
+    """
+    n = graphe.shape[0]
+    degres = np.asarray(graphe.sum(axis=1)).ravel()
+    total = degres.sum()
+    coo = graphe.tocoo()
+    hors_diagonale = coo.row != coo.col
+    lignes, colonnes, poids = coo.row[hors_diagonale], coo.col[hors_diagonale], coo.data[hors_diagonale]
+
+    communautes = np.arange(n)
+    meilleures, meilleure_q = communautes.copy(), modularite(graphe, communautes, resolution)
+    for _ in range(max_iterations):
+        volumes = np.bincount(communautes, weights=degres, minlength=n)
+        # Poids de chaque nœud vers chaque communauté voisine
+        vers = sparse.csr_matrix((poids, (lignes, communautes[colonnes])), shape=(n, n))
+        vers.sum_duplicates()
+        noeuds = np.repeat(np.arange(n), np.diff(vers.indptr))
+        cibles = vers.indices
+        propre = cibles == communautes[noeuds]
+        # Volume de la communauté cible sans le nœud lui-même
+        gains = vers.data - resolution * degres[noeuds] * (volumes[cibles] - propre * degres[noeuds]) / total
+
+        gain_actuel = -resolution * degres * (volumes[communautes] - degres) / total
+        gain_actuel[noeuds[propre]] = gains[propre]
+
+        ordre = np.lexsort((-gains, noeuds))
+        premiers = ordre[np.r_[True, noeuds[ordre][1:] != noeuds[ordre][:-1]]] if len(ordre) else ordre
+        candidats = noeuds[premiers]
+        ameliore = gains[premiers] > gain_actuel[candidats] + 1e-12
+        candidats, destinations = candidats[ameliore], cibles[premiers][ameliore]
+        if not len(candidats):
+            break
+        tirage = rng.random(len(candidats)) < fraction
+        communautes = communautes.copy()
+        communautes[candidats[tirage]] = destinations[tirage]
+
+        q = modularite(graphe, communautes, resolution)
+        if q > meilleure_q:
+            meilleures, meilleure_q = communautes.copy(), q
+    return np.unique(meilleures, return_inverse=True)[1]
+
+
+def louvain(graphe, resolution=1.0, graine=0, fraction=0.5, max_iterations=50, max_niveaux=10):
+    """
+    Détection de communautés de Louvain sur une matrice d'adjacence CSR :
+    déplacements locaux vectorisés (voir _deplacements), puis agrégation des
+    communautés en super-nœuds (Pᵀ A P) et itération sur le graphe réduit.
+
+    Parameters:
+    -----------
+    graphe : scipy.sparse matrix
+        Matrice d'adjacence symétrique à poids positifs
+    resolution : float, optional
+        Résolution de la modularité (> 1 : communautés plus petites). Par défaut 1
+    graine : int, optional
+        Graine du tirage des nœuds déplacés. Par défaut 0
+    fraction : float, optional
+        Part des nœuds améliorables déplacés à chaque itération. Par défaut 0.5
+    max_iterations, max_niveaux : int, optional
+        Bornes des itérations par niveau et du nombre de niveaux
+
+    Returns:
+    --------
+    np.ndarray : communauté de chaque nœud (numérotées à partir de 0)
+    """
+    rng = np.random.default_rng(graine)
+    graphe = sparse.csr_matrix(graphe, dtype=np.float64)
+    communautes = np.arange(graphe.shape[0])
+    if graphe.nnz == 0:
+        return communautes
+    for _ in range(max_niveaux):
+        locales = _deplacements(graphe, resolution, rng, fraction, max_iterations)
+        nb = locales.max() + 1
+        if nb == graphe.shape[0]:
+            break
+        communautes = locales[communautes]
+        projection = sparse.csr_matrix((np.ones(len(locales)), (np.arange(len(locales)), locales)),
+                                       shape=(len(locales), nb))
+        graphe = (projection.T @ graphe @ projection).tocsr()
+    return communautes
+
+
+def _empreinte(matrice, colonnes, parametres):
+    """Empreinte SHA-256 du contenu d'une matrice creuse, de ses colonnes et des paramètres."""
+    X = sparse.csr_matrix(matrice)
+    X.sort_indices()
+    sha = hashlib.sha256(repr((X.shape, sorted(parametres.items()))).encode('utf-8'))
+    sha.update('\x1f'.join(map(str, colonnes)).encode('utf-8'))
+    for tableau in (X.indptr, X.indices, X.data):
+        sha.update(np.ascontiguousarray(tableau).tobytes())
+    return sha.hexdigest()
+
+
+def detecter_familles(matrice, colonnes, mesure='pmi', seuil=0.0, min_cooccurrences=3, resolution=1.0, graine=0,
+                      dossier_cache='.cache_communautes'):
+    """
+    Familles d'ingrédients qui apparaissent ensemble (systèmes de pigments,
+    de liants...) : graphe de co-occurrences normalisé, élagué, puis
+    communautés de Louvain. Le résultat est mis en cache (mémoire et disque)
+    par version de la matrice : même contenu et mêmes paramètres -> même clé.
+
+    Parameters:
+    -----------
+    matrice : scipy.sparse matrix
+        Matrice binaire produits x ingrédients
+    colonnes : array-like
+        Noms des ingrédients
+    mesure, seuil, min_cooccurrences :
+        Construction du graphe (voir graphe_cooccurrence)
+    resolution, graine :
+        Détection des communautés (voir louvain)
+    dossier_cache : str, optional
+        Dossier du cache disque (None : cache mémoire seulement)
+
+    Returns:
+    --------
+    dict : 'communautes' (famille de chaque ingrédient), 'familles'
+    (table ingredient / famille / frequence / taille, triée par famille
+    puis fréquence), 'modularite' et 'cle' (empreinte de la version)
+    """
+    parametres = dict(mesure=mesure, seuil=seuil, min_cooccurrences=min_cooccurrences,
+                      resolution=resolution, graine=graine)
+    cle = _empreinte(matrice, colonnes, parametres)
+    if cle in _CACHE:
+        return _CACHE[cle]
+    chemin = os.path.join(dossier_cache, f"communautes-{cle[:16]}.pkl") if dossier_cache else None
+    if chemin and os.path.exists(chemin):
+        with open(chemin, 'rb') as f:
+            _CACHE[cle] = pickle.load(f)
+        print(f"[cache] familles d'ingrédients {cle[:16]}")
+        return _CACHE[cle]
+
+    graphe = graphe_cooccurrence(matrice, mesure, seuil, min_cooccurrences)
+    communautes = louvain(graphe, resolution, graine)
+    # Familles numérotées par taille décroissante
+    tailles = np.bincount(communautes)
+    rang = np.empty_like(tailles)
+    rang[np.argsort(-tailles, kind='stable')] = np.arange(len(tailles))
+    communautes = rang[communautes]
+
+    frequences = np.asarray(sparse.csr_matrix(matrice).astype(bool).sum(axis=0)).ravel()
+    familles = pd.DataFrame({
+        'ingredient': np.asarray(colonnes, dtype=object),
+        'famille': communautes,
+        'frequence': frequences,
+        'taille': np.bincount(communautes)[communautes],
+    }).sort_values(['famille', 'frequence'], ascending=[True, False], ignore_index=True)
+    resultat = {
+        'communautes': communautes,
+        'familles': familles,
+        'modularite': modularite(graphe, communautes, resolution),
+        'cle': cle,
+    }
+    print(f"Arêtes conservées : {graphe.nnz // 2}, familles (>= 2 ingrédients) : "
+          f"{int((np.bincount(communautes) >= 2).sum())}, modularité : {resultat['modularite']:.3f}")
+
+    _CACHE[cle] = resultat
+    if chemin:
+        os.makedirs(dossier_cache, exist_ok=True)
+        with open(chemin + '.tmp', 'wb') as f:
+            pickle.dump(resultat, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(chemin + '.tmp', chemin)
+    return resultat
+
+
+def caracteristiques_familles(vect, familles, taille_min=2, binaire=False, nb_noms=3, avec_ingredients=False):
+    """
+    Variables groupées pour les modèles TALC : une colonne par famille
+    (nombre d'ingrédients de la famille présents, ou présence si binaire),
+    les ingrédients hors famille (taille < taille_min) restant isolés.
+    Avec avec_ingredients, les colonnes de familles s'ajoutent à toutes les
+    colonnes d'origine au lieu de remplacer leurs membres.
+
+    Parameters:
+    -----------
+    vect : dict
+        'X', 'y' et 'colonnes' (ex: résultat de analyse_talc.vectoriser())
+    familles : dict
+        Résultat de detecter_familles() sur vect['X']
+    taille_min : int, optional
+        Taille minimale d'une famille regroupée. Par défaut 2
+    binaire : bool, optional
+        Présence (0/1) plutôt que nombre d'ingrédients. Par défaut False
+    nb_noms : int, optional
+        Nombre d'ingrédients (les plus fréquents) cités dans le nom d'une famille
+    avec_ingredients : bool, optional
+        Conserve toutes les colonnes d'ingrédients. Par défaut False
+
+    Returns:
+    --------
+    dict : 'X' (CSR produits x variables), 'y' et 'colonnes', comme vect
+    """
+    communautes = familles['communautes']
+    tailles = np.bincount(communautes)
+    groupee = tailles[communautes] >= taille_min
+    # Variables : familles regroupées d'abord, puis ingrédients isolés
+    codes_familles, variables = np.unique(communautes[groupee], return_inverse=True)
+    destination = np.empty(len(communautes), dtype=np.int64)
+    destination[groupee] = variables
+    destination[~groupee] = len(codes_familles) + np.arange(int((~groupee).sum()))
+
+    nb_variables = len(codes_familles) + int((~groupee).sum())
+    projection = sparse.csr_matrix((np.ones(len(communautes), dtype=np.int32),
+                                    (np.arange(len(communautes)), destination)),
+                                   shape=(len(communautes), nb_variables))
+    X = sparse.csr_matrix(vect['X'], dtype=np.int32) @ projection
+    if binaire:
+        X.data = np.minimum(X.data, 1)
+
+    # Table triée par famille puis fréquence : les premiers noms sont les plus fréquents
+    premiers = familles['familles'].groupby('famille')['ingredient'].apply(lambda s: " + ".join(s.head(nb_noms)))
+    noms_familles = [f"famille {code} : {premiers[code]}" for code in codes_familles]
+    colonnes = np.r_[np.array(noms_familles, dtype=object), np.asarray(vect['colonnes'], dtype=object)[~groupee]]
+    if avec_ingredients:
+        X = sparse.hstack([X[:, :len(codes_familles)], sparse.csr_matrix(vect['X'], dtype=np.int32)])
+        colonnes = np.r_[colonnes[:len(codes_familles)], np.asarray(vect['colonnes'], dtype=object)]
+        nb_variables = X.shape[1]
+    print(f"Variables : {len(communautes)} ingrédients -> {nb_variables} ({len(codes_familles)} familles)")
+    return {'X': X.tocsr(), 'y': vect['y'], 'colonnes': colonnes}
@@ -0,0 +1,301 @@
+import pandas as pd
+import numpy as np
+from scipy import sparse
+
+from sketches import hacher
+
+_MASQUE_64 = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+# Au-delà de cette taille, un seau LSH ne relie ses produits qu'à son premier produit
+_TAILLE_MAX_SEAU = 64
+
+# Listes INCI absentes une fois converties en texte (nettoyer() applique astype(str) puis upper())
+VALEURS_MANQUANTES = ('', 'NAN', 'NONE')
+
+
+def _melanger(x):
+    """Fonction de mélange splitmix64 vectorisée (uint64 -> uint64)."""
+    x = np.asarray(x, dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        x = x + np.uint64(0x9E3779B97F4A7C15)
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def eclater_ingredients(ingredients):
+    """
+    Ingrédients canoniques de chaque produit, une ligne par ingrédient.
+
+    La canonisation ignore l'ordre, la casse, les astérisques, les espaces
+    multiples et le préfixe de teinte ("INCI TEINTE ... :").
+
+    Parameters:
+    -----------
+    ingredients : pd.Series
+        Colonne des listes INCI
+
+    Returns:
+    --------
+    pd.Series : noms canoniques, indexés par la position du produit
+    """
+    eclate = (
+        ingredients.reset_index(drop=True).dropna().astype(str)
+        .str.upper()
+        .str.replace(r"^[^:]*:", "", regex=True)
+        .str.replace("*", "", regex=False)
+        .str.split(",")
+        .explode()
+        .str.replace(r"\s+", " ", regex=True)
+        .str.strip()
+    )
+    return eclate[eclate.str.len() > 0]
+
+
+def ensembles_canoniques(ingredients):
+    """
+    Ensemble canonique d'ingrédients de chaque produit, sous forme longue
+    (voir eclater_ingredients()).
+
+    Parameters:
+    -----------
+    ingredients : pd.Series
+        Colonne des listes INCI
+
+    Returns:
+    --------
+    tuple : (positions des produits, hachages uint64 des ingrédients), triés
+    par produit puis par hachage, sans doublon au sein d'un produit
+    """
+    eclate = eclater_ingredients(ingredients)
+    positions = eclate.index.to_numpy(dtype=np.int64)
+    hachages = hacher(eclate.to_numpy(dtype=object))
+
+    ordre = np.lexsort((hachages, positions))
+    positions, hachages = positions[ordre], hachages[ordre]
+    nouveaux = np.r_[True, (positions[1:] != positions[:-1]) | (hachages[1:] != hachages[:-1])]
+    return positions[nouveaux], hachages[nouveaux]
+
+
+def empreintes_exactes(positions, hachages, nb_produits):
+    """
+    Empreinte exacte de l'ensemble d'ingrédients de chaque produit
+    (somme commutative de hachages mélangés : indépendante de l'ordre).
+    """
+    empreintes = np.zeros(nb_produits, dtype=np.uint64)
+    if len(positions):
+        debuts = np.flatnonzero(np.r_[True, positions[1:] != positions[:-1]])
+        with np.errstate(over='ignore'):
+            sommes = np.add.reduceat(_melanger(hachages), debuts)
+        empreintes[positions[debuts]] = sommes
+    return empreintes
+
+
+def signatures_minhash(positions, hachages, nb_produits, nb_permutations=128, graine=0, taille_bloc=100_000):
+    """
+    Signatures MinHash (nb_produits x nb_permutations) des ensembles d'ingrédients.
+
+    Parameters:
+    -----------
+    positions, hachages : np.ndarray
+        Résultat de ensembles_canoniques()
+    nb_produits : int
+        Nombre de produits
+    nb_permutations : int, optional
+        Nombre de fonctions de hachage. Par défaut 128
+    graine : int, optional
+        Graine des permutations. Par défaut 0
+    taille_bloc : int, optional
+        Nombre maximal d'ingrédients traités à la fois (borne la mémoire)
+
+    Returns:
+    --------
+    np.ndarray : signatures uint64 (produit sans ingrédient = valeur maximale)
+    """
+    rng = np.random.default_rng(graine)
+    graines = rng.integers(0, np.iinfo(np.int64).max, size=(nb_permutations, 1), dtype=np.int64).astype(np.uint64)
+    # Multiplicateurs impairs : h_i(x) = ((x ^ graine_i) * a_i) ^ décalage, bijectif sur 64 bits
+    multiplicateurs = rng.integers(0, np.iinfo(np.int64).max, size=(nb_permutations, 1), dtype=np.int64).astype(np.uint64) | np.uint64(1)
+    signatures = np.full((nb_produits, nb_permutations), _MASQUE_64, dtype=np.uint64)
+    if not len(positions):
+        return signatures
+
+    debuts_produits = np.flatnonzero(np.r_[True, positions[1:] != positions[:-1]])
+    # Découpage aux frontières de produits pour ne jamais couper un ensemble
+    coupures = debuts_produits[::max(1, len(debuts_produits) * taille_bloc // max(len(positions), 1))]
+    coupures = np.r_[coupures, len(positions)]
+    for debut, fin in zip(coupures[:-1], coupures[1:]):
+        bloc_positions = positions[debut:fin]
+        with np.errstate(over='ignore'):
+            valeurs = (hachages[None, debut:fin] ^ graines) * multiplicateurs
+        valeurs ^= valeurs >> np.uint64(29)
+        debuts = np.flatnonzero(np.r_[True, bloc_positions[1:] != bloc_positions[:-1]])
+        signatures[bloc_positions[debuts]] = np.minimum.reduceat(valeurs, debuts, axis=1).T
+    return signatures
+
+
+def _paires_candidates(signatures, nb_bandes, taille_max_seau=_TAILLE_MAX_SEAU):
+    """
+    Paires candidates par bandes LSH : toutes les paires d'un même seau
+    (deux produits proches d'un troisième ne le sont pas forcément de lui),
+    sauf dans les seaux de plus de taille_max_seau produits où chaque
+    produit n'est relié qu'au premier du seau (nombre de paires borné).
+    """
+    nb_produits, nb_permutations = signatures.shape
+    lignes_par_bande = nb_permutations // nb_bandes
+    sources, cibles = [], []
+    for bande in range(nb_bandes):
+        tranche = signatures[:, bande * lignes_par_bande:(bande + 1) * lignes_par_bande]
+        cles = _melanger(tranche[:, 0])
+        for j in range(1, lignes_par_bande):
+            cles = _melanger(cles ^ tranche[:, j])
+        ordre = np.argsort(cles, kind='stable')
+        cles_triees = cles[ordre]
+        debut_seau = np.flatnonzero(np.r_[True, cles_triees[1:] != cles_triees[:-1]])
+        tailles = np.diff(np.r_[debut_seau, nb_produits])
+        seau = np.repeat(np.arange(len(debut_seau)), tailles)
+        taille = tailles[seau]
+
+        # Grands seaux : liaison au premier produit du seau
+        premier = ordre[debut_seau][seau]
+        lies = (premier != ordre) & (taille > taille_max_seau)
+        sources.append(premier[lies])
+        cibles.append(ordre[lies])
+
+        # Petits seaux : toutes les paires, par décalage dans l'ordre trié
+        multiples = (taille > 1) & (taille <= taille_max_seau)
+        membres, seaux_membres = ordre[multiples], seau[multiples]
+        for decalage in range(1, int(taille[multiples].max(initial=1))):
+            meme = seaux_membres[:-decalage] == seaux_membres[decalage:]
+            sources.append(membres[:-decalage][meme])
+            cibles.append(membres[decalage:][meme])
+    sources, cibles = np.concatenate(sources), np.concatenate(cibles)
+    if not len(sources):
+        return sources, cibles
+    paires = np.unique(np.rec.fromarrays([np.minimum(sources, cibles), np.maximum(sources, cibles)], names='a,b'))
+    return paires['a'].astype(np.int64), paires['b'].astype(np.int64)
+
+
+def detecter_doublons(ingredients, seuil_jaccard=0.9, nb_permutations=128, nb_bandes=16, graine=0):
+    """
+    Détecte les doublons exacts (même ensemble d'ingrédients) et les
+    quasi-doublons (similarité de Jaccard estimée >= seuil) en temps
+    quasi linéaire, sans comparaison de toutes les paires.
+
+    Parameters:
+    -----------
+    ingredients : pd.Series
+        Colonne des listes INCI
+    seuil_jaccard : float, optional
+        Similarité de Jaccard minimale entre quasi-doublons. Par défaut 0.9
+    nb_permutations : int, optional
+        Taille des signatures MinHash. Par défaut 128
+    nb_bandes : int, optional
+        Nombre de bandes LSH (nb_permutations doit en être multiple). Par défaut 16
+    graine : int, optional
+        Graine des permutations. Par défaut 0
+
+    Returns:
+    --------
+    pd.DataFrame : une ligne par produit (même index que ingredients) avec
+    'empreinte' (ensemble exact), 'cluster' (identifiant du groupe de
+    doublons) et 'taille_cluster'. Un produit sans ingrédient forme son
+    propre groupe.
+    """
+    from scipy.sparse.csgraph import connected_components
+
+    if nb_permutations % nb_bandes:
+        raise ValueError("nb_permutations doit être un multiple de nb_bandes")
+    nb_produits = len(ingredients)
+    positions, hachages = ensembles_canoniques(ingredients)
+    empreintes = empreintes_exactes(positions, hachages, nb_produits)
+    signatures = signatures_minhash(positions, hachages, nb_produits, nb_permutations, graine)
+
+    # Les doublons exacts ont des signatures identiques : on ne compare que des représentants
+    _, representants, inverse = np.unique(empreintes, return_index=True, return_inverse=True)
+    sources, cibles = _paires_candidates(signatures[representants], nb_bandes)
+
+    # Vérification exacte des seules paires candidates (Jaccard sur les ensembles)
+    _, codes = np.unique(hachages, return_inverse=True)
+    ensembles = sparse.csr_matrix(
+        (np.ones(len(codes), dtype=np.float32), (positions, codes.ravel())),
+        shape=(nb_produits, int(codes.max()) + 1 if len(codes) else 0)
+    )[representants]
+    tailles = np.asarray(ensembles.sum(axis=1)).ravel()
+    intersections = np.asarray(ensembles[sources].multiply(ensembles[cibles]).sum(axis=1)).ravel()
+    unions = np.maximum(tailles[sources] + tailles[cibles] - intersections, 1)
+    garder = intersections / unions >= seuil_jaccard
+
+    graphe = sparse.coo_matrix(
+        (np.ones(int(garder.sum())), (sources[garder], cibles[garder])),
+        shape=(len(representants), len(representants))
+    )
+    _, composantes = connected_components(graphe, directed=False)
+    clusters = composantes[inverse.ravel()]
+    # Les produits sans ingrédient ont tous l'ensemble vide : aucun n'est le doublon d'un autre
+    vides = np.ones(nb_produits, dtype=bool)
+    vides[positions] = False
+    clusters[vides] = clusters.max(initial=-1) + 1 + np.arange(int(vides.sum()))
+
+    resultat = pd.DataFrame({'empreinte': empreintes, 'cluster': clusters}, index=ingredients.index)
+    resultat['taille_cluster'] = resultat.groupby('cluster')['cluster'].transform('size')
+    nb_exacts = nb_produits - int(vides.sum()) - len(np.unique(empreintes[~vides]))
+    nb_groupes = int((np.bincount(clusters) > 1).sum())
+    print(f"Doublons exacts (même ensemble d'ingrédients) : {nb_exacts}")
+    print(f"Groupes de doublons / quasi-doublons (Jaccard >= {seuil_jaccard}) : {nb_groupes}")
+    return resultat
+
+
+def clusters_doublons(df, doublons, colonnes=('Nom', 'Marque')):
+    """
+    Liste les groupes de doublons de plus d'un produit.
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Export d'origine
+    doublons : pd.DataFrame
+        Résultat de detecter_doublons()
+    colonnes : tuple of str, optional
+        Colonnes descriptives à afficher
+
+    Returns:
+    --------
+    pd.DataFrame : produits des groupes de taille > 1, triés par groupe
+    """
+    multiples = doublons[doublons['taille_cluster'] > 1]
+    return (df.loc[multiples.index, list(colonnes)]
+            .join(multiples[['cluster', 'taille_cluster']])
+            .sort_values(['taille_cluster', 'cluster'], ascending=[False, True]))
+
+
+def fusionner_doublons(df, colonne_ingredient='Ingrédients', seuil_jaccard=0.9, **options):
+    """
+    Ne garde qu'un produit par groupe de doublons, pour que des quasi-copies
+    ne se retrouvent pas à la fois dans le train et le test.
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Export à dédoublonner
+    colonne_ingredient : str, optional
+        Colonne des listes INCI. Par défaut 'Ingrédients'
+    seuil_jaccard : float, optional
+        Similarité de Jaccard minimale. Par défaut 0.9
+    **options :
+        Transmis à detecter_doublons()
+
+    Returns:
+    --------
+    pd.DataFrame : premier produit de chaque groupe, avec une colonne
+    'cluster_doublon'
+    """
+    # Listes absentes ("NAN" après nettoyer()) : exclues des ensembles comparés
+    ingredients = df[colonne_ingredient]
+    ingredients = ingredients.mask(ingredients.astype(str).str.strip().str.upper().isin(VALEURS_MANQUANTES))
+    doublons = detecter_doublons(ingredients, seuil_jaccard, **options)
+    premiers = ~doublons['cluster'].duplicated()
+    resultat = df[premiers.to_numpy()].copy()
+    resultat['cluster_doublon'] = doublons.loc[premiers, 'cluster'].to_numpy()
+    print(f"Produits après fusion des doublons : {len(resultat)} (sur {len(df)})")
+    return resultat
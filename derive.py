@@ -0,0 +1,277 @@
+import numpy as np
+import pandas as pd
+
+from dedoublonnage import eclater_ingredients
+from sketches import CountMin, MisraGries, hacher
+
+# Seuils d'alerte par défaut
+SEUILS = {
+    'js': 0.05,           # divergence de Jensen-Shannon (base 2) des fréquences d'ingrédients
+    'psi_longueurs': 0.2,  # Population Stability Index des longueurs de listes
+    'taux_inconnus': 0.05,  # part des ingrédients absents du vocabulaire de référence
+}
+_EPSILON = 1e-6
+
+
+class ProfilLot:
+    """
+    Résumé fusionnable des listes INCI d'un lot, calculé en une passe :
+    fréquences des ingrédients (Count-Min, un compte par produit), ingrédients
+    les plus fréquents (Misra-Gries), histogramme des longueurs de listes et
+    part d'ingrédients inconnus du vocabulaire de référence.
+
+    Parameters:
+    -----------
+    vocabulaire : np.ndarray, optional
+        Hachages uint64 triés des ingrédients de référence (None : pas de
+        comptage des inconnus)
+    garder_vocabulaire : bool, optional
+        Conserve l'ensemble exact des hachages vus (profil de référence).
+        Par défaut False
+    largeur, profondeur : int, optional
+        Dimensions du Count-Min. Par défaut 2**14 x 4
+    k : int, optional
+        Nombre de compteurs Misra-Gries. Par défaut 256
+    longueur_max : int, optional
+        Dernière classe de l'histogramme des longueurs (regroupe les listes
+        plus longues). Par défaut 100
+    """
+
+    def __init__(self, vocabulaire=None, garder_vocabulaire=False, largeur=1 << 14, profondeur=4, k=256,
+                 longueur_max=100):
+        self.vocabulaire = vocabulaire
+        self.hachages_vus = np.empty(0, dtype=np.uint64) if garder_vocabulaire else None
+        self.frequences = CountMin(largeur, profondeur)
+        self.frequents = MisraGries(k)
+        self.longueurs = np.zeros(longueur_max + 1, dtype=np.int64)
+        self.produits = 0
+        self.jetons = 0
+        self.inconnus = 0
+
+    def ajouter(self, ingredients):
+        """Met à jour le profil avec un bloc de la colonne des listes INCI."""
+        eclate = eclater_ingredients(ingredients)
+        positions = eclate.index.to_numpy(dtype=np.int64)
+        noms = eclate.to_numpy(dtype=object)
+        hachages = hacher(noms)
+
+        # Un ingrédient ne compte qu'une fois par produit
+        ordre = np.lexsort((hachages, positions))
+        positions, hachages, noms = positions[ordre], hachages[ordre], noms[ordre]
+        nouveaux = np.r_[True, (positions[1:] != positions[:-1]) | (hachages[1:] != hachages[:-1])]
+        positions, hachages, noms = positions[nouveaux], hachages[nouveaux], noms[nouveaux]
+
+        longueurs = np.bincount(positions, minlength=len(ingredients))
+        dernier = len(self.longueurs) - 1
+        self.longueurs += np.bincount(np.minimum(longueurs, dernier), minlength=dernier + 1)
+
+        uniques, nombres = np.unique(hachages, return_counts=True)
+        self.frequences.ajouter_hachages(uniques, nombres)
+        self.frequents.ajouter(noms)
+        if self.hachages_vus is not None:
+            self.hachages_vus = np.union1d(self.hachages_vus, uniques)
+        if self.vocabulaire is not None:
+            self.inconnus += int((~np.isin(hachages, self.vocabulaire)).sum())
+        self.produits += len(ingredients)
+        self.jetons += len(hachages)
+        return self
+
+    def fusionner(self, autre):
+        """Fusionne le profil d'un autre lot (même vocabulaire de référence)."""
+        self.frequences.fusionner(autre.frequences)
+        self.frequents.fusionner(autre.frequents)
+        self.longueurs += autre.longueurs
+        if self.hachages_vus is not None and autre.hachages_vus is not None:
+            self.hachages_vus = np.union1d(self.hachages_vus, autre.hachages_vus)
+        self.produits += autre.produits
+        self.jetons += autre.jetons
+        self.inconnus += autre.inconnus
+        return self
+
+    @property
+    def taux_inconnus(self):
+        return self.inconnus / self.jetons if self.jetons else 0.0
+
+
+def profil_reference(ingredients, taille_bloc=50_000, **options):
+    """
+    Profil du snapshot d'entraînement (section 4), avec son vocabulaire exact.
+
+    Parameters:
+    -----------
+    ingredients : pd.Series
+        Colonne des listes INCI du snapshot d'entraînement
+    taille_bloc : int, optional
+        Nombre de produits par bloc. Par défaut 50 000
+    **options :
+        Transmis à ProfilLot
+
+    Returns:
+    --------
+    ProfilLot : avec vocabulaire = hachages triés des ingrédients vus
+    """
+    reference = ProfilLot(garder_vocabulaire=True, **options)
+    for debut in range(0, len(ingredients), taille_bloc):
+        reference.ajouter(ingredients.iloc[debut:debut + taille_bloc])
+    reference.vocabulaire = reference.hachages_vus
+    return reference
+
+
+def _jensen_shannon(p, q):
+    """Divergence de Jensen-Shannon (base 2, entre 0 et 1) de deux distributions."""
+    m = (p + q) / 2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        kl_p = np.where(p > 0, p * np.log2(p / m), 0.0).sum()
+        kl_q = np.where(q > 0, q * np.log2(q / m), 0.0).sum()
+    return float((kl_p + kl_q) / 2)
+
+
+def _psi(reference, lot, nb_classes=10):
+    """
+    Population Stability Index entre deux histogrammes de longueurs, sur des
+    classes regroupées aux déciles de la référence (des classes unitaires
+    rendraient l'indice instable sur de petits lots).
+    """
+    cumul = np.cumsum(reference) / max(reference.sum(), 1)
+    bornes = np.unique(np.searchsorted(cumul, np.arange(1, nb_classes) / nb_classes))
+    classes = np.searchsorted(bornes, np.arange(len(reference)))
+    reference = np.bincount(classes, weights=reference, minlength=len(bornes) + 1)
+    lot = np.bincount(classes, weights=lot, minlength=len(bornes) + 1)
+    p = np.maximum(reference / max(reference.sum(), 1), _EPSILON)
+    q = np.maximum(lot / max(lot.sum(), 1), _EPSILON)
+    return float(np.sum((q - p) * np.log(q / p)))
+
+
+def comparer(reference, lot, seuils=None, top=20):
+    """
+    Compare le profil d'un lot au profil de référence.
+
+    Les fréquences sont comparées sur l'union des ingrédients fréquents des
+    deux profils (estimations Count-Min), le reste de la masse étant regroupé
+    dans une classe "autres".
+
+    Parameters:
+    -----------
+    reference, lot : ProfilLot
+        Profil de référence (voir profil_reference()) et profil du lot
+    seuils : dict, optional
+        Seuils d'alerte (voir SEUILS)
+    top : int, optional
+        Nombre d'ingrédients dont l'écart de prévalence est rapporté. Par défaut 20
+
+    Returns:
+    --------
+    dict : 'scores' (js, psi_longueurs, taux_inconnus, ...), 'alertes'
+    (noms des scores au-delà de leur seuil) et 'ecarts' (ingrédients dont la
+    prévalence a le plus changé)
+    """
+    seuils = {**SEUILS, **(seuils or {})}
+    noms = np.array(sorted(set(reference.frequents.compteurs) | set(lot.frequents.compteurs)), dtype=object)
+    hachages = hacher(noms) if len(noms) else np.empty(0, dtype=np.uint64)
+    comptes_ref = reference.frequences.estimer_hachages(hachages).astype(np.float64)
+    comptes_lot = lot.frequences.estimer_hachages(hachages).astype(np.float64)
+
+    def distribution(comptes, total):
+        # Parts des ingrédients suivis + classe "autres" (surestimations Count-Min renormalisées)
+        parts = comptes / max(total, 1)
+        parts = np.r_[parts, max(1.0 - parts.sum(), 0.0)]
+        return parts / max(parts.sum(), _EPSILON)
+
+    scores = {
+        'produits': lot.produits,
+        'js': _jensen_shannon(distribution(comptes_ref, reference.frequences.total),
+                              distribution(comptes_lot, lot.frequences.total)),
+        'psi_longueurs': _psi(reference.longueurs, lot.longueurs),
+        'taux_inconnus': lot.taux_inconnus,
+        'longueur_moyenne_ref': float(np.dot(np.arange(len(reference.longueurs)), reference.longueurs)
+                                      / max(reference.produits, 1)),
+        'longueur_moyenne': float(np.dot(np.arange(len(lot.longueurs)), lot.longueurs) / max(lot.produits, 1)),
+    }
+    alertes = [nom for nom, seuil in seuils.items() if scores[nom] > seuil]
+
+    ecarts = pd.DataFrame({
+        'ingredient': noms,
+        'prevalence_ref': comptes_ref / max(reference.produits, 1),
+        'prevalence_lot': comptes_lot / max(lot.produits, 1),
+    })
+    ecarts['ecart'] = ecarts['prevalence_lot'] - ecarts['prevalence_ref']
+    ecarts = ecarts.reindex(ecarts['ecart'].abs().sort_values(ascending=False).index)
+    return {'scores': scores, 'alertes': alertes, 'ecarts': ecarts.head(top).reset_index(drop=True)}
+
+
+class MoniteurDerive:
+    """
+    Surveille la dérive des listes d'ingrédients lot après lot, par rapport
+    au snapshot d'entraînement des modèles TALC. Seuls les sketches sont
+    conservés : le profil cumulé de tous les lots observés et l'historique
+    des scores, jamais les catalogues eux-mêmes.
+
+    Parameters:
+    -----------
+    reference : ProfilLot
+        Profil du snapshot d'entraînement (voir profil_reference())
+    seuils : dict, optional
+        Seuils d'alerte (voir SEUILS)
+    colonne_ingredient : str, optional
+        Colonne des listes INCI. Par défaut 'Ingrédients'
+    """
+
+    def __init__(self, reference, seuils=None, colonne_ingredient='Ingrédients'):
+        self.reference = reference
+        self.seuils = {**SEUILS, **(seuils or {})}
+        self.colonne_ingredient = colonne_ingredient
+        self.cumul = self._nouveau_profil()
+        self.historique = []
+
+    def _nouveau_profil(self):
+        return ProfilLot(
+            vocabulaire=self.reference.vocabulaire,
+            largeur=self.reference.frequences.largeur,
+            profondeur=self.reference.frequences.profondeur,
+            k=self.reference.frequents.k,
+            longueur_max=len(self.reference.longueurs) - 1,
+        )
+
+    def observer(self, lot, nom=None):
+        """
+        Profile un lot (DataFrame ou colonne INCI), le compare à la référence
+        et l'ajoute au profil cumulé.
+
+        Returns:
+        --------
+        dict : résultat de comparer()
+        """
+        ingredients = lot[self.colonne_ingredient] if isinstance(lot, pd.DataFrame) else lot
+        profil = self._nouveau_profil().ajouter(ingredients)
+        resultat = comparer(self.reference, profil, self.seuils)
+        self.cumul.fusionner(profil)
+        nom = nom if nom is not None else f"lot {len(self.historique) + 1}"
+        self.historique.append({'lot': nom, **resultat['scores'], 'alertes': ','.join(resultat['alertes'])})
+        if resultat['alertes']:
+            details = ", ".join(f"{a} = {resultat['scores'][a]:.3f} > {self.seuils[a]}" for a in resultat['alertes'])
+            print(f"ALERTE DÉRIVE ({nom}) : {details}")
+        return resultat
+
+    def surveiller(self, chemin, taille_bloc=50_000):
+        """
+        Parcourt un export par blocs (voir profileur.lire_par_blocs) : chaque
+        bloc est un lot comparé à la référence.
+
+        Returns:
+        --------
+        pd.DataFrame : scores des lots de ce fichier
+        """
+        from profileur import lire_par_blocs
+
+        debut = len(self.historique)
+        for i, bloc in enumerate(lire_par_blocs(chemin, taille_bloc)):
+            self.observer(bloc, nom=f"{chemin} [{i}]")
+        return pd.DataFrame(self.historique[debut:])
+
+    def bilan(self):
+        """Comparaison du profil cumulé de tous les lots observés à la référence."""
+        return comparer(self.reference, self.cumul, self.seuils)
+
+    def tableau(self):
+        """Historique des scores, un lot par ligne."""
+        return pd.DataFrame(self.historique)
@@ -0,0 +1,363 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from dedoublonnage import eclater_ingredients
+from sketches import hacher
+
+CLES = ('Nom', 'Marque')
+CHANGEMENTS = ('ajout', 'retrait', 'reformulation', 'modification')
+
+
+def cles_produits(df, cles=CLES):
+    """
+    Clé de chaque produit : hachage uint64 des colonnes clés normalisées
+    (majuscules, espaces multiples).
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Snapshot du catalogue
+    cles : tuple of str, optional
+        Colonnes identifiant un produit. Par défaut ('Nom', 'Marque')
+
+    Returns:
+    --------
+    np.ndarray : clés uint64, une par ligne
+    """
+    texte = None
+    for colonne in cles:
+        valeurs = df[colonne].astype(str).str.upper().str.split().str.join(' ')
+        texte = valeurs if texte is None else texte + '\x1f' + valeurs
+    return hacher(texte.to_numpy(dtype=object))
+
+
+def hachages_lignes(df, colonnes):
+    """Hachage uint64 de chaque ligne, restreint aux colonnes données."""
+    return pd.util.hash_pandas_object(df[list(colonnes)], index=False).to_numpy()
+
+
+def _empreintes(df, cles, colonnes):
+    """Série clé -> hachage de ligne (premier produit par clé) et positions retenues."""
+    valeurs = cles_produits(df, cles)
+    premiers = ~pd.Index(valeurs).duplicated()
+    if not premiers.all():
+        print(f"Clés ({' + '.join(cles)}) en double ignorées : {int((~premiers).sum())}")
+    positions = np.flatnonzero(premiers)
+    return pd.Series(hachages_lignes(df.iloc[positions], colonnes), index=valeurs[positions]), positions
+
+
+def _aligner(ancien, nouveau):
+    """
+    Aligne deux séries clé -> hachage.
+
+    Returns:
+    --------
+    tuple : positions (dans ancien) des retraits, positions (dans nouveau)
+    des ajouts, et paires (ancien, nouveau) des produits communs modifiés
+    """
+    dans_ancien = ancien.index.get_indexer(nouveau.index)
+    communs = dans_ancien >= 0
+    ajouts = np.flatnonzero(~communs)
+    retraits = np.setdiff1d(np.arange(len(ancien)), dans_ancien[communs])
+    paires_nouveau = np.flatnonzero(communs)
+    paires_ancien = dans_ancien[communs]
+    modifies = ancien.to_numpy()[paires_ancien] != nouveau.to_numpy()[paires_nouveau]
+    return retraits, ajouts, paires_ancien[modifies], paires_nouveau[modifies]
+
+
+def _ensembles(ingredients, cles):
+    """Table longue (cle, ingredient) sans doublon, depuis une colonne INCI."""
+    eclate = eclater_ingredients(ingredients)
+    long = pd.DataFrame({'cle': cles[eclate.index.to_numpy(dtype=np.int64)], 'ingredient': eclate.to_numpy()})
+    return long.drop_duplicates(ignore_index=True)
+
+
+def _diff_ingredients(ancien, nouveau):
+    """
+    Différences d'ingrédients entre deux tables longues (cle, ingredient).
+
+    Returns:
+    --------
+    pd.DataFrame : cle, ingredient, changement ('ajout' ou 'retrait')
+    """
+    fusion = ancien.merge(nouveau, on=['cle', 'ingredient'], how='outer', indicator=True)
+    fusion = fusion[fusion['_merge'] != 'both']
+    fusion = fusion.assign(changement=np.where(fusion['_merge'] == 'right_only', 'ajout', 'retrait'))
+    return fusion[['cle', 'ingredient', 'changement']].sort_values(['cle', 'changement', 'ingredient'], ignore_index=True)
+
+
+def comparer_snapshots(ancien, nouveau, cles=CLES, colonne_ingredient='Ingrédients'):
+    """
+    Compare deux exports datés du catalogue, alignés par clé produit.
+
+    Les lignes sont comparées par hachage sur les colonnes communes aux deux
+    exports ; seuls les produits dont le hachage diffère sont ensuite
+    comparés ingrédient par ingrédient (ensembles canoniques : l'ordre, la
+    casse et le préfixe de teinte sont ignorés).
+
+    Parameters:
+    -----------
+    ancien, nouveau : pd.DataFrame
+        Snapshots à comparer (ex: export_compacts_170325 puis 375_cosmetikwatch_19_08_2025)
+    cles : tuple of str, optional
+        Colonnes identifiant un produit. Par défaut ('Nom', 'Marque')
+    colonne_ingredient : str, optional
+        Colonne des listes INCI. Par défaut 'Ingrédients'
+
+    Returns:
+    --------
+    dict : 'ajoutes' et 'supprimes' (lignes des snapshots), 'reformules'
+    (ensemble d'ingrédients changé) et 'modifies' (autres colonnes
+    seulement), lignes du nouveau snapshot, et 'ingredients' (table longue
+    des ingrédients ajoutés / retirés des produits reformulés)
+    """
+    colonnes = [c for c in ancien.columns if c in set(nouveau.columns)]
+    hachages_ancien, positions_ancien = _empreintes(ancien, cles, colonnes)
+    hachages_nouveau, positions_nouveau = _empreintes(nouveau, cles, colonnes)
+    retraits, ajouts, modif_ancien, modif_nouveau = _aligner(hachages_ancien, hachages_nouveau)
+
+    cles_modifiees = hachages_nouveau.index.to_numpy()[modif_nouveau]
+    diff = _diff_ingredients(
+        _ensembles(ancien[colonne_ingredient].iloc[positions_ancien[modif_ancien]], cles_modifiees),
+        _ensembles(nouveau[colonne_ingredient].iloc[positions_nouveau[modif_nouveau]], cles_modifiees),
+    )
+    reformule = np.isin(cles_modifiees, diff['cle'].to_numpy())
+
+    lignes = nouveau.iloc[positions_nouveau[modif_nouveau]]
+    libelles = lignes.set_axis(cles_modifiees)[list(cles)]
+    resultat = {
+        'ajoutes': nouveau.iloc[positions_nouveau[ajouts]],
+        'supprimes': ancien.iloc[positions_ancien[retraits]],
+        'reformules': lignes[reformule],
+        'modifies': lignes[~reformule],
+        'ingredients': libelles.join(diff.set_index('cle'), how='inner').reset_index(drop=True),
+    }
+    print(f"Produits ajoutés : {len(resultat['ajoutes'])}, supprimés : {len(resultat['supprimes'])}, "
+          f"reformulés : {len(resultat['reformules'])}, modifiés (hors ingrédients) : {len(resultat['modifies'])}")
+    return resultat
+
+
+class CatalogueIncremental:
+    """
+    Vocabulaire, matrice binaire produits x ingrédients, co-occurrences et
+    tables agrégées d'un catalogue, tenus à jour snapshot après snapshot.
+
+    Chaque nouvel export est haché puis aligné sur le précédent (une passe
+    vectorisée) ; seuls les produits ajoutés, retirés ou modifiés sont
+    ensuite découpés en ingrédients et leurs contributions retirées /
+    ajoutées aux structures dérivées. Le vocabulaire ne fait que croître :
+    les colonnes d'un ingrédient disparu restent, à fréquence nulle.
+
+    Parameters:
+    -----------
+    colonnes_agregats : tuple of str, optional
+        Colonnes des tables agrégées (nombre de produits et de produits avec
+        TALC par valeur). Par défaut ('Marque',)
+    cles : tuple of str, optional
+        Colonnes identifiant un produit. Par défaut ('Nom', 'Marque')
+    colonne_ingredient : str, optional
+        Colonne des listes INCI. Par défaut 'Ingrédients'
+    """
+
+    def __init__(self, colonnes_agregats=('Marque',), cles=CLES, colonne_ingredient='Ingrédients'):
+        self.cles = tuple(cles)
+        self.colonne_ingredient = colonne_ingredient
+        self.colonnes_agregats = tuple(colonnes_agregats)
+        # Seules ces colonnes influencent les structures dérivées
+        self.colonnes_suivies = list(dict.fromkeys(self.cles + (colonne_ingredient,) + self.colonnes_agregats))
+
+        self.vocabulaire = {}
+        self.noms = []
+        self.frequences = np.zeros(0, dtype=np.int64)
+        self.produits = {}      # clé -> (codes des ingrédients triés, talc, valeurs des colonnes agrégées + clés)
+        self.agregats = {colonne: {} for colonne in self.colonnes_agregats}
+        self._hachages = pd.Series([], index=np.array([], dtype=np.uint64), dtype=np.uint64)
+        self._cooccurrences = []    # deltas (lignes, colonnes, valeurs) en attente de cumul
+        self._cumul = None          # co-occurrences cumulées (CSR) et clés (ligne << 32 | colonne) de ses valeurs
+        self._cles_cumul = np.empty(0, dtype=np.int64)
+        self._blocs = []            # lignes de la matrice binaire, un bloc (clés, longueurs, codes) par snapshot
+        self._matrice = None
+
+    def _coder(self, noms):
+        """Codes des ingrédients, en étendant le vocabulaire aux noms inconnus."""
+        for nom in pd.unique(noms):
+            if nom not in self.vocabulaire:
+                self.vocabulaire[nom] = len(self.noms)
+                self.noms.append(nom)
+        if len(self.noms) > len(self.frequences):
+            self.frequences = np.r_[self.frequences, np.zeros(len(self.noms) - len(self.frequences), dtype=np.int64)]
+        return np.fromiter((self.vocabulaire[nom] for nom in noms), dtype=np.int64, count=len(noms))
+
+    def _contributions(self, cles, lignes):
+        """Contributions (codes, talc, valeurs) des produits donnés, indexées par clé."""
+        eclate = eclater_ingredients(lignes[self.colonne_ingredient])
+        positions = eclate.index.to_numpy(dtype=np.int64)
+        codes = self._coder(eclate.to_numpy(dtype=object))
+        talc = np.zeros(len(lignes), dtype=bool)
+        talc[positions[eclate.str.contains("TALC").to_numpy()]] = True
+
+        ordre = np.lexsort((codes, positions))
+        positions, codes = positions[ordre], codes[ordre]
+        bornes = np.searchsorted(positions, np.arange(len(lignes) + 1))
+        valeurs = lignes[list(self.colonnes_agregats + self.cles)].astype(object)
+        valeurs = valeurs.where(valeurs.notna(), None).to_numpy()
+        return {
+            cle: (np.unique(codes[bornes[i]:bornes[i + 1]]), bool(talc[i]), tuple(valeurs[i]))
+            for i, cle in enumerate(cles)
+        }
+
+    def _appliquer(self, contributions, signe):
+        """Ajoute (signe=1) ou retire (signe=-1) des produits des structures dérivées."""
+        if not contributions:
+            return
+        codes = [c for c, _, _ in contributions]
+        lignes = np.repeat(np.arange(len(codes)), [len(c) for c in codes])
+        colonnes = np.concatenate(codes)
+        self.frequences += signe * np.bincount(colonnes, minlength=len(self.frequences))
+
+        # Co-occurrences : Δ = ±DᵀD sur les seuls produits concernés, cumulé à la lecture
+        delta = sparse.csr_matrix((np.ones(len(colonnes), dtype=np.int64), (lignes, colonnes)),
+                                  shape=(len(codes), len(self.noms)))
+        delta = (delta.T @ delta).tocoo()
+        self._cooccurrences.append((delta.row, delta.col, signe * delta.data))
+
+        for k, colonne in enumerate(self.colonnes_agregats):
+            table = self.agregats[colonne]
+            for _, talc, valeurs in contributions:
+                compte = table.setdefault(valeurs[k], [0, 0])
+                compte[0] += signe
+                compte[1] += signe * talc
+                if not compte[0]:
+                    del table[valeurs[k]]
+
+    def mettre_a_jour(self, df):
+        """
+        Intègre un nouveau snapshot complet du catalogue.
+
+        Parameters:
+        -----------
+        df : pd.DataFrame
+            Export du catalogue (le premier appel charge tout le catalogue)
+
+        Returns:
+        --------
+        pd.DataFrame : une ligne par produit touché (colonnes clés,
+        'changement' parmi ajout / retrait / reformulation / modification,
+        'ajouts' et 'retraits' : ingrédients gagnés / perdus)
+        """
+        hachages, positions = _empreintes(df, self.cles, self.colonnes_suivies)
+        retraits, ajouts, modif_ancien, modif_nouveau = _aligner(self._hachages, hachages)
+
+        anciennes_cles = self._hachages.index.to_numpy()
+        nouvelles_cles = hachages.index.to_numpy()
+        sortants = {cle: self.produits.pop(cle) for cle in anciennes_cles[np.r_[retraits, modif_ancien]]}
+        entrants = self._contributions(nouvelles_cles[np.r_[ajouts, modif_nouveau]],
+                                       df.iloc[positions[np.r_[ajouts, modif_nouveau]]])
+        self._appliquer(list(sortants.values()), -1)
+        self._appliquer(list(entrants.values()), 1)
+        self.produits.update(entrants)
+        self._hachages = hachages
+        if entrants or sortants:
+            codes = [c for c, _, _ in entrants.values()]
+            self._blocs.append((
+                np.fromiter(entrants, dtype=np.uint64, count=len(entrants)),
+                np.fromiter(map(len, codes), dtype=np.int64, count=len(codes)),
+                np.concatenate(codes) if codes else np.empty(0, dtype=np.int64),
+            ))
+            self._matrice = None
+
+        changements = []
+        for cle, (codes, _, valeurs) in entrants.items():
+            avant = sortants.get(cle)
+            gagnes = np.setdiff1d(codes, avant[0]) if avant else codes
+            perdus = np.setdiff1d(avant[0], codes) if avant else codes[:0]
+            nature = 'ajout' if avant is None else 'reformulation' if len(gagnes) or len(perdus) else 'modification'
+            changements.append(valeurs[-len(self.cles):] + (nature, [self.noms[c] for c in gagnes], [self.noms[c] for c in perdus]))
+        for cle, (codes, _, valeurs) in sortants.items():
+            if cle not in entrants:
+                changements.append(valeurs[-len(self.cles):] + ('retrait', [], [self.noms[c] for c in codes]))
+
+        resultat = pd.DataFrame(changements, columns=list(self.cles) + ['changement', 'ajouts', 'retraits'])
+        resultat['changement'] = pd.Categorical(resultat['changement'], categories=CHANGEMENTS)
+        comptes = resultat['changement'].value_counts()
+        print("Snapshot intégré : " + ", ".join(f"{nature} {comptes[nature]}" for nature in CHANGEMENTS)
+              + f" (produits : {len(self.produits)}, ingrédients : {len(self.noms)})")
+        return resultat.sort_values('changement', kind='stable', ignore_index=True)
+
+    def matrice(self):
+        """
+        Matrice binaire produits x ingrédients du dernier snapshot.
+
+        Chaque mise à jour empile les seules lignes des produits ajoutés ou
+        modifiés ; les lignes remplacées ou retirées sont masquées à la
+        lecture suivante, qui recopie les lignes vivantes en une passe
+        vectorisée (coût proportionnel au nombre de valeurs non nulles, sans
+        boucle sur les produits).
+
+        Returns:
+        --------
+        dict : 'matrice' (CSR), 'colonnes' (noms des ingrédients) et
+        'cles' (clé de chaque ligne)
+        """
+        if self._matrice is None:
+            if self._blocs:
+                cles, longueurs, indices = (np.concatenate(t) for t in zip(*self._blocs))
+            else:
+                cles, longueurs, indices = np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+            # Ligne vivante : dernière version d'une clé encore présente dans le snapshot
+            vivantes = np.zeros(len(cles), dtype=bool)
+            _, dernieres = np.unique(cles[::-1], return_index=True)
+            vivantes[len(cles) - 1 - dernieres] = True
+            vivantes &= np.isin(cles, self._hachages.index.to_numpy())
+            cles, longueurs, indices = cles[vivantes], longueurs[vivantes], indices[np.repeat(vivantes, longueurs)]
+            self._blocs = [(cles, longueurs, indices)]
+            matrice = sparse.csr_matrix((np.ones(len(indices), dtype=np.int8), indices, np.r_[0, np.cumsum(longueurs)]),
+                                        shape=(len(cles), len(self.noms)))
+            self._matrice = {'matrice': matrice, 'colonnes': np.array(self.noms, dtype=object), 'cles': cles}
+        return self._matrice
+
+    def cooccurrences(self):
+        """
+        Matrice (CSR) des co-occurrences ingrédient x ingrédient, diagonale = fréquences.
+
+        Les deltas en attente sont ajoutés en place aux valeurs des paires
+        déjà présentes ; seules des paires nouvelles imposent de fusionner
+        le motif de la matrice.
+        """
+        n = len(self.noms)
+        if self._cumul is None:
+            self._cumul = sparse.csr_matrix((n, n), dtype=np.int64)
+        elif self._cumul.shape[0] < n:
+            self._cumul.resize((n, n))
+        if self._cooccurrences:
+            lignes, colonnes, valeurs = (np.concatenate(t) for t in zip(*self._cooccurrences))
+            self._cooccurrences = []
+            delta = sparse.coo_matrix((valeurs, (lignes, colonnes)), shape=(n, n))
+            delta.sum_duplicates()
+            cles = (delta.row.astype(np.int64) << 32) | delta.col
+            positions = np.searchsorted(self._cles_cumul, cles)
+            connues = positions < len(self._cles_cumul)
+            connues[connues] = self._cles_cumul[positions[connues]] == cles[connues]
+            self._cumul.data[positions[connues]] += delta.data[connues]
+            if not connues.all():
+                nouvelles = sparse.csr_matrix((delta.data[~connues], (delta.row[~connues], delta.col[~connues])),
+                                              shape=(n, n))
+                self._cumul = (self._cumul + nouvelles).tocsr()
+                self._cumul.eliminate_zeros()
+                self._cumul.sort_indices()
+                lignes_cumul = np.repeat(np.arange(n, dtype=np.int64), np.diff(self._cumul.indptr))
+                self._cles_cumul = (lignes_cumul << 32) | self._cumul.indices
+        resultat = self._cumul.copy()
+        resultat.eliminate_zeros()
+        return resultat
+
+    def tableau(self, colonne):
+        """
+        Table agrégée d'une colonne : nombre de produits, de produits avec
+        TALC et part de TALC par valeur.
+        """
+        table = pd.DataFrame.from_dict(self.agregats[colonne], orient='index', columns=['nb_produits', 'nb_talc'])
+        table.index.name = colonne
+        table['part_talc'] = table['nb_talc'] / table['nb_produits']
+        return table.sort_values('nb_produits', ascending=False)
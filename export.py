@@ -0,0 +1,231 @@
+import os
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# Limites d'une feuille Excel (en-tête compris)
+LIGNES_MAX_EXCEL = 1_048_576
+COLONNES_MAX_EXCEL = 16_384
+
+
+def depuis_dataframe(data_avec_ingredients, colonnes_binaires):
+    """
+    Matrice creuse des colonnes binaires d'un DataFrame large
+    (ex: résultat de separer_ingredients_binaire()).
+
+    Parameters:
+    -----------
+    data_avec_ingredients : pd.DataFrame
+        Dataset avec une colonne 0/1 par ingrédient
+    colonnes_binaires : list of str
+        Colonnes d'ingrédients
+
+    Returns:
+    --------
+    tuple : (matrice CSR int8 produits x ingrédients, noms des colonnes)
+    """
+    valeurs = data_avec_ingredients[list(colonnes_binaires)].fillna(0).to_numpy()
+    return sparse.csr_matrix(valeurs != 0, dtype=np.int8), np.asarray(colonnes_binaires, dtype=object)
+
+
+def table_longue(matrice, colonnes, index=None):
+    """
+    Forme longue (produit, ingredient) des cases non nulles.
+
+    Parameters:
+    -----------
+    matrice : scipy.sparse matrix
+        Matrice binaire produits x ingrédients
+    colonnes : array-like
+        Noms des ingrédients
+    index : array-like, optional
+        Identifiants des produits (par défaut leur position)
+
+    Returns:
+    --------
+    pd.DataFrame : produit, ingredient (catégoriel)
+    """
+    matrice = sparse.csr_matrix(matrice)
+    matrice.sort_indices()
+    lignes = np.repeat(np.arange(matrice.shape[0]), np.diff(matrice.indptr))
+    index = np.arange(matrice.shape[0]) if index is None else np.asarray(index)
+    return pd.DataFrame({
+        'produit': index[lignes],
+        'ingredient': pd.Categorical.from_codes(matrice.indices, categories=pd.Index(colonnes).astype(str)),
+    })
+
+
+def cooccurrence_longue(matrice, colonnes, minimum=1):
+    """
+    Co-occurrences des paires d'ingrédients (Xᵀ X creux), sans la diagonale
+    ni le triangle inférieur.
+
+    Parameters:
+    -----------
+    matrice : scipy.sparse matrix
+        Matrice binaire produits x ingrédients
+    colonnes : array-like
+        Noms des ingrédients
+    minimum : int, optional
+        Nombre minimal de produits communs. Par défaut 1
+
+    Returns:
+    --------
+    pd.DataFrame : ingredient_a, ingredient_b, nombre (trié par nombre décroissant)
+    """
+    X = sparse.csr_matrix(matrice, dtype=np.int32)
+    X.data[:] = 1
+    cooc = sparse.triu(X.T @ X, k=1).tocoo()
+    garder = cooc.data >= minimum
+    categories = pd.Index(colonnes).astype(str)
+    long = pd.DataFrame({
+        'ingredient_a': pd.Categorical.from_codes(cooc.row[garder], categories=categories),
+        'ingredient_b': pd.Categorical.from_codes(cooc.col[garder], categories=categories),
+        'nombre': cooc.data[garder],
+    })
+    return long.sort_values('nombre', ascending=False, kind='stable', ignore_index=True)
+
+
+def _valeurs_excel(serie):
+    """Colonne prête pour xlsxwriter (NaN -> cellule vide, catégories -> chaînes)."""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        serie = serie.astype(object)
+    valeurs = serie.to_numpy(dtype=object, copy=True)
+    valeurs[pd.isna(valeurs)] = None
+    return valeurs
+
+
+def _ecrire_feuille(classeur, nom, table):
+    """
+    Écrit une table ligne à ligne (mode mémoire constante), en continuant sur
+    "nom (2)", "nom (3)"... au-delà de la limite de lignes d'Excel.
+    """
+    colonnes = [_valeurs_excel(table[col]) for col in table.columns]
+    par_feuille = LIGNES_MAX_EXCEL - 1
+    for partie, debut in enumerate(range(0, max(len(table), 1), par_feuille)):
+        feuille = classeur.add_worksheet(nom if partie == 0 else f"{nom} ({partie + 1})"[:31])
+        feuille.write_row(0, 0, [str(col) for col in table.columns])
+        for i, ligne in enumerate(zip(*(col[debut:debut + par_feuille] for col in colonnes)), start=1):
+            feuille.write_row(i, 0, ligne)
+
+
+def format_large(matrice, colonnes, index=None, max_colonnes=1000):
+    """
+    Forme large (une colonne 0/1 par ingrédient), limitée aux ingrédients
+    les plus fréquents.
+
+    Parameters:
+    -----------
+    matrice : scipy.sparse matrix
+        Matrice binaire produits x ingrédients
+    colonnes : array-like
+        Noms des ingrédients
+    index : array-like, optional
+        Identifiants des produits
+    max_colonnes : int, optional
+        Nombre maximal de colonnes d'ingrédients. Par défaut 1000
+
+    Returns:
+    --------
+    pd.DataFrame : produits x ingrédients retenus (int8)
+    """
+    matrice = sparse.csc_matrix(matrice)
+    frequences = np.diff(matrice.indptr)
+    retenues = np.sort(np.argsort(-frequences, kind='stable')[:min(max_colonnes, COLONNES_MAX_EXCEL - 1)])
+    if len(retenues) < matrice.shape[1]:
+        print(f"Format large limité aux {len(retenues)} ingrédients les plus fréquents (sur {matrice.shape[1]})")
+    return pd.DataFrame(
+        matrice[:, retenues].toarray().astype(np.int8),
+        columns=np.asarray(colonnes)[retenues],
+        index=index,
+    )
+
+
+def exporter_excel(chemin, matrice, colonnes, produits=None, cooccurrence=True, large=False, max_colonnes_large=1000):
+    """
+    Exporte le dataset binaire en un seul passage d'écriture, en mémoire
+    constante (xlsxwriter), au format long : le temps et la mémoire sont
+    proportionnels au nombre de cases non nulles, pas au nombre de colonnes.
+
+    Feuilles produites :
+    - "Produits" : colonnes descriptives (si produits est fourni)
+    - "Ingrédients" : paires (produit, ingredient)
+    - "Co-occurrence" : triplets (ingredient_a, ingredient_b, nombre)
+    - "Binaire" : forme large plafonnée, seulement si large=True
+
+    Parameters:
+    -----------
+    chemin : str
+        Fichier .xlsx à créer (remplacé s'il existe)
+    matrice : scipy.sparse matrix
+        Matrice binaire produits x ingrédients
+    colonnes : array-like
+        Noms des ingrédients
+    produits : pd.DataFrame, optional
+        Colonnes descriptives, une ligne par produit dans l'ordre de la matrice
+    cooccurrence : bool, optional
+        Ajoute la feuille de co-occurrence. Par défaut True
+    large : bool, optional
+        Ajoute la forme large. Par défaut False
+    max_colonnes_large : int, optional
+        Plafond de colonnes de la forme large. Par défaut 1000
+
+    Returns:
+    --------
+    str : chemin du fichier écrit
+    """
+    import xlsxwriter
+
+    index = None if produits is None else produits.index
+    classeur = xlsxwriter.Workbook(chemin, {'constant_memory': True})
+    try:
+        if produits is not None:
+            _ecrire_feuille(classeur, "Produits", produits.reset_index())
+        _ecrire_feuille(classeur, "Ingrédients", table_longue(matrice, colonnes, index))
+        if cooccurrence:
+            _ecrire_feuille(classeur, "Co-occurrence", cooccurrence_longue(matrice, colonnes))
+        if large:
+            _ecrire_feuille(classeur, "Binaire", format_large(matrice, colonnes, index, max_colonnes_large).reset_index())
+    finally:
+        classeur.close()
+    print(f"Dataset exporté: {chemin}")
+    return chemin
+
+
+def exporter_parquet(dossier, matrice, colonnes, produits=None, cooccurrence=True):
+    """
+    Exporte les mêmes tables longues en fichiers Parquet.
+
+    Parameters:
+    -----------
+    dossier : str
+        Dossier de sortie (créé si besoin)
+    matrice : scipy.sparse matrix
+        Matrice binaire produits x ingrédients
+    colonnes : array-like
+        Noms des ingrédients
+    produits : pd.DataFrame, optional
+        Colonnes descriptives, une ligne par produit dans l'ordre de la matrice
+    cooccurrence : bool, optional
+        Ajoute cooccurrence.parquet. Par défaut True
+
+    Returns:
+    --------
+    list of str : fichiers écrits
+    """
+    os.makedirs(dossier, exist_ok=True)
+    index = None if produits is None else produits.index
+    tables = {'ingredients': table_longue(matrice, colonnes, index)}
+    if produits is not None:
+        tables['produits'] = produits.reset_index()
+    if cooccurrence:
+        tables['cooccurrence'] = cooccurrence_longue(matrice, colonnes)
+
+    fichiers = []
+    for nom, table in tables.items():
+        fichier = os.path.join(dossier, f"{nom}.parquet")
+        table.to_parquet(fichier, index=False)
+        fichiers.append(fichier)
+    print(f"Dataset exporté: {', '.join(fichiers)}")
+    return fichiers
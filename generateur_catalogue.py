@@ -0,0 +1,219 @@
+import numpy as np
+import re
+
+from separer import _normaliser_nom_colonne, _filtrer_ingredients_indesirables
+
+# Colonnes descriptives tirées ensemble (ligne réelle) pour garder la
+# cohérence marque / groupe / pays / catégorie
+COLONNES_DESCRIPTIVES = [
+    'Marque',
+    'Groupe(s) / Société(s) cosmétique(s)',
+    'Gamme',
+    'Catégorie(s) cosmétique(s)',
+    "Zone(s) d'application",
+    'Type(s) de produit - Formulation(s) / Galénique(s)',
+    'Cible(s) cosmétique(s)',
+    'Article(s) de conditionnement / Packaging',
+    'Contenance',
+    'Made in',
+]
+
+
+def _decouper_inci(ingredients_str, separateur=','):
+    """Découpe une liste INCI en conservant la casse d'origine."""
+    if ':' in ingredients_str:
+        ingredients_str = ingredients_str.split(':', 1)[1]
+    return [ing.strip() for ing in ingredients_str.split(separateur) if ing.strip()]
+
+
+def apprendre_distributions(df, colonne_ingredient='Ingrédients', separateur=','):
+    """
+    Apprend les distributions d'un export réel : fréquence des ingrédients,
+    longueur des listes, co-occurrences, position moyenne dans la liste et
+    variantes d'écriture observées pour chaque ingrédient.
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Export cosmetikwatch (ex: 375_cosmetikwatch_19_08_2025.xlsx)
+    colonne_ingredient : str, optional
+        Colonne contenant les listes INCI. Par défaut 'Ingrédients'
+    separateur : str, optional
+        Séparateur des ingrédients. Par défaut ','
+
+    Returns:
+    --------
+    dict : modèle utilisable par generer_catalogue()
+    """
+    listes = []
+    variantes = {}
+    for ingredients_str in df[colonne_ingredient]:
+        if not isinstance(ingredients_str, str):
+            listes.append([])
+            continue
+        brut = _decouper_inci(ingredients_str, separateur)
+        gardes = set(_filtrer_ingredients_indesirables({ing.lower() for ing in brut}))
+        liste = []
+        for ing in brut:
+            if ing.lower() not in gardes:
+                continue
+            cle = _normaliser_nom_colonne(ing)
+            if cle in liste:
+                continue
+            liste.append(cle)
+            variantes.setdefault(cle, {})
+            variantes[cle][ing] = variantes[cle].get(ing, 0) + 1
+        listes.append(liste)
+
+    vocabulaire = sorted(variantes)
+    index = {cle: i for i, cle in enumerate(vocabulaire)}
+    nb_ingredients = len(vocabulaire)
+
+    # Matrice produits x ingrédients et position relative de chaque ingrédient
+    lignes, colonnes, positions = [], [], []
+    for i, liste in enumerate(listes):
+        for rang, cle in enumerate(liste):
+            lignes.append(i)
+            colonnes.append(index[cle])
+            positions.append(rang / max(len(liste) - 1, 1))
+    lignes = np.asarray(lignes, dtype=np.int64)
+    colonnes = np.asarray(colonnes, dtype=np.int64)
+
+    matrice = np.zeros((len(listes), nb_ingredients), dtype=np.float32)
+    matrice[lignes, colonnes] = 1
+    frequences = matrice.sum(axis=0)
+    cooccurrence = matrice.T @ matrice
+    np.fill_diagonal(cooccurrence, 0)
+
+    position_moyenne = np.bincount(colonnes, weights=positions, minlength=nb_ingredients) / np.maximum(frequences, 1)
+    longueurs = np.array([len(liste) for liste in listes if liste])
+
+    descriptifs = df[[col for col in COLONNES_DESCRIPTIVES if col in df.columns]].reset_index(drop=True)
+
+    print(f"Distributions apprises sur {len(df)} produits: {nb_ingredients} ingrédients, "
+          f"{longueurs.mean():.1f} ingrédients par liste en moyenne")
+
+    return {
+        'vocabulaire': np.array(vocabulaire, dtype=object),
+        'frequences': frequences,
+        'cooccurrence': cooccurrence,
+        'position_moyenne': position_moyenne,
+        'longueurs': longueurs,
+        'variantes': [list(variantes[cle].items()) for cle in vocabulaire],
+        'descriptifs': descriptifs,
+        'noms': df['Nom'].dropna().to_numpy() if 'Nom' in df.columns else np.array(['PRODUIT'], dtype=object),
+    }
+
+
+def _perturber(ingredient, rng):
+    """Produit une variante d'écriture réaliste (casse, astérisque, espaces, code CI)."""
+    choix = rng.integers(5)
+    if choix == 0:
+        return ingredient.lower()
+    if choix == 1:
+        return ingredient.title()
+    if choix == 2:
+        return ingredient + '*'
+    if choix == 3:
+        return ingredient.replace(' ', '  ', 1)
+    # Retrait de la parenthèse de code CI
+    sans_ci = re.sub(r'\s*\(CI \d+\)', '', ingredient)
+    if sans_ci != ingredient:
+        return sans_ci
+    return ingredient
+
+
+def _tirer_ingredients(modele, graines, longueurs, rng, taille_bloc=4096):
+    """
+    Tire les listes d'ingrédients : un ingrédient « graine » selon la fréquence,
+    puis les autres sans remise selon sa ligne de co-occurrence (astuce de
+    Gumbel-top-k, par blocs de produits de même graine).
+    """
+    nb_ingredients = len(modele['vocabulaire'])
+    longueur_max = int(longueurs.max())
+    frequences = modele['frequences'] + 1e-3
+    listes = np.full((len(graines), longueur_max), -1, dtype=np.int64)
+    listes[:, 0] = graines
+    nb_tires = min(longueur_max - 1, nb_ingredients - 1)
+    if nb_tires <= 0:
+        return listes
+
+    for graine in np.unique(graines):
+        produits = np.flatnonzero(graines == graine)
+        # Lissage par la fréquence globale pour ne jamais bloquer sur une ligne vide
+        poids = modele['cooccurrence'][graine] + 0.05 * frequences / frequences.sum()
+        log_poids = np.log(poids / poids.sum())
+        log_poids[graine] = -np.inf
+        for debut in range(0, len(produits), taille_bloc):
+            bloc = produits[debut:debut + taille_bloc]
+            cles = log_poids + rng.gumbel(size=(len(bloc), nb_ingredients))
+            tires = np.argpartition(-cles, nb_tires - 1, axis=1)[:, :nb_tires]
+            ordre = np.take_along_axis(cles, tires, axis=1).argsort(axis=1)[:, ::-1]
+            listes[bloc, 1:nb_tires + 1] = np.take_along_axis(tires, ordre, axis=1)
+
+    # Troncature à la longueur tirée
+    listes[np.arange(longueur_max) >= longueurs[:, None]] = -1
+    return listes
+
+
+def generer_catalogue(modele, n_produits, graine=0, taux_variantes=0.05):
+    """
+    Synthétise un catalogue de produits réaliste à partir d'un modèle appris.
+
+    Parameters:
+    -----------
+    modele : dict
+        Résultat de apprendre_distributions()
+    n_produits : int
+        Nombre de produits à générer (10k à 1M)
+    graine : int, optional
+        Graine aléatoire pour la reproductibilité. Par défaut 0
+    taux_variantes : float, optional
+        Proportion d'ingrédients écrits avec une variante synthétique
+        (casse, astérisque, espaces, code CI). Par défaut 0.05
+
+    Returns:
+    --------
+    pd.DataFrame : catalogue avec les colonnes de l'export d'origine
+    """
+    rng = np.random.default_rng(graine)
+    vocabulaire = modele['vocabulaire']
+    nb_ingredients = len(vocabulaire)
+
+    longueurs = rng.choice(modele['longueurs'], size=n_produits)
+    longueurs = np.minimum(longueurs, nb_ingredients)
+    probas = modele['frequences'] / modele['frequences'].sum()
+    graines = rng.choice(nb_ingredients, size=n_produits, p=probas)
+    listes = _tirer_ingredients(modele, graines, longueurs, rng)
+
+    # Ordre INCI réaliste : par position moyenne observée dans les vraies listes
+    cles_tri = np.where(listes >= 0, modele['position_moyenne'][np.maximum(listes, 0)], np.inf)
+    listes = np.take_along_axis(listes, cles_tri.argsort(axis=1), axis=1)
+
+    # Choix d'une écriture observée pour chaque occurrence (pondérée par le nombre d'observations)
+    formes = [np.array([forme for forme, _ in variantes], dtype=object) for variantes in modele['variantes']]
+    cumuls = [np.cumsum([nb for _, nb in variantes]) / sum(nb for _, nb in variantes) for variantes in modele['variantes']]
+    presents = listes >= 0
+    codes = listes[presents]
+    tirages = rng.random(len(codes))
+    ecritures = np.empty(len(codes), dtype=object)
+    for code in np.unique(codes):
+        positions = np.flatnonzero(codes == code)
+        choix = np.searchsorted(cumuls[code], tirages[positions], side='right')
+        ecritures[positions] = formes[code][np.minimum(choix, len(formes[code]) - 1)]
+
+    perturbes = np.flatnonzero(rng.random(len(codes)) < taux_variantes)
+    for position in perturbes:
+        ecritures[position] = _perturber(ecritures[position], rng)
+
+    # Recomposition des chaînes INCI
+    bornes = np.concatenate([[0], np.cumsum(presents.sum(axis=1))])
+    ingredients = [','.join(ecritures[bornes[i]:bornes[i + 1]]) for i in range(n_produits)]
+
+    descriptifs = modele['descriptifs']
+    catalogue = descriptifs.iloc[rng.integers(len(descriptifs), size=n_produits)].reset_index(drop=True)
+    noms = modele['noms'][rng.integers(len(modele['noms']), size=n_produits)]
+    catalogue.insert(0, 'Nom', [f"{nom} #{i}" for i, nom in enumerate(noms)])
+    catalogue['Ingrédients'] = ingredients
+
+    return catalogue
@@ -1,7 +1,10 @@
 import pandas as pd
-import matplotlib.pyplot as plt
 
-def creer_histogramme_marques(data_avec_ingredients, figsize=(14, 6), color='steelblue'):
+from instrumentation import instrumenter
+from schema import MARQUE, compter
+
+@instrumenter()
+def creer_histogramme_marques(data_avec_ingredients, figsize=(14, 6), color='steelblue', comptage=None):
     """
     Crée un histogramme représentant le nombre de produits par marque.
     
@@ -13,23 +16,25 @@ def creer_histogramme_marques(data_avec_ingredients, figsize=(14, 6), color='ste
         Taille de la figure (largeur, hauteur). Par défaut (14, 6)
     color : str, optional
         Couleur des barres. Par défaut 'steelblue'
+    comptage : pd.Series, optional
+        Effectifs par marque déjà calculés (ex: produits contenant du TALC, voir
+        prevalence.Prevalences.effectifs). Par défaut compter(data_avec_ingredients['Marque'], departage='valeur')
     
     Returns:
     --------
     matplotlib.figure.Figure : Figure matplotlib créée
     """
+    import matplotlib.pyplot as plt
 
     nb_produit = 'Nombre de produits'
-    # Créer un DataFrame avec le nombre de produits par marque (sans sous-totaux)
-    produits_par_marque = data_avec_ingredients.groupby('Marque').size().reset_index(name=nb_produit)
-    
-    # Trier par nombre de produits décroissant
-    produits_par_marque = produits_par_marque.sort_values(nb_produit, ascending=False)
+    # Nombre de produits par marque, trié par nombre décroissant (codes entiers si catégorielle)
+    produits_par_marque = compter(data_avec_ingredients[MARQUE], departage='valeur') if comptage is None else comptage
+    produits_par_marque = produits_par_marque.rename(nb_produit).rename_axis(MARQUE).reset_index()
     
     # Créer l'histogramme
     fig = plt.figure(figsize=figsize)
-    plt.bar(produits_par_marque['Marque'], produits_par_marque[nb_produit], color=color)
-    plt.xlabel('Marque', fontsize=12)
+    plt.bar(produits_par_marque[MARQUE].astype(str), produits_par_marque[nb_produit], color=color)
+    plt.xlabel(MARQUE, fontsize=12)
     plt.ylabel(nb_produit, fontsize=12)
     plt.title('Nombre de produits par Marque', fontsize=14, fontweight='bold')
     plt.xticks(rotation=45, ha='right')
@@ -39,7 +44,7 @@ def creer_histogramme_marques(data_avec_ingredients, figsize=(14, 6), color='ste
     return fig
 
 
-def afficher_histogramme_marques(data_avec_ingredients, figsize=(14, 6), color='steelblue'):
+def afficher_histogramme_marques(data_avec_ingredients, figsize=(14, 6), color='steelblue', comptage=None):
     """
     Crée et affiche un histogramme représentant le nombre de produits par marque.
     
@@ -51,11 +56,15 @@ def afficher_histogramme_marques(data_avec_ingredients, figsize=(14, 6), color='
         Taille de la figure (largeur, hauteur). Par défaut (14, 6)
     color : str, optional
         Couleur des barres. Par défaut 'steelblue'
+    comptage : pd.Series, optional
+        Effectifs par marque déjà calculés (voir creer_histogramme_marques)
     """
-    creer_histogramme_marques(data_avec_ingredients, figsize, color)
+    import matplotlib.pyplot as plt
+
+    creer_histogramme_marques(data_avec_ingredients, figsize, color, comptage)
     plt.show()
     
     # Afficher quelques statistiques
-    produits_par_marque = data_avec_ingredients.groupby('Marque').size().sort_values(ascending=False)
+    produits_par_marque = compter(data_avec_ingredients[MARQUE], departage='valeur') if comptage is None else comptage
     print(f"\nTotal de marques: {len(produits_par_marque)}")
     print(f"Total de produits: {produits_par_marque.sum()}")
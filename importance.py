@@ -0,0 +1,307 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from analyse_talc import creer_modele
+
+
+def permuter_colonne(X, j, permutation):
+    """
+    Copie d'une matrice CSC dont la colonne j est permutée entre les produits
+    (X'[i, j] = X[permutation[i], j]), sans densification.
+
+    Une permutation conserve le nombre de valeurs non nulles de la colonne :
+    seuls ses indices de lignes changent, indptr et les autres colonnes sont
+    partagés tels quels.
+    """
+    debut, fin = X.indptr[j], X.indptr[j + 1]
+    inverse = np.empty_like(permutation)
+    inverse[permutation] = np.arange(len(permutation))
+    nouvelles = inverse[X.indices[debut:fin]]
+    ordre = np.argsort(nouvelles, kind='stable')
+    indices = X.indices.copy()
+    indices[debut:fin] = nouvelles[ordre]
+    data = X.data.copy()
+    data[debut:fin] = X.data[debut:fin][ordre]
+    return sparse.csc_matrix((data, indices, X.indptr), shape=X.shape)
+
+
+def _ajuster(modele, X, y, train):
+    """Entraîne un modèle sur les produits d'un pli (exécuté dans un processus du pool)."""
+    return creer_modele(modele).fit(X[train], y[train])
+
+
+METRIQUES = ("roc_auc", "f1_macro", "balanced_accuracy")
+
+
+def _scores(metrique, y, sorties, seuil):
+    """
+    Score de chaque ligne de sorties (répétitions x produits) en une passe
+    vectorisée : AUC par les rangs (Mann-Whitney), F1-macro et Balanced
+    Accuracy par les effectifs de la matrice de confusion.
+    """
+    from scipy.stats import rankdata
+
+    positifs = np.asarray(y).astype(bool)
+    nb_pos, nb_neg = positifs.sum(), (~positifs).sum()
+    if metrique == "roc_auc":
+        rangs = rankdata(sorties, axis=1)
+        return (rangs[:, positifs].sum(axis=1) - nb_pos * (nb_pos + 1) / 2) / (nb_pos * nb_neg)
+    predits = sorties > seuil
+    vp = (predits & positifs).sum(axis=1)
+    fp = (predits & ~positifs).sum(axis=1)
+    fn, vn = nb_pos - vp, nb_neg - fp
+    if metrique == "balanced_accuracy":
+        return (vp / nb_pos + vn / nb_neg) / 2
+    if metrique == "f1_macro":
+        # zero_division=0, comme f1_score
+        f1_pos = np.divide(2 * vp, 2 * vp + fp + fn, out=np.zeros(len(vp)), where=(2 * vp + fp + fn) > 0)
+        f1_neg = np.divide(2 * vn, 2 * vn + fp + fn, out=np.zeros(len(vn)), where=(2 * vn + fp + fn) > 0)
+        return (f1_pos + f1_neg) / 2
+    raise ValueError(f"Métrique inconnue : {metrique} (disponibles : {list(METRIQUES)})")
+
+
+def _sorties(modele, X):
+    """Score continu de la classe 1 et seuil de décision correspondant."""
+    if hasattr(modele, "coef_"):
+        return modele.decision_function(X), 0.0
+    return modele.predict_proba(X)[:, 1], 0.5
+
+
+def _variables_utilisees(modele, nb_variables):
+    """Masque des variables dont dépend le modèle : les autres ont une importance nulle par construction."""
+    if hasattr(modele, "coef_"):
+        return modele.coef_[0] != 0
+    arbres = getattr(modele, "estimators_", [modele])
+    utilisees = np.zeros(nb_variables, dtype=bool)
+    for arbre in arbres:
+        separations = arbre.tree_.feature
+        utilisees[separations[separations >= 0]] = True
+    return utilisees
+
+
+def _permutations(modele, X_test, y_test, variables, nb_repetitions, metrique, graine):
+    """
+    Baisse du score de test quand chaque variable du lot est permutée
+    (exécuté dans un processus du pool).
+
+    Modèle linéaire : permuter la colonne j ne modifie la fonction de
+    décision que de coef_j x (x_j permuté - x_j), calculé sur cette seule
+    colonne pour toutes les répétitions à la fois. Autres modèles :
+    prédiction sur une copie de la matrice CSC dont seule la colonne j est
+    permutée (voir permuter_colonne).
+
+    Returns:
+    --------
+    np.ndarray : baisses (variables x répétitions)
+    """
+    sorties, seuil = _sorties(modele, X_test)
+    reference = _scores(metrique, y_test, sorties[None], seuil)[0]
+    rng = np.random.default_rng(graine)
+    lineaire = hasattr(modele, "coef_")
+    baisses = np.empty((len(variables), nb_repetitions))
+    for i, j in enumerate(variables):
+        permutations = rng.permuted(np.tile(np.arange(X_test.shape[0]), (nb_repetitions, 1)), axis=1)
+        if lineaire:
+            colonne = X_test[:, j].toarray().ravel()
+            permutees = sorties + modele.coef_[0, j] * (colonne[permutations] - colonne)
+        else:
+            permutees = np.array([_sorties(modele, permuter_colonne(X_test, j, p))[0] for p in permutations])
+        baisses[i] = reference - _scores(metrique, y_test, permutees, seuil)
+    return baisses
+
+
+def _logistique_l1(C):
+    """Logistique L1 (liblinear) ; 'penalty' est remplacé par l1_ratio à partir de scikit-learn 1.8."""
+    import sklearn
+    from sklearn.linear_model import LogisticRegression
+
+    version = tuple(int(v) for v in sklearn.__version__.split(".")[:2] if v.isdigit())
+    penalite = {"l1_ratio": 1.0} if version >= (1, 8) else {"penalty": "l1"}
+    return LogisticRegression(solver="liblinear", C=C, **penalite)
+
+
+def _selections(X, y, sous_echantillons, C):
+    """
+    Variables retenues par une logistique L1 sur chaque sous-échantillon,
+    pour chaque valeur de C (exécuté dans un processus du pool).
+
+    Returns:
+    --------
+    np.ndarray : nombre de sélections (len(C) x variables)
+    """
+    comptes = np.zeros((len(C), X.shape[1]), dtype=np.int64)
+    for lignes in sous_echantillons:
+        for k, c in enumerate(C):
+            modele = _logistique_l1(c).fit(X[lignes], y[lignes])
+            comptes[k] += modele.coef_[0] != 0
+    return comptes
+
+
+def _lots(elements, nb_lots):
+    """Découpe une séquence en nb_lots lots contigus non vides."""
+    return [lot for lot in np.array_split(np.asarray(elements), max(1, nb_lots)) if len(lot)]
+
+
+def importance_permutation(X, y, modele="Logistic Regression", nb_plis=5, nb_repetitions=5, metrique="roc_auc",
+                           n_jobs=-1, random_state=42):
+    """
+    Importance par permutation sur plis de test (validation croisée
+    stratifiée) : baisse du score quand la colonne d'un ingrédient est
+    permutée entre les produits de test.
+
+    Les plis sont entraînés en parallèle, puis les permutations sont
+    réparties par lots de variables entre les processus. Une colonne
+    constante dans un pli, ou que le modèle du pli n'utilise pas (coefficient
+    nul, jamais choisie par un arbre), a une importance nulle sans calcul.
+
+    Parameters:
+    -----------
+    X : scipy.sparse matrix
+        Matrice binaire produits x ingrédients
+    y : array-like
+        Cible binaire
+    modele : str, optional
+        Modèle évalué (voir analyse_talc.creer_modele). Par défaut "Logistic Regression"
+    nb_plis : int, optional
+        Nombre de plis. Par défaut 5
+    nb_repetitions : int, optional
+        Permutations par variable et par pli. Par défaut 5
+    metrique : str, optional
+        "roc_auc", "f1_macro" ou "balanced_accuracy" (voir METRIQUES).
+        Par défaut "roc_auc", moins discontinu que le F1 sur quelques
+        centaines de produits
+    n_jobs : int, optional
+        Nombre de processus (-1 : tous les cœurs). Par défaut -1
+    random_state : int, optional
+        Graine des plis et des permutations. Par défaut 42
+
+    Returns:
+    --------
+    np.ndarray : baisses de score (variables x (plis x répétitions))
+    """
+    from joblib import Parallel, delayed, effective_n_jobs
+    from sklearn.model_selection import StratifiedKFold
+
+    if metrique not in METRIQUES:
+        raise ValueError(f"Métrique inconnue : {metrique} (disponibles : {list(METRIQUES)})")
+    X = sparse.csc_matrix(X)
+    y = np.asarray(y)
+    plis = list(StratifiedKFold(nb_plis, shuffle=True, random_state=random_state).split(np.zeros(len(y)), y))
+    pool = Parallel(n_jobs=n_jobs)
+    modeles = pool(delayed(_ajuster)(modele, X, y, train) for train, _ in plis)
+
+    taches, baisses = [], np.zeros((X.shape[1], nb_plis, nb_repetitions))
+    for p, (_, test) in enumerate(plis):
+        X_test = X[test]
+        presences = X_test.getnnz(axis=0)
+        variables = np.flatnonzero((presences > 0) & (presences < len(test))
+                                   & _variables_utilisees(modeles[p], X.shape[1]))
+        for lot in _lots(variables, 4 * effective_n_jobs(n_jobs)):
+            taches.append((p, lot, X_test, y[test]))
+    graines = np.random.SeedSequence(random_state).generate_state(len(taches))
+    resultats = pool(
+        delayed(_permutations)(modeles[p], X_test, y_test, lot, nb_repetitions, metrique, graine)
+        for (p, lot, X_test, y_test), graine in zip(taches, graines)
+    )
+    for (p, lot, _, _), resultat in zip(taches, resultats):
+        baisses[lot, p] = resultat
+    return baisses.reshape(X.shape[1], -1)
+
+
+def selection_stabilite(X, y, nb_sous_echantillons=100, fraction=0.5, C=(0.05, 0.1, 0.5), n_jobs=-1,
+                        random_state=42):
+    """
+    Stabilité de sélection (Meinshausen et Bühlmann) : fréquence à laquelle
+    une logistique L1 retient chaque ingrédient sur des sous-échantillons
+    de produits, maximisée sur les valeurs de régularisation C.
+
+    Parameters:
+    -----------
+    X : scipy.sparse matrix
+        Matrice binaire produits x ingrédients
+    y : array-like
+        Cible binaire
+    nb_sous_echantillons : int, optional
+        Nombre de sous-échantillons. Par défaut 100
+    fraction : float, optional
+        Part des produits tirés (sans remise). Par défaut 0.5
+    C : tuple of float, optional
+        Inverses des pénalités L1 essayées. Par défaut (0.05, 0.1, 0.5)
+    n_jobs : int, optional
+        Nombre de processus (-1 : tous les cœurs). Par défaut -1
+    random_state : int, optional
+        Graine des tirages. Par défaut 42
+
+    Returns:
+    --------
+    np.ndarray : fréquence de sélection de chaque variable (entre 0 et 1)
+    """
+    from joblib import Parallel, delayed, effective_n_jobs
+
+    X = sparse.csr_matrix(X)
+    y = np.asarray(y)
+    rng = np.random.default_rng(random_state)
+    taille = max(2, int(round(fraction * len(y))))
+    tirages = [rng.choice(len(y), taille, replace=False) for _ in range(nb_sous_echantillons)]
+    lots = _lots(np.arange(nb_sous_echantillons), effective_n_jobs(n_jobs))
+    comptes = Parallel(n_jobs=n_jobs)(
+        delayed(_selections)(X, y, [tirages[i] for i in lot], tuple(C)) for lot in lots
+    )
+    return (np.sum(comptes, axis=0) / nb_sous_echantillons).max(axis=0)
+
+
+def classer_ingredients(vect, modele="Logistic Regression", nb_plis=5, nb_repetitions=5, metrique="roc_auc",
+                        nb_sous_echantillons=100, C=(0.05, 0.1, 0.5), seuil_stabilite=0.6, n_jobs=-1,
+                        random_state=42):
+    """
+    Classement des ingrédients associés au TALC, plus robuste que les
+    coefficients d'une seule régression logistique (section 5.1) :
+    importance par permutation sur plis de test et stabilité de sélection L1.
+
+    Parameters:
+    -----------
+    vect : dict
+        Résultat de analyse_talc.vectoriser()
+    modele, nb_plis, nb_repetitions, metrique :
+        Voir importance_permutation()
+    nb_sous_echantillons, C :
+        Voir selection_stabilite()
+    seuil_stabilite : float, optional
+        Fréquence de sélection à partir de laquelle un ingrédient est dit
+        stable. Par défaut 0.6
+    n_jobs : int, optional
+        Nombre de processus (-1 : tous les cœurs). Par défaut -1
+    random_state : int, optional
+        Graine. Par défaut 42
+
+    Returns:
+    --------
+    pd.DataFrame : Ingrédient, Coefficient (logistique sur tout le dataset),
+    importance moyenne, écart-type et intervalle à 95 % (percentiles sur
+    plis x répétitions), fréquence de sélection, indicateurs 'stable' et
+    'significatif' (borne basse > 0), triés par fréquence puis importance
+    """
+    X, y = vect['X'], np.asarray(vect['y'])
+    baisses = importance_permutation(X, y, modele, nb_plis, nb_repetitions, metrique, n_jobs, random_state)
+    frequences = selection_stabilite(X, y, nb_sous_echantillons, C=C, n_jobs=n_jobs, random_state=random_state)
+    coefficients = creer_modele("Logistic Regression").fit(X, y).coef_[0]
+
+    bas, haut = np.percentile(baisses, [2.5, 97.5], axis=1)
+    tableau = pd.DataFrame({
+        "Ingrédient": np.asarray(vect['colonnes']),
+        "Coefficient": coefficients,
+        "importance": baisses.mean(axis=1),
+        "importance_ecart_type": baisses.std(axis=1),
+        "importance_bas": bas,
+        "importance_haut": haut,
+        "frequence_selection": frequences,
+    })
+    tableau["stable"] = tableau["frequence_selection"] >= seuil_stabilite
+    tableau["significatif"] = tableau["importance_bas"] > 0
+    tableau = tableau.sort_values(["frequence_selection", "importance"], ascending=False, kind="stable",
+                                  ignore_index=True)
+    tableau.insert(0, "Rang", np.arange(1, len(tableau) + 1))
+    print(f"Ingrédients stables : {int(tableau['stable'].sum())}, "
+          f"importance significative : {int(tableau['significatif'].sum())}")
+    return tableau
@@ -0,0 +1,205 @@
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+import schema
+
+DOSSIER = os.path.dirname(os.path.abspath(__file__))
+FICHIER_MANIFESTE = os.path.join(DOSSIER, 'sources.json')
+
+
+def charger_manifeste(chemin=FICHIER_MANIFESTE):
+    """
+    Lit le manifeste des sources (JSON) :
+    - "dossiers" : dossiers où chercher les classeurs, relatifs au manifeste
+    - "cles" : colonnes identifiant un produit (par défaut Nom + Marque)
+    - "sources" : liste ordonnée par priorité décroissante ; chaque source
+      donne "nom", "fichier" (motif glob accepté), "feuilles" (par défaut la
+      première), "colonnes" (renommage vers les en-têtes du schéma),
+      "entete" (ligne d'en-tête), "majuscules" et "fusionner" (False : table
+      annexe, hors catalogue)
+    """
+    with open(chemin, encoding='utf-8') as f:
+        manifeste = json.load(f)
+    base = os.path.dirname(os.path.abspath(chemin))
+    manifeste['dossiers'] = [os.path.normpath(os.path.join(base, d)) for d in manifeste.get('dossiers', ['.'])]
+    manifeste.setdefault('cles', [schema.NOM, schema.MARQUE])
+    return manifeste
+
+
+def localiser(fichier, dossiers=None):
+    """
+    Chemins des classeurs correspondant à un nom (ou motif glob), cherchés
+    dans les dossiers du manifeste ; le premier dossier qui en contient gagne.
+
+    Returns:
+    --------
+    list of str : chemins trouvés (triés)
+    """
+    if dossiers is None:
+        dossiers = charger_manifeste()['dossiers']
+    for dossier in dossiers:
+        trouves = sorted(glob.glob(os.path.join(dossier, fichier)))
+        if trouves:
+            return trouves
+    raise FileNotFoundError(f"{fichier} introuvable dans : {', '.join(dossiers)}")
+
+
+def taches(manifeste):
+    """Une tâche de lecture par (source, classeur, feuille), dans l'ordre de priorité."""
+    resultat = []
+    for priorite, source in enumerate(manifeste['sources']):
+        for chemin in localiser(source['fichier'], manifeste['dossiers']):
+            for feuille in source.get('feuilles', [0]):
+                resultat.append({**source, 'chemin': chemin, 'feuille': feuille, 'priorite': priorite})
+    return resultat
+
+
+def lire_feuille(tache):
+    """
+    Lit une feuille et l'aligne sur le schéma : en-têtes nettoyés et
+    renommés, colonnes du schéma en tête, textes en majuscules si demandé.
+    Exécutée dans un processus du pool : ne renvoie que des données picklables.
+    """
+    debut = time.perf_counter()
+    renommage = tache.get('colonnes', {})
+    # Codes EAN lus comme texte (zéros de tête), quel que soit leur en-tête d'origine
+    textes = {source: str for source, cible in renommage.items() if cible == schema.EAN}
+    df = pd.read_excel(tache['chemin'], sheet_name=tache['feuille'], header=tache.get('entete', 0),
+                       dtype={schema.EAN: str, **textes})
+    df = df.rename(columns=lambda c: str(c).strip()).rename(columns=renommage)
+    df = df.loc[:, ~df.columns.str.startswith('Unnamed:')]
+    if tache.get('majuscules'):
+        textes = [c for c in df.columns if pd.api.types.is_object_dtype(df[c])]
+        df[textes] = df[textes].apply(lambda s: s.str.upper())
+    entetes = [entete for entete, _, _ in schema.CHAMPS.values()]
+    df = df[[c for c in entetes if c in df.columns] + [c for c in df.columns if c not in entetes]]
+    df.insert(0, 'source', tache['nom'])
+    df.insert(1, 'priorite', tache['priorite'])
+    return df, time.perf_counter() - debut
+
+
+def fusionner_sources(tables, cles, completer=True):
+    """
+    Concatène les tables du catalogue et dédoublonne les produits par clé
+    normalisée (voir diff_snapshots.cles_produits).
+
+    Parameters:
+    -----------
+    tables : list of pd.DataFrame
+        Tables alignées (résultats de lire_feuille)
+    cles : list of str
+        Colonnes identifiant un produit
+    completer : bool, optional
+        Complète les valeurs manquantes du produit retenu par celles des
+        sources moins prioritaires. Par défaut True (sinon seule la ligne de
+        la source la plus prioritaire est gardée)
+
+    Returns:
+    --------
+    pd.DataFrame : catalogue fusionné, avec 'source' (source retenue) et
+    'sources' (toutes les sources où le produit apparaît)
+    """
+    from diff_snapshots import cles_produits
+
+    catalogue = pd.concat(tables, ignore_index=True, sort=False)
+    catalogue = catalogue.dropna(subset=list(cles), how='all')
+    catalogue['_cle'] = cles_produits(catalogue, cles)
+    catalogue = catalogue.sort_values('priorite', kind='stable')
+
+    sources = catalogue.groupby('_cle', sort=False)['source'].agg(lambda s: ','.join(dict.fromkeys(s)))
+    if completer:
+        # first() : première valeur non manquante de chaque colonne, par ordre de priorité
+        fusion = catalogue.groupby('_cle', sort=False).first()
+    else:
+        fusion = catalogue.drop_duplicates('_cle').set_index('_cle')
+    fusion['sources'] = sources
+    return fusion.reset_index(drop=True).drop(columns='priorite')
+
+
+def ingerer(manifeste=FICHIER_MANIFESTE, max_workers=None, completer=True, chemin_dictionnaires=None):
+    """
+    Lit toutes les feuilles du manifeste en parallèle (pool de processus),
+    les aligne sur le schéma et fusionne le catalogue.
+
+    Parameters:
+    -----------
+    manifeste : str or dict
+        Chemin du manifeste JSON ou manifeste déjà chargé
+    max_workers : int, optional
+        Nombre de processus (1 : lecture séquentielle dans le processus courant)
+    completer : bool, optional
+        Voir fusionner_sources(). Par défaut True
+    chemin_dictionnaires : str, optional
+        Dictionnaires catégoriels passés à schema.typer() (None : propres au catalogue)
+
+    Returns:
+    --------
+    dict : 'catalogue' (DataFrame typé, dédoublonné), 'annexes' (tables
+    hors catalogue, par nom de source) et 'temps' (secondes de lecture par feuille)
+    """
+    if isinstance(manifeste, str):
+        manifeste = charger_manifeste(manifeste)
+    a_lire = taches(manifeste)
+
+    debut = time.perf_counter()
+    if max_workers == 1:
+        lus = [lire_feuille(tache) for tache in a_lire]
+    else:
+        # Les plus gros classeurs partent en premier : la durée totale est
+        # bornée par la plus longue feuille plutôt que par la dernière lancée
+        ordre = sorted(range(len(a_lire)), key=lambda i: -os.path.getsize(a_lire[i]['chemin']))
+        with ProcessPoolExecutor(max_workers=max_workers) as executeur:
+            lus = dict(zip(ordre, executeur.map(lire_feuille, [a_lire[i] for i in ordre])))
+        lus = [lus[i] for i in range(len(a_lire))]
+    duree = time.perf_counter() - debut
+
+    temps = pd.DataFrame({
+        'source': [t['nom'] for t in a_lire],
+        'feuille': [t['feuille'] for t in a_lire],
+        'lignes': [len(df) for df, _ in lus],
+        'temps_s': [s for _, s in lus],
+    })
+    tables = [df for (df, _), t in zip(lus, a_lire) if t.get('fusionner', True)]
+    annexes = {t['nom']: df.drop(columns=['source', 'priorite']) for (df, _), t in zip(lus, a_lire)
+               if not t.get('fusionner', True)}
+
+    catalogue = fusionner_sources(tables, manifeste['cles'], completer)
+    catalogue = schema.typer(catalogue, chemin_dictionnaires, enregistrer=chemin_dictionnaires is not None)
+    schema.valider(catalogue)
+    print(f"Feuilles lues : {len(a_lire)} en {duree:.2f} s (somme séquentielle : {temps['temps_s'].sum():.2f} s)")
+    print(f"Lignes catalogue : {sum(len(t) for t in tables)} -> produits uniques : {len(catalogue)}")
+    return {'catalogue': catalogue, 'annexes': annexes, 'temps': temps}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingestion et fusion des classeurs du manifeste")
+    parser.add_argument('--manifeste', default=FICHIER_MANIFESTE)
+    parser.add_argument('--sortie', default='catalogue_fusionne.parquet',
+                        help="fichier du catalogue fusionné (.parquet, .csv ou .xlsx)")
+    parser.add_argument('--processus', type=int, default=None)
+    parser.add_argument('--sans-completion', action='store_true',
+                        help="garde la ligne de la source prioritaire sans la compléter")
+    args = parser.parse_args(argv)
+
+    resultat = ingerer(args.manifeste, args.processus, completer=not args.sans_completion)
+    catalogue = resultat['catalogue']
+    extension = os.path.splitext(args.sortie)[1].lower()
+    if extension == '.parquet':
+        catalogue.to_parquet(args.sortie, index=False)
+    elif extension == '.csv':
+        catalogue.to_csv(args.sortie, index=False)
+    else:
+        catalogue.to_excel(args.sortie, index=False)
+    print(f"Catalogue fusionné : {args.sortie}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
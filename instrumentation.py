@@ -0,0 +1,232 @@
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# Instrumentation désactivée par défaut : on l'active avec activer() ou la
+# variable d'environnement PREDCOMPACT_TRACE=1
+_ACTIF = os.environ.get('PREDCOMPACT_TRACE', '') not in ('', '0')
+_TRACE = []
+_LOCAL = threading.local()
+
+
+class Mesure:
+    """Enregistrement d'une étape en cours (temps, mémoire, formes)."""
+
+    __slots__ = ('nom', 'parent', 'forme_entree', 'forme_sortie', 'pic_octets', '_memoire_debut')
+
+    def __init__(self, nom, parent, forme_entree):
+        self.nom = nom
+        self.parent = parent
+        self.forme_entree = forme_entree
+        self.forme_sortie = None
+        self.pic_octets = 0
+        self._memoire_debut = 0
+
+    def sortie(self, objet):
+        """Note la forme de l'objet produit par l'étape."""
+        self.forme_sortie = _forme(objet)
+        return objet
+
+
+class _MesureInactive:
+    """Mesure sans effet renvoyée quand l'instrumentation est désactivée."""
+
+    __slots__ = ()
+
+    def sortie(self, objet):
+        return objet
+
+
+_MESURE_INACTIVE = _MesureInactive()
+
+
+def activer(actif=True):
+    """Active (ou désactive) l'instrumentation pour toute la session."""
+    global _ACTIF
+    _ACTIF = bool(actif)
+
+
+def est_actif():
+    """Indique si l'instrumentation est active."""
+    return _ACTIF
+
+
+def reinitialiser():
+    """Vide la trace accumulée."""
+    _TRACE.clear()
+
+
+def _forme(objet):
+    """Renvoie une description compacte de la forme d'un objet (shape, len)."""
+    if objet is None:
+        return None
+    if hasattr(objet, 'shape'):
+        return list(objet.shape)
+    if isinstance(objet, tuple):
+        return [_forme(element) for element in objet]
+    if isinstance(objet, (list, set, frozenset, dict)):
+        return [len(objet)]
+    return None
+
+
+def _pile():
+    """Pile des étapes en cours, propre à chaque thread."""
+    if not hasattr(_LOCAL, 'pile'):
+        _LOCAL.pile = []
+    return _LOCAL.pile
+
+
+@contextmanager
+def etape(nom, entree=None):
+    """
+    Mesure une étape du pipeline : temps réel, temps CPU, pic mémoire
+    (tracemalloc) et formes d'entrée/sortie.
+
+    Parameters:
+    -----------
+    nom : str
+        Nom de l'étape tel qu'il apparaîtra dans la trace
+    entree : objet, optional
+        Donnée d'entrée dont on note la forme
+
+    Returns:
+    --------
+    Mesure : objet dont la méthode sortie(objet) note la forme du résultat
+    """
+    if not _ACTIF:
+        yield _MESURE_INACTIVE
+        return
+
+    demarre_tracemalloc = not tracemalloc.is_tracing()
+    if demarre_tracemalloc:
+        tracemalloc.start()
+
+    # Le pic de tracemalloc est global : on reporte le pic courant sur le
+    # parent avant de le réinitialiser pour l'étape enfant
+    pile = _pile()
+    parent = pile[-1] if pile else None
+    actuel, pic = tracemalloc.get_traced_memory()
+    if parent is not None:
+        parent.pic_octets = max(parent.pic_octets, pic - parent._memoire_debut)
+    tracemalloc.reset_peak()
+
+    mesure = Mesure(nom, parent.nom if parent is not None else None, _forme(entree))
+    mesure._memoire_debut = actuel
+    pile.append(mesure)
+
+    debut = time.time()
+    debut_mur = time.perf_counter()
+    debut_cpu = time.process_time()
+    try:
+        yield mesure
+    finally:
+        duree_mur = time.perf_counter() - debut_mur
+        duree_cpu = time.process_time() - debut_cpu
+        _, pic = tracemalloc.get_traced_memory()
+        mesure.pic_octets = max(mesure.pic_octets, pic - mesure._memoire_debut)
+        pile.pop()
+        if parent is not None:
+            parent.pic_octets = max(parent.pic_octets, mesure.pic_octets + mesure._memoire_debut - parent._memoire_debut)
+        if demarre_tracemalloc:
+            tracemalloc.stop()
+
+        _TRACE.append({
+            'etape': nom,
+            'parent': mesure.parent,
+            'debut': debut,
+            'temps_reel_s': duree_mur,
+            'temps_cpu_s': duree_cpu,
+            'pic_memoire_mo': mesure.pic_octets / 1024 ** 2,
+            'forme_entree': mesure.forme_entree,
+            'forme_sortie': mesure.forme_sortie,
+        })
+
+
+def instrumenter(nom=None):
+    """
+    Décorateur mesurant chaque appel de la fonction comme une étape.
+
+    Quand l'instrumentation est désactivée, l'appel est transmis directement
+    à la fonction (un seul test de drapeau).
+
+    Parameters:
+    -----------
+    nom : str, optional
+        Nom de l'étape. Par défaut le nom de la fonction
+    """
+    def decorateur(fonction):
+        nom_etape = nom or fonction.__name__
+
+        @functools.wraps(fonction)
+        def enveloppe(*args, **kwargs):
+            if not _ACTIF:
+                return fonction(*args, **kwargs)
+            entree = args[0] if args else None
+            with etape(nom_etape, entree) as mesure:
+                return mesure.sortie(fonction(*args, **kwargs))
+
+        return enveloppe
+
+    return decorateur
+
+
+def trace():
+    """Renvoie une copie de la trace (liste de dictionnaires)."""
+    return list(_TRACE)
+
+
+def exporter_trace(chemin):
+    """
+    Écrit la trace au format JSON.
+
+    Parameters:
+    -----------
+    chemin : str
+        Chemin du fichier JSON à créer
+    """
+    with open(chemin, 'w', encoding='utf-8') as f:
+        json.dump(_TRACE, f, ensure_ascii=False, indent=2)
+    print(f"Trace exportée: {chemin} ({len(_TRACE)} mesures)")
+
+
+def tableau_resume():
+    """
+    Agrège la trace par étape.
+
+    Returns:
+    --------
+    pd.DataFrame : appels, temps réel/CPU cumulés, pic mémoire maximal et
+    dernières formes observées, trié par temps réel décroissant
+    """
+    import pandas as pd
+
+    colonnes = ['etape', 'appels', 'temps_reel_s', 'temps_cpu_s', 'pic_memoire_mo',
+                'forme_entree', 'forme_sortie']
+    if not _TRACE:
+        return pd.DataFrame(columns=colonnes).set_index('etape')
+
+    df_trace = pd.DataFrame(_TRACE)
+    df_trace['forme_entree'] = df_trace['forme_entree'].map(json.dumps)
+    df_trace['forme_sortie'] = df_trace['forme_sortie'].map(json.dumps)
+    resume = df_trace.groupby('etape', sort=False).agg(
+        appels=('etape', 'size'),
+        temps_reel_s=('temps_reel_s', 'sum'),
+        temps_cpu_s=('temps_cpu_s', 'sum'),
+        pic_memoire_mo=('pic_memoire_mo', 'max'),
+        forme_entree=('forme_entree', 'last'),
+        forme_sortie=('forme_sortie', 'last'),
+    )
+    return resume.sort_values('temps_reel_s', ascending=False)
+
+
+def afficher_resume():
+    """Affiche le tableau récapitulatif de la trace."""
+    print("\n" + "="*80)
+    print("INSTRUMENTATION DU PIPELINE")
+    print("="*80)
+    print(tableau_resume().to_string(float_format=lambda v: f"{v:.3f}"))
+    print("="*80 + "\n")
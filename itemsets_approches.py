@@ -0,0 +1,276 @@
+import math
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from regles_compilees import _UN, _popcount
+
+_MOTS_PAR_BLOC = 1 << 22
+
+
+def colonnes_bits(X, colonnes=None):
+    """
+    Colonnes d'une matrice binaire empaquetées en bits sur les produits,
+    directement depuis les indices CSC (sans densification).
+
+    Returns:
+    --------
+    np.ndarray : (colonnes x nb_mots) uint64
+    """
+    X = sparse.csc_matrix(X)
+    if colonnes is not None:
+        X = X[:, colonnes]
+    X.eliminate_zeros()
+    nb_mots = max(1, -(-X.shape[0] // 64))
+    bits = np.zeros((X.shape[1], nb_mots), dtype=np.uint64)
+    lignes = X.indices.astype(np.int64)
+    colonnes_nnz = np.repeat(np.arange(X.shape[1]), np.diff(X.indptr))
+    # Bits distincts dans un même mot : l'addition vaut le OU
+    np.add.at(bits, (colonnes_nnz, lignes // 64), _UN << (lignes % 64).astype(np.uint64))
+    return bits
+
+
+def compter(bits, itemsets):
+    """
+    Support absolu d'itemsets de même longueur : ET des colonnes puis
+    comptage de bits, par blocs d'itemsets pour borner la mémoire.
+
+    Parameters:
+    -----------
+    bits : np.ndarray
+        Résultat de colonnes_bits()
+    itemsets : np.ndarray
+        Indices de colonnes (itemsets x longueur)
+
+    Returns:
+    --------
+    np.ndarray : nombre de produits contenant chaque itemset
+    """
+    comptes = np.empty(len(itemsets), dtype=np.int64)
+    taille_bloc = max(1, _MOTS_PAR_BLOC // bits.shape[1])
+    for debut in range(0, len(itemsets), taille_bloc):
+        bloc = itemsets[debut:debut + taille_bloc]
+        intersection = bits[bloc[:, 0]].copy()
+        for k in range(1, bloc.shape[1]):
+            intersection &= bits[bloc[:, k]]
+        comptes[debut:debut + len(bloc)] = _popcount(intersection).sum(axis=1, dtype=np.int64)
+    return comptes
+
+
+def _candidats(frequents, echeance, max_candidats):
+    """
+    Candidats de longueur k + 1 (jointure sur le préfixe commun puis élagage
+    apriori : tous les sous-ensembles de longueur k doivent être fréquents).
+
+    Returns:
+    --------
+    tuple : (candidats, True si l'échéance ou le plafond de candidats a
+    interrompu la génération)
+    """
+    connus = set(map(tuple, frequents))
+    candidats = []
+    prefixes = {}
+    for itemset in map(tuple, frequents):
+        prefixes.setdefault(itemset[:-1], []).append(itemset[-1])
+    for prefixe, derniers in prefixes.items():
+        derniers.sort()
+        for i, a in enumerate(derniers):
+            if len(candidats) > max_candidats or time.perf_counter() > echeance:
+                return None, True
+            for b in derniers[i + 1:]:
+                candidat = prefixe + (a, b)
+                if all(candidat[:j] + candidat[j + 1:] in connus for j in range(len(candidat) - 2)):
+                    candidats.append(candidat)
+    largeur = frequents.shape[1] + 1
+    return np.array(candidats, dtype=np.int64).reshape(-1, largeur), False
+
+
+def _miner(bits, seuil, longueur_max, echeance, max_candidats):
+    """
+    Apriori par niveaux sur les colonnes empaquetées d'un échantillon.
+    L'échéance est vérifiée pendant la génération des candidats et entre
+    les blocs de comptage : un niveau interrompu est abandonné en entier.
+
+    Returns:
+    --------
+    tuple : (itemsets fréquents par longueur, frontière négative par
+    longueur, True si l'échéance ou le plafond de candidats a interrompu
+    l'exploration)
+    """
+    comptes = _popcount(bits).sum(axis=1, dtype=np.int64)
+    niveau = np.arange(len(bits), dtype=np.int64)[:, None]
+    frequents, frontiere = [niveau[comptes >= seuil]], [niveau[comptes < seuil]]
+    taille_bloc = max(1, _MOTS_PAR_BLOC // bits.shape[1])
+    while len(frequents[-1]) > 1 and (longueur_max is None or frequents[-1].shape[1] < longueur_max):
+        candidats, interrompu = _candidats(frequents[-1], echeance, max_candidats)
+        if interrompu:
+            return frequents, frontiere, True
+        if not len(candidats):
+            break
+        comptes = np.empty(len(candidats), dtype=np.int64)
+        for debut in range(0, len(candidats), taille_bloc):
+            if time.perf_counter() > echeance:
+                return frequents, frontiere, True
+            comptes[debut:debut + taille_bloc] = compter(bits, candidats[debut:debut + taille_bloc])
+        frequents.append(candidats[comptes >= seuil])
+        frontiere.append(candidats[comptes < seuil])
+    return frequents, frontiere, False
+
+
+def extraire_itemsets(X, colonnes, min_support=0.1, epsilon=0.02, delta=0.05, taille_echantillon=None,
+                      budget_s=5.0, longueur_max=None, max_candidats=2_000_000, graine=0):
+    """
+    Itemsets fréquents approchés (Toivonen) : extraction sur un échantillon
+    aléatoire de produits à un seuil abaissé, puis une passe de comptage
+    exacte sur tout le catalogue des candidats et de leur frontière négative.
+
+    Garanties : les supports rapportés sont exacts. Avec un échantillon de
+    n >= ln(2 / delta) / (2 epsilon²) produits, le support d'un itemset donné
+    sur l'échantillon s'écarte de plus de epsilon de son support réel avec
+    une probabilité au plus delta (Hoeffding) ; le seuil de l'échantillon
+    est abaissé d'epsilon pour qu'un itemset fréquent n'y soit manqué qu'avec
+    cette probabilité. Un itemset de la frontière négative fréquent sur le
+    catalogue signale qu'un manque est possible (voir 'manques_possibles').
+    Si l'exploration est interrompue ('tronque'), les sur-ensembles des
+    itemsets fréquents du dernier niveau complet ne sont pas vérifiés : ces
+    itemsets sont rendus dans 'non_explores' et comptés parmi les manques
+    possibles.
+
+    Parameters:
+    -----------
+    X : scipy.sparse matrix
+        Matrice binaire produits x items
+    colonnes : array-like
+        Noms des items
+    min_support : float, optional
+        Support minimal. Par défaut 0.1
+    epsilon, delta : float, optional
+        Erreur et risque visés pour la taille de l'échantillon. Par défaut 0.02 et 0.05
+    taille_echantillon : int, optional
+        Impose la taille de l'échantillon (epsilon est alors recalculé)
+    budget_s : float, optional
+        Temps maximal de l'extraction sur l'échantillon : au-delà, les
+        itemsets plus longs ne sont pas explorés ('tronque'). Par défaut 5 s
+    longueur_max : int, optional
+        Longueur maximale des itemsets
+    max_candidats : int, optional
+        Nombre maximal de candidats d'un niveau : au-delà, l'exploration est
+        interrompue comme à l'échéance. Par défaut 2 000 000
+    graine : int, optional
+        Graine du tirage. Par défaut 0
+
+    Returns:
+    --------
+    dict : 'itemsets' (DataFrame support, itemsets en frozensets comme
+    mlxtend), 'bornes' (taille de l'échantillon, epsilon, delta, seuils,
+    candidats vérifiés, temps), 'manques_possibles' (itemsets de la frontière
+    fréquents sur le catalogue, et itemsets non explorés si tronqué),
+    'non_explores' (itemsets fréquents du dernier niveau dont les
+    sur-ensembles n'ont pas été vérifiés, vide si non tronqué) et 'tronque'
+    """
+    debut = time.perf_counter()
+    X = sparse.csr_matrix(X)
+    colonnes = np.asarray(colonnes, dtype=object)
+    nb_produits = X.shape[0]
+    if taille_echantillon is None:
+        taille_echantillon = math.ceil(math.log(2 / delta) / (2 * epsilon ** 2))
+    taille_echantillon = min(taille_echantillon, nb_produits)
+    exact = taille_echantillon == nb_produits
+    epsilon = 0.0 if exact else math.sqrt(math.log(2 / delta) / (2 * taille_echantillon))
+
+    # 1. Extraction sur l'échantillon, au seuil abaissé
+    lignes = np.sort(np.random.default_rng(graine).choice(nb_produits, taille_echantillon, replace=False))
+    bits = colonnes_bits(X if exact else X[lignes])
+    seuil_echantillon = max(min_support - epsilon, 0.0)
+    frequents, frontiere, tronque = _miner(bits, math.ceil(seuil_echantillon * taille_echantillon - 1e-9),
+                                           longueur_max, debut + budget_s, max_candidats)
+    if tronque:
+        print(f"Budget de {budget_s} s ou {max_candidats} candidats atteint : itemsets limités à {len(frequents)} items")
+
+    # 2. Passe exacte sur tout le catalogue : candidats et frontière négative
+    seuil = math.ceil(min_support * nb_produits - 1e-9)
+    presences = X.getnnz(axis=0)
+    if exact:
+        position = np.arange(len(colonnes), dtype=np.int64)
+    else:
+        # Les itemsets de plus d'un item ne citent que des items fréquents de
+        # l'échantillon : seuls ceux-là sont empaquetés
+        utilises = frequents[0].ravel()
+        position = np.full(len(colonnes), -1, dtype=np.int64)
+        position[utilises] = np.arange(len(utilises))
+        bits = colonnes_bits(X, utilises)
+    lignes_itemsets, manques = [], []
+    for candidats, bord in zip(frequents, frontiere):
+        if candidats.shape[1] == 1:
+            # Supports des items seuls : effectifs des colonnes
+            comptes, comptes_bord = presences[candidats[:, 0]], presences[bord[:, 0]]
+        else:
+            comptes = compter(bits, position[candidats])
+            comptes_bord = compter(bits, position[bord])
+        gardes = comptes >= seuil
+        lignes_itemsets += [(c / nb_produits, frozenset(colonnes[i])) for i, c in zip(candidats[gardes], comptes[gardes])]
+        manques += [frozenset(colonnes[i]) for i in bord[comptes_bord >= seuil]]
+    # Dernier niveau d'une exploration interrompue : ses sur-ensembles n'ont pas été vérifiés
+    non_explores = [frozenset(colonnes[i]) for i in candidats[gardes]] if tronque else []
+    manques += non_explores
+
+    nb_verifies = sum(len(f) + len(b) for f, b in zip(frequents, frontiere))
+    itemsets = pd.DataFrame(lignes_itemsets, columns=['support', 'itemsets'])
+    bornes = {
+        'produits': nb_produits,
+        'taille_echantillon': taille_echantillon,
+        'epsilon': epsilon,
+        'delta': delta,
+        'seuil_echantillon': seuil_echantillon,
+        'candidats_verifies': nb_verifies,
+        'temps_s': time.perf_counter() - debut,
+    }
+    print(f"Itemsets : {len(itemsets)} fréquents sur {nb_verifies} candidats vérifiés "
+          f"(échantillon {taille_echantillon}/{nb_produits}, epsilon = {epsilon:.3f}) en {bornes['temps_s']:.2f} s")
+    if non_explores:
+        print(f"Attention : exploration interrompue, les sur-ensembles de {len(non_explores)} itemsets fréquents "
+              f"n'ont pas été vérifiés (augmenter budget_s ou max_candidats)")
+    if len(manques) > len(non_explores):
+        print(f"Attention : {len(manques) - len(non_explores)} itemsets de la frontière négative sont fréquents, "
+              f"des itemsets plus longs ont pu être manqués (relancer avec un échantillon plus grand)")
+    return {'itemsets': itemsets, 'bornes': bornes, 'manques_possibles': manques, 'non_explores': non_explores,
+            'tronque': tronque}
+
+
+def regles_cible(itemsets, cible="TALC", min_threshold=0.7):
+    """
+    Règles dont le conséquent contient la cible (A -> {cible} comme
+    A -> {B, cible}), déduites des itemsets et de leurs supports exacts :
+    chaque itemset contenant la cible est découpé de toutes les façons
+    possibles, tout sous-ensemble d'un itemset retenu étant lui-même retenu.
+    Même ensemble de règles que regles_apriori sur les mêmes itemsets.
+
+    Returns:
+    --------
+    pd.DataFrame : antecedents, consequents, antecedent support, consequent
+    support, support, confidence, lift, leverage, conviction (colonnes
+    principales de mlxtend.association_rules), triées par lift décroissant
+    """
+    from itertools import combinations
+
+    supports = dict(zip(itemsets['itemsets'], itemsets['support']))
+    lignes = []
+    for itemset, support in supports.items():
+        if cible not in itemset or len(itemset) < 2:
+            continue
+        autres = sorted(itemset - {cible})
+        for taille in range(1, len(autres) + 1):
+            for antecedent in map(frozenset, combinations(autres, taille)):
+                consequent = itemset - antecedent
+                support_a, support_c = supports[antecedent], supports[consequent]
+                confiance = support / support_a
+                if confiance < min_threshold:
+                    continue
+                conviction = np.inf if confiance >= 1 else (1 - support_c) / (1 - confiance)
+                lignes.append((antecedent, consequent, support_a, support_c, support, confiance,
+                               confiance / support_c, support - support_a * support_c, conviction))
+    regles = pd.DataFrame(lignes, columns=['antecedents', 'consequents', 'antecedent support', 'consequent support',
+                                           'support', 'confidence', 'lift', 'leverage', 'conviction'])
+    return regles.sort_values(by='lift', ascending=False, kind='stable', ignore_index=True)
@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from analyse_talc import MODELES_DEFAUT, creer_modele
+
+
+def indices_cibles(colonnes, cibles):
+    """
+    Position des colonnes cibles dans la matrice standardisée.
+
+    Parameters:
+    -----------
+    colonnes : array-like
+        Noms des colonnes de la matrice
+    cibles : list of str
+        Noms standard des ingrédients à prédire (ex: ["TALC", "MICA", "CI 77891"])
+
+    Returns:
+    --------
+    np.ndarray : indices des colonnes cibles
+    """
+    positions = {nom: i for i, nom in enumerate(colonnes)}
+    manquantes = [cible for cible in cibles if cible not in positions]
+    if manquantes:
+        raise ValueError(f"Cibles absentes de la matrice : {manquantes}")
+    return np.array([positions[cible] for cible in cibles], dtype=np.int64)
+
+
+def separer_cibles(matrice, colonnes, cibles, exclure=()):
+    """
+    Sépare les colonnes cibles des variables explicatives, sans réécriture
+    des chaînes d'ingrédients ni nouvelle vectorisation.
+
+    Toutes les cibles sont retirées des variables : aucun modèle ne voit
+    d'ingrédient cible parmi ses entrées, et une seule matrice de variables
+    est partagée par toutes les cibles.
+
+    Parameters:
+    -----------
+    matrice : scipy.sparse matrix
+        Matrice binaire produits x ingrédients (ex: standardiser()['matrice'])
+    colonnes : array-like
+        Noms des colonnes
+    cibles : list of str
+        Ingrédients à prédire
+    exclure : list of str, optional
+        Autres colonnes à retirer des variables (ex: "TITANIUM DIOXIDE",
+        synonyme de la cible "CI 77891")
+
+    Returns:
+    --------
+    tuple : (X CSR sans les cibles, Y dense (produits x cibles) int8, noms des variables)
+    """
+    matrice = sparse.csc_matrix(matrice)
+    indices = indices_cibles(colonnes, cibles)
+    gardees = np.setdiff1d(np.arange(matrice.shape[1]), np.r_[indices, indices_cibles(colonnes, exclure)])
+    Y = (matrice[:, indices].toarray() > 0).astype(np.int8)
+    X = matrice[:, gardees].tocsr()
+    return X, Y, np.asarray(colonnes)[gardees]
+
+
+def _evaluer_cible(X, y, cible, modeles, test_size, random_state):
+    """Entraîne et évalue les modèles pour une cible (exécuté dans un processus fils)."""
+    from sklearn.model_selection import train_test_split
+    from sklearn.metrics import f1_score, balanced_accuracy_score
+
+    prevalence = float(y.mean())
+    if np.bincount(y, minlength=2).min() < 2:
+        # Cible constante ou quasi : pas de découpage stratifié possible
+        return [{"Cible": cible, "Modèle": name, "Prévalence": prevalence,
+                 "F1-macro": np.nan, "Balanced Accuracy": np.nan} for name in modeles]
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=test_size, random_state=random_state, stratify=y
+    )
+    results = []
+    for name in modeles:
+        model = creer_modele(name)
+        model.fit(X_train, y_train)
+        y_pred = model.predict(X_test)
+        results.append({
+            "Cible": cible,
+            "Modèle": name,
+            "Prévalence": prevalence,
+            "F1-macro": f1_score(y_test, y_pred, average="macro"),
+            "Balanced Accuracy": balanced_accuracy_score(y_test, y_pred)
+        })
+    return results
+
+
+def comparer_cibles(matrice, colonnes, cibles, modeles=MODELES_DEFAUT, exclure=(), test_size=0.2, random_state=42,
+                    n_jobs=-1):
+    """
+    Entraîne un modèle de présence par ingrédient cible (un contre tous),
+    les cibles étant traitées en parallèle dans des processus séparés.
+
+    Parameters:
+    -----------
+    matrice : scipy.sparse matrix
+        Matrice binaire produits x ingrédients standardisée
+    colonnes : array-like
+        Noms des colonnes
+    cibles : list of str
+        Ingrédients à prédire
+    modeles : tuple of str, optional
+        Modèles à comparer (voir creer_modele)
+    exclure : list of str, optional
+        Autres colonnes à retirer des variables (voir separer_cibles)
+    test_size : float, optional
+        Part du jeu de test. Par défaut 0.2
+    random_state : int, optional
+        Graine du découpage. Par défaut 42
+    n_jobs : int, optional
+        Nombre de processus (-1 : tous les cœurs). Par défaut -1
+
+    Returns:
+    --------
+    pd.DataFrame : Cible, Modèle, Prévalence, F1-macro et Balanced Accuracy
+    """
+    from joblib import Parallel, delayed, effective_n_jobs
+
+    X, Y, _ = separer_cibles(matrice, colonnes, cibles, exclure)
+    print(f"Variables : {X.shape[1]} ingrédients, cibles : {len(cibles)}")
+    # Les tableaux de X sont partagés par mappage mémoire entre les processus
+    resultats = Parallel(n_jobs=max(1, min(effective_n_jobs(n_jobs), len(cibles))))(
+        delayed(_evaluer_cible)(X, Y[:, j], cible, tuple(modeles), test_size, random_state)
+        for j, cible in enumerate(cibles)
+    )
+    return pd.DataFrame([ligne for lignes in resultats for ligne in lignes])
@@ -0,0 +1,154 @@
+import pandas as pd
+import numpy as np
+from scipy import sparse
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # pyarrow facultatif : repli sur les opérations de chaînes pandas
+    pa = None
+    pc = None
+
+# Colonnes multi-valuées (overlays) de l'export cosmetikwatch
+OVERLAY_COLS = [
+    "Ingrédients",
+    "Type(s) de produit - Formulation(s) / Galénique(s)",
+    "Zone(s) d'application",
+    "Cible(s) cosmétique(s)",
+    "Article(s) de conditionnement / Packaging",
+]
+
+
+def _exploser_arrow(serie):
+    """Découpe une colonne avec pyarrow : renvoie (positions des produits, valeurs)."""
+    # Cellules non textuelles converties comme str(cell) dans le repli pandas ; les absentes restent nulles
+    tableau = pa.array(serie.astype('string').to_numpy(dtype=object, na_value=None), type=pa.large_string(),
+                       from_pandas=True)
+    listes = pc.split_pattern(pc.replace_substring(tableau, "/", ","), ",")
+    parents = pc.list_parent_indices(listes).to_numpy()
+    valeurs = pc.utf8_trim_whitespace(pc.list_flatten(listes))
+    garder = pc.greater(pc.utf8_length(valeurs), 0)
+    return parents[garder.to_numpy(zero_copy_only=False)], pc.filter(valeurs, garder).to_numpy(zero_copy_only=False)
+
+
+def _exploser_pandas(serie):
+    """Découpe une colonne avec les opérations de chaînes pandas : renvoie (positions, valeurs)."""
+    eclate = (
+        serie.reset_index(drop=True).dropna().astype(str)
+        .str.replace("/", ",", regex=False)
+        .str.split(",")
+        .explode()
+        .str.strip()
+    )
+    eclate = eclate[eclate.str.len() > 0]
+    return eclate.index.to_numpy(), eclate.to_numpy(dtype=object)
+
+
+def exploser_colonne(serie):
+    """
+    Découpe en bloc une colonne multi-valuée ("/" et ",") sans fonction Python par cellule.
+
+    Parameters:
+    -----------
+    serie : pd.Series
+        Colonne textuelle multi-valuée
+
+    Returns:
+    --------
+    tuple : (positions des produits, valeurs nettoyées), deux tableaux numpy
+    alignés dans l'ordre des cellules
+    """
+    if pa is not None:
+        return _exploser_arrow(serie)
+    return _exploser_pandas(serie)
+
+
+def exploser_overlays(df, colonnes=OVERLAY_COLS):
+    """
+    Construit la table longue normalisée des colonnes multi-valuées.
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Export contenant les colonnes overlays
+    colonnes : list of str, optional
+        Colonnes à découper. Par défaut OVERLAY_COLS
+
+    Returns:
+    --------
+    pd.DataFrame : colonnes product_id (position de la ligne dans df),
+    attribute et value, ces deux dernières en catégories (codes entiers)
+    """
+    morceaux_id, morceaux_attribut, morceaux_valeur = [], [], []
+    for i, col in enumerate(colonnes):
+        positions, valeurs = exploser_colonne(df[col])
+        morceaux_id.append(positions)
+        morceaux_attribut.append(np.full(len(positions), i, dtype=np.int8))
+        morceaux_valeur.append(valeurs)
+
+    return pd.DataFrame({
+        "product_id": np.concatenate(morceaux_id).astype(np.int64),
+        "attribute": pd.Categorical.from_codes(np.concatenate(morceaux_attribut), categories=list(colonnes)),
+        "value": pd.Categorical(np.concatenate(morceaux_valeur)),
+    })
+
+
+def listes_arrow(df, colonnes=OVERLAY_COLS):
+    """
+    Renvoie les colonnes overlays sous forme de colonnes Arrow list<string>
+    (une liste vide pour une cellule manquante, comme split_overlay).
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Export contenant les colonnes overlays
+    colonnes : list of str, optional
+        Colonnes à découper. Par défaut OVERLAY_COLS
+
+    Returns:
+    --------
+    pyarrow.Table : une colonne "<col>_list" par colonne découpée
+    """
+    if pa is None:
+        raise ImportError("listes_arrow nécessite pyarrow")
+
+    tableaux = {}
+    for col in colonnes:
+        positions, valeurs = exploser_colonne(df[col])
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(positions, minlength=len(df)))])
+        tableaux[col + "_list"] = pa.LargeListArray.from_arrays(
+            pa.array(offsets, type=pa.int64()), pa.array(valeurs, type=pa.large_string())
+        )
+    return pa.table(tableaux)
+
+
+def binariser_long(long, attribut="Ingrédients", nb_produits=None):
+    """
+    Matrice binaire produits x valeurs d'un attribut, construite directement
+    depuis les codes catégoriels de la table longue.
+
+    Parameters:
+    -----------
+    long : pd.DataFrame
+        Résultat de exploser_overlays()
+    attribut : str, optional
+        Colonne overlay à binariser. Par défaut 'Ingrédients'
+    nb_produits : int, optional
+        Nombre de lignes de la matrice. Par défaut le plus grand product_id + 1
+
+    Returns:
+    --------
+    tuple : (matrice CSR int8, noms des colonnes triés comme MultiLabelBinarizer)
+    """
+    sous_table = long[long["attribute"] == attribut]
+    valeurs = sous_table["value"].cat.remove_unused_categories()
+    if nb_produits is None:
+        nb_produits = int(long["product_id"].max()) + 1 if len(long) else 0
+
+    matrice = sparse.csr_matrix(
+        (np.ones(len(sous_table), dtype=np.int8), (sous_table["product_id"].to_numpy(), valeurs.cat.codes.to_numpy())),
+        shape=(nb_produits, len(valeurs.cat.categories))
+    )
+    matrice.sum_duplicates()
+    matrice.data = np.minimum(matrice.data, 1)
+    return matrice, valeurs.cat.categories.to_numpy()
@@ -0,0 +1,217 @@
+import re
+from collections import namedtuple
+
+import pandas as pd
+
+# Seuls les caractères structurants arrêtent la lecture : le texte entre deux
+# délimiteurs est découpé par le moteur d'expressions régulières, sans boucle Python
+_STRUCTURE = re.compile(r"[,()\[\]:/*]")
+_CODE_CI = re.compile(r"\bCI\s*(\d{5})\b", re.IGNORECASE)
+_MARQUEUR_PEUT_CONTENIR = re.compile(r"\s*(?:\+\s*/\s*-|MAY CONTAIN|PEUT CONTENIR)(?:\s*\+\s*/\s*-)?\s*:?\s*", re.IGNORECASE)
+
+Token = namedtuple('Token', [
+    'position',        # rang de l'ingrédient dans la liste du produit (0 = premier)
+    'nom',             # nom principal (premier synonyme), sans parenthèses ni crochets
+    'type',            # 'ci' si le nom est un code Color Index, sinon 'ingredient'
+    'codes_ci',        # codes CI cités dans le nom, les synonymes ou les parenthèses
+    'peut_contenir',   # True dans une section "may contain" / "+/-"
+    'marque',          # True si l'ingrédient porte un astérisque (bio, naturel...)
+    'synonymes',       # formes jointes par "/" (ex: PARFUM/FRAGRANCE)
+    'qualificatifs',   # contenus entre parenthèses / crochets autres que des codes CI
+    'prefixe',         # texte avant ":" (ex: "INCI TEINTE 01 LIGHT GLOW"), '' sinon
+])
+
+
+def _est_marqueur(texte):
+    """True si le texte se réduit à un marqueur "may contain" / "+/-"."""
+    texte = texte.strip()
+    marqueur = _MARQUEUR_PEUT_CONTENIR.match(texte)
+    return bool(marqueur) and marqueur.end() == len(texte)
+
+
+def _decouper_synonymes(nom):
+    """
+    Sépare les formes jointes par "/" lorsqu'il s'agit de synonymes.
+
+    "CAPRYLIC/CAPRIC TRIGLYCERIDE" est un seul nom chimique alors que
+    "PARFUM/FRAGRANCE" ou "CI 77491/IRON OXIDES" sont des synonymes : on ne
+    sépare que si une partie est un code CI, ou si toutes les parties ont un
+    seul mot, ou toutes plusieurs.
+    """
+    parties = [' '.join(p.split()) for p in nom.split('/')]
+    parties = list(dict.fromkeys(p for p in parties if p))
+    if len(parties) > 1 and (len({' ' in p for p in parties}) == 1
+                             or any(_CODE_CI.fullmatch(p) for p in parties)):
+        return tuple(parties)
+    return ('/'.join(parties),)
+
+
+def parser(texte):
+    """
+    Découpe une liste INCI en tokens typés, en une seule lecture de la chaîne.
+
+    L'automate suit l'imbrication des parenthèses et crochets (une virgule
+    entre parenthèses ne sépare pas : "IRON OXIDES (CI 77491, CI 77492)"),
+    les sections "may contain" / "+/-" (isolées, ou entre crochets comme
+    "[+/-: CI 77491, CI 77891]"), les préfixes avant ":", les astérisques et
+    les synonymes joints par "/".
+
+    Parameters:
+    -----------
+    texte : str
+        Liste d'ingrédients d'un produit
+
+    Returns:
+    --------
+    list of Token
+    """
+    if not isinstance(texte, str):
+        return []
+
+    tokens = []
+    prefixe = ''
+    peut_contenir = False
+    section = False             # à l'intérieur d'une section "[+/- : ...]"
+    profondeur = 0
+    nom, interieur, qualifs = [], [], []
+    marque = False
+
+    def emettre():
+        nonlocal nom, qualifs, marque, peut_contenir
+        brut = ' '.join(''.join(nom).split())
+        contenus, est_marque = qualifs, marque
+        nom, qualifs, marque = [], [], False
+
+        marqueur = _MARQUEUR_PEUT_CONTENIR.match(brut)
+        if marqueur or any(_est_marqueur(q) for q in contenus):
+            # "+/- (MAY CONTAIN)", "MAY CONTAIN MICA"... : tout ce qui suit peut être présent
+            peut_contenir = True
+            brut = brut[marqueur.end():] if marqueur else brut
+            contenus = [q for q in contenus if not _est_marqueur(q)]
+        if not brut or brut.replace(' ', '').isdigit():
+            return
+
+        synonymes = _decouper_synonymes(brut) if '/' in brut else (brut,)
+        codes, qualificatifs = [], []
+        for morceau in synonymes:
+            codes.extend('CI ' + code for code in _CODE_CI.findall(morceau))
+        for contenu in contenus:
+            contenu = ' '.join(contenu.upper().split())
+            if 'CI' in contenu:
+                codes.extend('CI ' + code for code in _CODE_CI.findall(contenu))
+                if not _CODE_CI.sub('', contenu).strip(' ,/'):
+                    continue
+            if contenu:
+                qualificatifs.append(contenu)
+        tokens.append(Token(
+            position=len(tokens),
+            nom=synonymes[0],
+            type='ci' if codes and _CODE_CI.fullmatch(synonymes[0]) else 'ingredient',
+            codes_ci=tuple(dict.fromkeys(codes)) if codes else (),
+            peut_contenir=peut_contenir,
+            marque=est_marque,
+            synonymes=synonymes,
+            qualificatifs=tuple(qualificatifs),
+            prefixe=prefixe,
+        ))
+
+    debut = 0
+    for delimiteur in _STRUCTURE.finditer(texte):
+        if delimiteur.start() < debut:
+            continue    # délimiteur déjà consommé avec un marqueur "+/-"
+        caractere = delimiteur.group()
+        (interieur if profondeur else nom).append(texte[debut:delimiteur.start()])
+        debut = delimiteur.end()
+
+        if profondeur:
+            # Dans des parenthèses / crochets : seul l'équilibre compte
+            if caractere in '([':
+                profondeur += 1
+            elif caractere in ')]':
+                profondeur -= 1
+                if not profondeur:
+                    qualifs.append(''.join(interieur))
+                    continue
+            interieur.append(caractere)
+        elif caractere == '[' and (_est_marqueur(''.join(nom)) or _MARQUEUR_PEUT_CONTENIR.match(texte, debut)):
+            # Section "may contain" : "MAY CONTAIN [...]" ou "DIMETHICONE [+/-: ...]"
+            marqueur = _MARQUEUR_PEUT_CONTENIR.match(texte, debut)
+            if marqueur:
+                debut = marqueur.end()
+                emettre()
+            nom, qualifs, section, peut_contenir = [], [], True, True
+        elif caractere == '[' and not ''.join(nom).strip():
+            nom, section = [], True
+        elif caractere in '([':
+            profondeur, interieur = 1, []
+        elif caractere == ']' and section:
+            emettre()
+            section, peut_contenir = False, False
+        elif caractere == ',':
+            emettre()
+        elif caractere == ':':
+            contenu = ' '.join(''.join(nom).split())
+            if _est_marqueur(contenu) or any(_est_marqueur(q) for q in qualifs):
+                peut_contenir = True
+            elif contenu and not section:
+                # Nouveau préfixe (ex: une autre teinte) : nouvelle liste complète
+                prefixe, peut_contenir = contenu, False
+            nom, qualifs = [], []
+        elif caractere == '/':
+            nom.append('/')
+        elif caractere == '*':
+            marque = True
+        # ")" ou "]" orphelins : ignorés
+
+    (interieur if profondeur else nom).append(texte[debut:])
+    if profondeur:
+        qualifs.append(''.join(interieur))
+    emettre()
+    return tokens
+
+
+def parser_serie(serie):
+    """
+    Découpe une colonne entière de listes INCI en table longue de tokens.
+
+    Parameters:
+    -----------
+    serie : pd.Series
+        Colonne des listes d'ingrédients
+
+    Returns:
+    --------
+    pd.DataFrame : une ligne par ingrédient, avec 'produit' (index de la
+    série) suivi des champs de Token
+    """
+    produits, tokens = [], []
+    for index, texte in zip(serie.index, serie.to_numpy(dtype=object)):
+        resultat = parser(texte)
+        produits.extend([index] * len(resultat))
+        tokens.extend(resultat)
+    long = pd.DataFrame(tokens, columns=Token._fields)
+    long.insert(0, 'produit', produits)
+    long['type'] = long['type'].astype('category')
+    return long
+
+
+def listes_ingredients(serie, peut_contenir=True):
+    """
+    Noms d'ingrédients de chaque produit, dans l'ordre de la liste.
+
+    Parameters:
+    -----------
+    serie : pd.Series
+        Colonne des listes d'ingrédients
+    peut_contenir : bool, optional
+        Garde les ingrédients des sections "may contain". Par défaut True
+
+    Returns:
+    --------
+    pd.Series : une liste de noms par produit (même index)
+    """
+    return pd.Series(
+        [[t.nom for t in parser(texte) if peut_contenir or not t.peut_contenir]
+         for texte in serie.to_numpy(dtype=object)],
+        index=serie.index,
+    )
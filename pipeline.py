@@ -0,0 +1,225 @@
+import ast
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+
+def _empreinte_fichier(chemin, _cache={}):
+    """Empreinte SHA-256 du contenu d'un fichier (mémorisée par date de modification)."""
+    stat = os.stat(chemin)
+    cle = (os.path.abspath(chemin), stat.st_mtime_ns, stat.st_size)
+    if cle not in _cache:
+        sha = hashlib.sha256()
+        with open(chemin, 'rb') as f:
+            for bloc in iter(lambda: f.read(1 << 20), b''):
+                sha.update(bloc)
+        _cache[cle] = sha.hexdigest()
+    return _cache[cle]
+
+
+def _empreinte_parametre(valeur):
+    """Représentation stable d'un paramètre ; un chemin de fichier est remplacé par son contenu haché."""
+    if isinstance(valeur, str) and os.path.isfile(valeur):
+        return 'fichier:' + _empreinte_fichier(valeur)
+    if isinstance(valeur, (list, tuple)):
+        return [_empreinte_parametre(v) for v in valeur]
+    if isinstance(valeur, dict):
+        return {str(k): _empreinte_parametre(v) for k, v in sorted(valeur.items())}
+    return repr(valeur)
+
+
+def _modules_locaux(chemin):
+    """
+    Fichier d'un module et fichiers des modules du même dossier qu'il
+    importe, directement ou non (imports paresseux dans les fonctions
+    compris).
+    """
+    dossier = os.path.dirname(chemin)
+    fichiers, a_voir = set(), [chemin]
+    while a_voir:
+        fichier = a_voir.pop()
+        if fichier in fichiers:
+            continue
+        fichiers.add(fichier)
+        with open(fichier, encoding='utf-8') as f:
+            arbre = ast.parse(f.read(), filename=fichier)
+        for noeud in ast.walk(arbre):
+            if isinstance(noeud, ast.Import):
+                noms = [alias.name for alias in noeud.names]
+            elif isinstance(noeud, ast.ImportFrom) and noeud.level == 0 and noeud.module:
+                noms = [noeud.module]
+            else:
+                continue
+            for nom in noms:
+                racine = nom.split('.')[0]
+                for candidat in (os.path.join(dossier, racine + '.py'),
+                                 os.path.join(dossier, racine, '__init__.py')):
+                    if os.path.isfile(candidat):
+                        a_voir.append(candidat)
+    return sorted(fichiers)
+
+
+class Etape:
+    """Étape nommée du pipeline : fonction, entrées (autres étapes) et paramètres."""
+
+    def __init__(self, nom, fonction, entrees=(), parametres=None, version=''):
+        self.nom = nom
+        self.fonction = fonction
+        self.entrees = tuple(entrees)
+        self.parametres = dict(parametres or {})
+        self.version = version
+
+    def version_code(self):
+        """
+        Empreinte du code de l'étape (et de la version déclarée) : module
+        définissant la fonction et modules du dépôt qu'il importe, pour
+        qu'une modification du code qui fait le travail, et pas seulement de
+        la fonction d'étape qui le délègue, invalide le cache.
+        """
+        fonction = inspect.unwrap(self.fonction)
+        try:
+            chemin = inspect.getsourcefile(fonction)
+            empreintes = [os.path.basename(fichier) + ':' + _empreinte_fichier(fichier)
+                          for fichier in _modules_locaux(os.path.abspath(chemin))]
+            source = inspect.getsource(fonction) + '\n'.join(empreintes)
+        except (OSError, TypeError, SyntaxError):
+            source = getattr(self.fonction, '__qualname__', repr(self.fonction))
+        return hashlib.sha256((source + self.version).encode('utf-8')).hexdigest()
+
+
+class Pipeline:
+    """
+    Graphe acyclique d'étapes dont les résultats sont mis en cache sur disque.
+
+    La clé d'une étape est le hachage de son nom, de la version de son code,
+    de ses paramètres et des clés de ses entrées : une relance ne réexécute
+    que les étapes situées en aval de ce qui a changé. Les branches
+    indépendantes s'exécutent en parallèle (threads).
+    """
+
+    def __init__(self, dossier_cache='.cache_pipeline', max_workers=None):
+        self.dossier_cache = dossier_cache
+        self.max_workers = max_workers
+        self.etapes = {}
+
+    def etape(self, nom, fonction, entrees=(), version='', **parametres):
+        """
+        Déclare une étape.
+
+        Parameters:
+        -----------
+        nom : str
+            Nom unique de l'étape
+        fonction : callable
+            Appelée avec les résultats des entrées (dans l'ordre) puis les paramètres nommés
+        entrees : tuple of str, optional
+            Noms des étapes amont
+        version : str, optional
+            Chaîne à modifier pour invalider le cache sans changer le code
+        **parametres :
+            Paramètres nommés transmis à la fonction et inclus dans la clé
+        """
+        if nom in self.etapes:
+            raise ValueError(f"Étape déjà déclarée : {nom}")
+        for entree in entrees:
+            if entree not in self.etapes:
+                raise ValueError(f"Entrée inconnue pour '{nom}' : {entree}")
+        self.etapes[nom] = Etape(nom, fonction, entrees, parametres, version)
+        return self
+
+    def parametrer(self, nom, **parametres):
+        """Modifie les paramètres d'une étape existante."""
+        self.etapes[nom].parametres.update(parametres)
+        return self
+
+    def cles(self):
+        """Calcule la clé de cache de chaque étape (ordre de déclaration = ordre topologique)."""
+        cles = {}
+        for nom, etape in self.etapes.items():
+            contenu = json.dumps({
+                'nom': nom,
+                'code': etape.version_code(),
+                'parametres': _empreinte_parametre(etape.parametres),
+                'entrees': [cles[entree] for entree in etape.entrees],
+            }, sort_keys=True)
+            cles[nom] = hashlib.sha256(contenu.encode('utf-8')).hexdigest()
+        return cles
+
+    def _chemin(self, nom, cle):
+        return os.path.join(self.dossier_cache, f"{nom.replace('/', '_')}-{cle[:16]}.pkl")
+
+    def _ancetres(self, cibles):
+        necessaires, a_voir = set(), list(cibles)
+        while a_voir:
+            nom = a_voir.pop()
+            if nom not in necessaires:
+                necessaires.add(nom)
+                a_voir.extend(self.etapes[nom].entrees)
+        return necessaires
+
+    def executer(self, cibles=None, forcer=False):
+        """
+        Exécute les étapes nécessaires pour obtenir les cibles.
+
+        Parameters:
+        -----------
+        cibles : list of str, optional
+            Étapes dont on veut le résultat. Par défaut les étapes terminales
+        forcer : bool, optional
+            Ignore le cache et réexécute tout. Par défaut False
+
+        Returns:
+        --------
+        dict : résultat de chaque cible
+        """
+        if cibles is None:
+            utilisees = {entree for etape in self.etapes.values() for entree in etape.entrees}
+            cibles = [nom for nom in self.etapes if nom not in utilisees]
+        os.makedirs(self.dossier_cache, exist_ok=True)
+
+        cles = self.cles()
+        necessaires = self._ancetres(cibles)
+        en_cache = {nom for nom in necessaires
+                    if not forcer and os.path.exists(self._chemin(nom, cles[nom]))}
+
+        # Une étape en cache n'a besoin d'être relue que si une cible ou une
+        # étape à exécuter l'utilise
+        a_executer = necessaires - en_cache
+        a_charger = {nom for nom in en_cache
+                     if nom in cibles or any(nom in self.etapes[aval].entrees for aval in a_executer)}
+
+        resultats = {}
+        for nom in a_charger:
+            with open(self._chemin(nom, cles[nom]), 'rb') as f:
+                resultats[nom] = pickle.load(f)
+            print(f"[cache] {nom}")
+
+        def lancer(nom):
+            etape = self.etapes[nom]
+            debut = time.perf_counter()
+            resultat = etape.fonction(*[resultats[entree] for entree in etape.entrees], **etape.parametres)
+            chemin = self._chemin(nom, cles[nom])
+            with open(chemin + '.tmp', 'wb') as f:
+                pickle.dump(resultat, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(chemin + '.tmp', chemin)
+            print(f"[exécutée] {nom} ({time.perf_counter() - debut:.2f} s)")
+            return resultat
+
+        restantes = set(a_executer)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executeur:
+            en_cours = {}
+            while restantes or en_cours:
+                pretes = [nom for nom in self.etapes if nom in restantes
+                          and all(entree in resultats for entree in self.etapes[nom].entrees)]
+                for nom in pretes:
+                    restantes.discard(nom)
+                    en_cours[executeur.submit(lancer, nom)] = nom
+                faits, _ = wait(en_cours, return_when=FIRST_COMPLETED)
+                for futur in faits:
+                    resultats[en_cours.pop(futur)] = futur.result()
+
+        return {nom: resultats[nom] for nom in cibles}
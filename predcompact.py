@@ -0,0 +1,113 @@
+"""
+Point d'entrée de predcompact.
+
+Les fonctions publiques des modules d'analyse sont accessibles depuis ce
+module (ex: predcompact.separer_ingredients_binaire), mais leur module
+n'est importé qu'au premier accès (PEP 562) : "import predcompact" ne
+charge ni pandas, ni scikit-learn, ni matplotlib.
+
+En ligne de commande :
+    python predcompact.py profil 375_cosmetikwatch_19_08_2025.xlsx
+    python predcompact.py benchmark --tailles 10000
+    python predcompact.py budget-imports
+    python predcompact.py ingestion --sortie catalogue_fusionne.parquet
+"""
+import importlib
+import sys
+
+# Nom public -> module qui le définit
+_EXPORTS = {
+    'separer_ingredients_binaire': 'separer',
+    'suggerer_fusions': 'separer',
+    'creer_tableau_dynamique': 'tableau_dynamique',
+    'afficher_tableau_dynamique': 'tableau_dynamique',
+    'creer_histogramme_marques': 'histogramme_marques',
+    'afficher_histogramme_marques': 'histogramme_marques',
+    'creer_camembert_pays': 'camembert_pays',
+    'afficher_camembert_pays': 'camembert_pays',
+    'construire_pipeline': 'analyse_talc',
+    'exploser_overlays': 'overlays',
+    'parser_serie': 'parseur_inci',
+    'detecter_doublons': 'dedoublonnage',
+    'fusionner_doublons': 'dedoublonnage',
+    'profiler': 'profileur',
+    'comparer_cibles': 'multi_cibles',
+    'expliquer': 'explications',
+    'expliquer_par_lots': 'explications',
+    'generer_catalogue': 'generateur_catalogue',
+    'exporter_excel': 'export',
+    'exporter_parquet': 'export',
+    'comparer_snapshots': 'diff_snapshots',
+    'CatalogueIncremental': 'diff_snapshots',
+    'comparer_modes': 'vectorisation_hachee',
+    'typer': 'schema',
+    'valider': 'schema',
+    'detecter_familles': 'communautes',
+    'ingerer': 'ingestion',
+    'MoniteurDerive': 'derive',
+    'balayer_seuils': 'balayage_seuils',
+    'classer_ingredients': 'importance',
+    'Prevalences': 'prevalence',
+    'extraire_itemsets': 'itemsets_approches',
+}
+
+# Modules accessibles comme attributs (ex: predcompact.analyse_talc)
+_MODULES = {
+    'separer', 'tableau_dynamique', 'histogramme_marques', 'camembert_pays',
+    'analyse_talc', 'overlays', 'parseur_inci', 'dedoublonnage', 'profileur',
+    'multi_cibles', 'explications', 'generateur_catalogue', 'pipeline',
+    'instrumentation', 'sketches', 'export', 'diff_snapshots',
+    'vectorisation_hachee', 'schema', 'communautes',
+    'ingestion', 'derive', 'balayage_seuils', 'importance', 'prevalence',
+    'itemsets_approches',
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(nom):
+    if nom in _MODULES:
+        module = importlib.import_module(nom)
+    elif nom in _EXPORTS:
+        module = getattr(importlib.import_module(_EXPORTS[nom]), nom)
+    else:
+        raise AttributeError(f"module 'predcompact' has no attribute '{nom}'")
+    # Mis en cache : les accès suivants ne repassent plus par __getattr__
+    globals()[nom] = module
+    return module
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS) | _MODULES)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="predcompact : analyse des compacts et du TALC")
+    commandes = parser.add_subparsers(dest='commande', required=True)
+    profil = commandes.add_parser('profil', help="Data Dictionary d'un export (une passe, par blocs)")
+    profil.add_argument('fichiers', nargs='+')
+    commandes.add_parser('benchmark', help="benchmark de passage à l'échelle (voir benchmark_pipeline.py)",
+                         add_help=False)
+    commandes.add_parser('budget-imports', help="vérifie les temps d'import (voir budget_imports.py)",
+                         add_help=False)
+    commandes.add_parser('ingestion', help="lit et fusionne les classeurs de sources.json (voir ingestion.py)",
+                         add_help=False)
+    args, reste = parser.parse_known_args(argv)
+
+    # Seul le module de la commande demandée est importé
+    if args.commande == 'benchmark':
+        return importlib.import_module('benchmark_pipeline').main(reste)
+    if args.commande == 'budget-imports':
+        return importlib.import_module('budget_imports').main(reste)
+    if args.commande == 'ingestion':
+        return importlib.import_module('ingestion').main(reste)
+    if reste:
+        parser.error(f"arguments inconnus : {' '.join(reste)}")
+    print(__getattr__('profiler')(args.fichiers).data_dict().to_string(index=False))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,191 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from schema import CATEGORIE, en_categorie
+
+# Colonnes de regroupement multi-valuées : un produit appartient à chacune de ses valeurs
+# (les noms de groupes contiennent des virgules, "GARANCIA, INC" : seule la catégorie est découpée)
+SEPARATEURS = {CATEGORIE: ','}
+
+
+def matrice_groupes(serie, separateur=None):
+    """
+    Matrice d'appartenance creuse produits x groupes d'une colonne de
+    regroupement (marque, groupe, pays, catégorie).
+
+    Parameters:
+    -----------
+    serie : pd.Series
+        Colonne de regroupement, une ligne par produit
+    separateur : str, optional
+        Séparateur des colonnes multi-valuées (None : une valeur par produit)
+
+    Returns:
+    --------
+    tuple : (matrice CSR int32 produits x groupes, noms des groupes)
+    """
+    serie = serie.reset_index(drop=True)
+    if separateur is not None:
+        serie = serie.astype('string').str.split(separateur).explode().str.strip()
+    if not isinstance(serie.dtype, pd.CategoricalDtype) or separateur is not None:
+        serie = en_categorie(serie)[0]
+    codes = serie.cat.codes.to_numpy()
+    presents = codes >= 0
+    lignes = serie.index.to_numpy()[presents]
+    nb_produits = int(serie.index.max()) + 1 if len(serie) else 0
+    groupes = sparse.csr_matrix(
+        (np.ones(len(lignes), dtype=np.int32), (lignes, codes[presents])),
+        shape=(nb_produits, len(serie.cat.categories))
+    )
+    groupes.sum_duplicates()
+    groupes.data = np.minimum(groupes.data, 1)
+    return groupes, serie.cat.categories.to_numpy(dtype=object)
+
+
+class Prevalences:
+    """
+    Effectifs et prévalences groupe x ingrédient, obtenus par un seul
+    produit creux G.T @ X entre la matrice d'appartenance des groupes et la
+    matrice binaire des ingrédients.
+
+    Parameters:
+    -----------
+    groupes : pd.Series
+        Colonne de regroupement (ex: df['Marque']), alignée sur les lignes de matrice
+    matrice : scipy.sparse matrix
+        Matrice binaire produits x ingrédients (ex: binariser()['matrice'])
+    colonnes : array-like
+        Noms des ingrédients
+    separateur : str, optional
+        Voir matrice_groupes(). Par défaut celui de SEPARATEURS pour cette colonne
+    """
+
+    def __init__(self, groupes, matrice, colonnes, separateur=None):
+        if separateur is None:
+            separateur = SEPARATEURS.get(groupes.name)
+        self.attribut = groupes.name
+        self.X = sparse.csr_matrix(matrice)
+        self.X.data = (self.X.data != 0).astype(np.int32)
+        self.G, self.groupes = matrice_groupes(groupes, separateur)
+        if self.G.shape[0] < self.X.shape[0]:
+            self.G.resize((self.X.shape[0], self.G.shape[1]))
+        self.colonnes = np.asarray(colonnes, dtype=object)
+        self._positions = {nom: j for j, nom in enumerate(self.colonnes)}
+        self.comptes = (self.G.T @ self.X).tocsr()
+        self.comptes.sort_indices()
+        self.tailles = np.asarray(self.G.sum(axis=0)).ravel()
+        self.totaux = np.asarray(self.X.sum(axis=0)).ravel()
+        self.nb_produits = self.X.shape[0]
+
+    def _indices(self, ingredients):
+        manquants = [nom for nom in ingredients if nom not in self._positions]
+        if manquants:
+            raise ValueError(f"Ingrédients absents de la matrice : {manquants}")
+        return np.array([self._positions[nom] for nom in ingredients], dtype=np.int64)
+
+    def prevalence(self):
+        """Prévalences creuses (groupes x ingrédients) : part des produits du groupe contenant l'ingrédient."""
+        return sparse.diags(1.0 / np.maximum(self.tailles, 1)) @ self.comptes
+
+    def tableau(self, ingredients, min_produits=1):
+        """
+        Tableau croisé groupe x ingrédients choisis (seules ces colonnes sont densifiées).
+
+        Returns:
+        --------
+        pd.DataFrame : 'Nombre de produits' puis la prévalence de chaque ingrédient
+        """
+        indices = self._indices(ingredients)
+        gardes = self.tailles >= min_produits
+        comptes = self.comptes[:, indices].toarray()[gardes]
+        tableau = pd.DataFrame(comptes / self.tailles[gardes, None], columns=list(ingredients),
+                               index=pd.Index(self.groupes[gardes], name=self.attribut))
+        tableau.insert(0, 'Nombre de produits', self.tailles[gardes])
+        return tableau.sort_values('Nombre de produits', ascending=False, kind='stable')
+
+    def effectifs(self, ingredients, tous=False):
+        """
+        Nombre de produits de chaque groupe contenant l'un des ingrédients
+        (tous=True : tous à la fois), au format de schema.compter() : il
+        alimente directement les camemberts et histogrammes existants.
+
+        Returns:
+        --------
+        pd.Series : effectifs non nuls indexés par groupe, triés par effectif décroissant
+        """
+        presences = np.asarray(self.X[:, self._indices(ingredients)].sum(axis=1)).ravel()
+        contient = presences == len(ingredients) if tous else presences > 0
+        effectifs = self.G.T @ contient.astype(np.int32)
+        presents = np.flatnonzero(effectifs)
+        resultat = pd.Series(effectifs[presents], index=self.groupes[presents], name='count')
+        resultat.index.name = self.attribut
+        return resultat.sort_values(ascending=False, kind='stable')
+
+    def part_contenant(self, ingredients, tous=False, min_produits=1):
+        """Part des produits de chaque groupe contenant l'un des ingrédients (ex: TALC ou MICA)."""
+        effectifs = self.effectifs(ingredients, tous)
+        tailles = pd.Series(self.tailles, index=pd.Index(self.groupes, name=self.attribut))
+        tailles = tailles[tailles >= min_produits]
+        part = (effectifs.reindex(tailles.index, fill_value=0) / tailles).rename('part')
+        return pd.DataFrame({'Nombre de produits': tailles, 'contenant': effectifs.reindex(tailles.index, fill_value=0),
+                             'part': part}).sort_values('part', ascending=False, kind='stable')
+
+    def lift(self):
+        """
+        Lift groupe contre reste, sur les seuls couples observés :
+        prévalence dans le groupe / prévalence hors du groupe (inf si
+        l'ingrédient n'apparaît que dans le groupe).
+
+        Returns:
+        --------
+        scipy.sparse.csr_matrix : groupes x ingrédients (même motif que comptes)
+        """
+        lignes = np.repeat(np.arange(self.comptes.shape[0]), np.diff(self.comptes.indptr))
+        colonnes = self.comptes.indices
+        dans = self.comptes.data / np.maximum(self.tailles[lignes], 1)
+        reste = self.nb_produits - self.tailles[lignes]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            hors = (self.totaux[colonnes] - self.comptes.data) / reste
+            valeurs = np.where(hors > 0, dans / hors, np.inf)
+        return sparse.csr_matrix((valeurs, colonnes.copy(), self.comptes.indptr.copy()), shape=self.comptes.shape)
+
+    def top(self, k=10, min_produits=1, min_comptes=1):
+        """
+        Les k ingrédients les plus présents de chaque groupe, avec prévalence
+        et lift groupe contre reste, sans densifier la matrice.
+
+        Parameters:
+        -----------
+        k : int, optional
+            Ingrédients par groupe. Par défaut 10
+        min_produits : int, optional
+            Taille minimale des groupes retenus. Par défaut 1
+        min_comptes : int, optional
+            Nombre minimal de produits du groupe contenant l'ingrédient. Par défaut 1
+
+        Returns:
+        --------
+        pd.DataFrame : groupe, ingredient, produits, prevalence, lift, rang
+        """
+        lignes = np.repeat(np.arange(self.comptes.shape[0]), np.diff(self.comptes.indptr))
+        comptes = self.comptes.data
+        lift = self.lift().data
+        gardes = (self.tailles[lignes] >= min_produits) & (comptes >= min_comptes)
+        lignes, colonnes, comptes, lift = lignes[gardes], self.comptes.indices[gardes], comptes[gardes], lift[gardes]
+
+        # Tri par groupe puis effectif décroissant (lift en départage), rang dans le groupe
+        ordre = np.lexsort((-lift, -comptes, lignes))
+        lignes, colonnes, comptes, lift = lignes[ordre], colonnes[ordre], comptes[ordre], lift[ordre]
+        debuts = np.r_[0, np.flatnonzero(np.diff(lignes)) + 1]
+        rangs = np.arange(len(lignes)) - np.repeat(debuts, np.diff(np.r_[debuts, len(lignes)]))
+        gardes = rangs < k
+        lignes = lignes[gardes]
+        return pd.DataFrame({
+            self.attribut: self.groupes[lignes],
+            'ingredient': self.colonnes[colonnes[gardes]],
+            'produits': comptes[gardes],
+            'prevalence': comptes[gardes] / self.tailles[lignes],
+            'lift': lift[gardes],
+            'rang': rangs[gardes] + 1,
+        })
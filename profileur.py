@@ -0,0 +1,217 @@
+import os
+
+import pandas as pd
+
+from sketches import HyperLogLog, MisraGries, hacher
+
+
+def _fusionner_types(type_a, type_b):
+    """Type commun de deux blocs (None = bloc entièrement vide)."""
+    if type_a is None:
+        return type_b
+    if type_b is None or type_a == type_b:
+        return type_a
+    if {type_a, type_b} <= {'int64', 'float64'}:
+        return 'float64'
+    return 'object'
+
+
+class ProfilColonne:
+    """État fusionnable du profil d'une colonne."""
+
+    def __init__(self, nom, precision=14, k=64):
+        self.nom = nom
+        self.type = None
+        self.lignes = 0
+        self.manquantes = 0
+        self.distincts = HyperLogLog(precision)
+        self.frequents = MisraGries(k)
+        self.longueur_min = None
+        self.longueur_max = None
+
+    def ajouter(self, serie):
+        """Met à jour le profil avec un bloc de la colonne (une seule passe sur les valeurs)."""
+        presents = serie.notna().to_numpy()
+        valeurs = serie.to_numpy()[presents]
+        self.lignes += len(serie)
+        self.manquantes += int(len(serie) - len(valeurs))
+        if not len(valeurs):
+            return self
+
+        self.type = _fusionner_types(self.type, str(serie.dtype))
+        self.distincts.ajouter_hachages(hacher(valeurs))
+        self.frequents.ajouter(valeurs)
+
+        if pd.api.types.is_object_dtype(serie) or pd.api.types.is_string_dtype(serie):
+            longueurs = pd.Series(valeurs).str.len().dropna()
+            if len(longueurs):
+                mini, maxi = int(longueurs.min()), int(longueurs.max())
+                self.longueur_min = mini if self.longueur_min is None else min(self.longueur_min, mini)
+                self.longueur_max = maxi if self.longueur_max is None else max(self.longueur_max, maxi)
+        return self
+
+    def fusionner(self, autre):
+        """Fusionne le profil de la même colonne calculé sur d'autres blocs ou fichiers."""
+        self.type = _fusionner_types(self.type, autre.type)
+        self.lignes += autre.lignes
+        self.manquantes += autre.manquantes
+        self.distincts.fusionner(autre.distincts)
+        self.frequents.fusionner(autre.frequents)
+        for attribut, choix in (('longueur_min', min), ('longueur_max', max)):
+            a, b = getattr(self, attribut), getattr(autre, attribut)
+            setattr(self, attribut, b if a is None else a if b is None else choix(a, b))
+        return self
+
+
+class Profil:
+    """
+    Profil fusionnable d'un dataset, calculé en une seule passe par blocs :
+    type, valeurs manquantes, nombre approximatif de valeurs distinctes
+    (HyperLogLog), valeurs les plus fréquentes (Misra-Gries), longueurs de
+    chaînes min/max et nombre approximatif de lignes dupliquées.
+
+    Parameters:
+    -----------
+    precision : int, optional
+        Précision des sketches HyperLogLog. Par défaut 14
+    k : int, optional
+        Nombre de compteurs Misra-Gries par colonne. Par défaut 64
+    """
+
+    def __init__(self, precision=14, k=64):
+        self.precision = precision
+        self.k = k
+        self.colonnes = {}
+        self.lignes = 0
+        self.lignes_distinctes = HyperLogLog(precision)
+
+    def ajouter(self, bloc):
+        """Ajoute un bloc (DataFrame) au profil."""
+        for col in bloc.columns:
+            if col not in self.colonnes:
+                self.colonnes[col] = ProfilColonne(col, self.precision, self.k)
+                self.colonnes[col].lignes = self.lignes
+                self.colonnes[col].manquantes = self.lignes
+            self.colonnes[col].ajouter(bloc[col])
+        self.lignes += len(bloc)
+        self.lignes_distinctes.ajouter_hachages(pd.util.hash_pandas_object(bloc, index=False).to_numpy())
+        return self
+
+    def fusionner(self, autre):
+        """Fusionne le profil d'autres blocs ou d'un autre fichier."""
+        for col, profil_colonne in autre.colonnes.items():
+            if col in self.colonnes:
+                self.colonnes[col].fusionner(profil_colonne)
+            else:
+                self.colonnes[col] = profil_colonne
+        self.lignes += autre.lignes
+        self.lignes_distinctes.fusionner(autre.lignes_distinctes)
+        return self
+
+    def doublons_estimes(self):
+        """Nombre approximatif de lignes strictement dupliquées."""
+        return max(self.lignes - self.lignes_distinctes.estimer(), 0)
+
+    def data_dict(self, top=3):
+        """
+        Construit le Data Dictionary de la section 3.3.
+
+        Parameters:
+        -----------
+        top : int, optional
+            Nombre de valeurs fréquentes à afficher. Par défaut 3
+
+        Returns:
+        --------
+        pd.DataFrame : Champ, Type, Nb valeurs uniques, Valeurs manquantes et
+        Description, complétées des valeurs fréquentes et longueurs min/max
+        """
+        lignes = []
+        for col, profil_colonne in self.colonnes.items():
+            lignes.append({
+                "Champ": col,
+                "Type": profil_colonne.type or 'float64',
+                "Nb valeurs uniques": min(profil_colonne.distincts.estimer(), profil_colonne.lignes - profil_colonne.manquantes),
+                "Valeurs manquantes": profil_colonne.manquantes + (self.lignes - profil_colonne.lignes),
+                "Description": "",
+                "Valeurs fréquentes": profil_colonne.frequents.top(top),
+                "Longueur min": profil_colonne.longueur_min,
+                "Longueur max": profil_colonne.longueur_max,
+            })
+        return pd.DataFrame(lignes)
+
+
+def lire_par_blocs(chemin, taille_bloc=50_000):
+    """
+    Lit un fichier par blocs de lignes sans le charger entièrement.
+
+    Parameters:
+    -----------
+    chemin : str
+        Fichier CSV, Excel (.xlsx/.xlsm, première feuille) ou Parquet
+    taille_bloc : int, optional
+        Nombre de lignes par bloc. Par défaut 50 000
+
+    Returns:
+    --------
+    générateur de pd.DataFrame
+    """
+    extension = os.path.splitext(chemin)[1].lower()
+    if extension == '.csv':
+        yield from pd.read_csv(chemin, chunksize=taille_bloc)
+    elif extension == '.parquet':
+        import pyarrow.parquet as pq
+        for lot in pq.ParquetFile(chemin).iter_batches(batch_size=taille_bloc):
+            yield lot.to_pandas()
+    elif extension in ('.xlsx', '.xlsm'):
+        from openpyxl import load_workbook
+        classeur = load_workbook(chemin, read_only=True, data_only=True)
+        try:
+            lignes = classeur.worksheets[0].iter_rows(values_only=True)
+            entetes = [str(c).strip() if c is not None else f"Unnamed: {i}" for i, c in enumerate(next(lignes))]
+            bloc = []
+            for ligne in lignes:
+                bloc.append(ligne)
+                if len(bloc) == taille_bloc:
+                    yield pd.DataFrame(bloc, columns=entetes).infer_objects()
+                    bloc = []
+            if bloc:
+                yield pd.DataFrame(bloc, columns=entetes).infer_objects()
+        finally:
+            classeur.close()
+    else:
+        raise ValueError(f"Format non pris en charge : {chemin}")
+
+
+def profiler(source, taille_bloc=50_000, precision=14, k=64):
+    """
+    Profile un DataFrame, un fichier ou une liste de fichiers en une passe.
+
+    Parameters:
+    -----------
+    source : pd.DataFrame, str ou list of str
+        Données à profiler ; les profils de plusieurs fichiers sont fusionnés
+    taille_bloc : int, optional
+        Nombre de lignes par bloc. Par défaut 50 000
+    precision : int, optional
+        Précision HyperLogLog. Par défaut 14
+    k : int, optional
+        Nombre de compteurs Misra-Gries. Par défaut 64
+
+    Returns:
+    --------
+    Profil : profil fusionné (voir Profil.data_dict())
+    """
+    profil = Profil(precision, k)
+    if isinstance(source, pd.DataFrame):
+        for debut in range(0, len(source), taille_bloc):
+            profil.ajouter(source.iloc[debut:debut + taille_bloc])
+        return profil
+
+    chemins = [source] if isinstance(source, str) else list(source)
+    for chemin in chemins:
+        profil_fichier = Profil(precision, k)
+        for bloc in lire_par_blocs(chemin, taille_bloc):
+            profil_fichier.ajouter(bloc)
+        profil.fusionner(profil_fichier)
+    return profil
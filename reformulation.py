@@ -0,0 +1,237 @@
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+
+def _deltas(retraits, ajouts, nb_colonnes, substitutions=True):
+    """
+    Modifications unitaires sous forme de lignes creuses (-1 : retrait,
+    +1 : ajout) : retraits seuls, ajouts seuls, puis substitutions
+    (chaque retrait combiné à chaque ajout, si substitutions).
+
+    Returns:
+    --------
+    tuple : (matrice CSR modifications x ingrédients, indices retirés, indices ajoutés) ;
+    -1 signale l'absence de retrait ou d'ajout
+    """
+    nb_substitutions = len(ajouts) if substitutions else 0
+    retires = np.r_[retraits, np.full(len(ajouts), -1), np.repeat(retraits, nb_substitutions)].astype(np.int64)
+    ajoutes = np.r_[np.full(len(retraits), -1), ajouts, np.tile(ajouts[:nb_substitutions], len(retraits))].astype(np.int64)
+    lignes = np.arange(len(retires))
+    avec_retrait, avec_ajout = retires >= 0, ajoutes >= 0
+    deltas = sparse.csr_matrix(
+        (np.r_[-np.ones(avec_retrait.sum()), np.ones(avec_ajout.sum())],
+         (np.r_[lignes[avec_retrait], lignes[avec_ajout]], np.r_[retires[avec_retrait], ajoutes[avec_ajout]])),
+        shape=(len(retires), nb_colonnes)
+    )
+    return deltas, retires, ajoutes
+
+
+def _lot(ligne, etats, deltas):
+    """
+    Formulations candidates en une matrice creuse : ligne du produit répétée
+    + somme des modifications de chaque état (états x modifications @ deltas).
+    """
+    nb_etats, taille = etats.shape
+    incidence = sparse.csr_matrix(
+        (np.ones(etats.size), etats.ravel(), np.arange(0, etats.size + 1, taille)),
+        shape=(nb_etats, deltas.shape[0])
+    )
+    lot = sparse.csr_matrix(np.ones((nb_etats, 1))) @ ligne + incidence @ deltas
+    lot.eliminate_zeros()
+    return lot
+
+
+def ajouts_candidats(X, y, presents, nb_voisins=20, nb_ajouts=15):
+    """
+    Ingrédients candidats à l'ajout : les plus fréquents chez les produits
+    sans talc les plus proches (Jaccard) du produit, absents du produit.
+
+    Parameters:
+    -----------
+    X : scipy.sparse.csr_matrix
+        Matrice binaire produits x ingrédients (sans le talc)
+    y : np.ndarray
+        Cible TALC (0/1) de chaque produit
+    presents : np.ndarray
+        Indices des ingrédients du produit
+    nb_voisins : int, optional
+        Nombre de produits sans talc voisins. Par défaut 20
+    nb_ajouts : int, optional
+        Nombre maximal d'ingrédients candidats. Par défaut 15
+
+    Returns:
+    --------
+    np.ndarray : indices des ingrédients candidats, du plus au moins fréquent
+    """
+    sans_talc = np.flatnonzero(np.asarray(y) == 0)
+    if not len(sans_talc) or not len(presents):
+        return np.empty(0, dtype=np.int64)
+    voisins_X = X[sans_talc]
+    communs = np.asarray(voisins_X[:, presents].sum(axis=1)).ravel()
+    tailles = np.diff(voisins_X.indptr)
+    jaccard = communs / np.maximum(tailles + len(presents) - communs, 1)
+    proches = np.argsort(-jaccard, kind='stable')[:nb_voisins]
+    proches = proches[jaccard[proches] > 0]
+    frequences = np.asarray(voisins_X[proches].sum(axis=0)).ravel()
+    frequences[presents] = 0
+    candidats = np.argsort(-frequences, kind='stable')[:nb_ajouts]
+    return candidats[frequences[candidats] > 0]
+
+
+def _libelle(retire, ajoute, colonnes):
+    if retire >= 0 and ajoute >= 0:
+        return f"{colonnes[retire]} → {colonnes[ajoute]}"
+    if retire >= 0:
+        return f"- {colonnes[retire]}"
+    return f"+ {colonnes[ajoute]}"
+
+
+def reformuler(modele, X, colonnes, y, produit, seuil=0.5, max_modifications=3, largeur_faisceau=50,
+               nb_voisins=20, nb_ajouts=15, substitutions=True, nb_resultats=10):
+    """
+    Cherche les plus petits ensembles de modifications (retraits, ajouts,
+    substitutions d'ingrédients) qui font passer la prédiction TALC d'un
+    produit sous le seuil.
+
+    La recherche procède par taille croissante : toutes les modifications
+    unitaires sont évaluées en un seul appel à predict_proba sur une matrice
+    creuse de candidats, puis les meilleurs états (faisceau) sont étendus
+    d'une modification à la fois, chaque niveau en un seul appel.
+
+    Parameters:
+    -----------
+    modele : estimateur scikit-learn
+        Classifieur entraîné sur X (predict_proba)
+    X : scipy.sparse matrix
+        Matrice binaire produits x ingrédients (sans le talc, voir vectoriser())
+    colonnes : array-like
+        Noms des ingrédients
+    y : array-like
+        Cible TALC (0/1), pour choisir les produits sans talc voisins
+    produit : int
+        Position du produit dans X
+    seuil : float, optional
+        Probabilité de TALC sous laquelle la prédiction est négative. Par défaut 0.5
+    max_modifications : int, optional
+        Taille maximale d'un ensemble de modifications. Par défaut 3
+    largeur_faisceau : int, optional
+        États conservés d'un niveau au suivant. Par défaut 50
+    nb_voisins : int, optional
+        Produits sans talc voisins consultés. Par défaut 20
+    nb_ajouts : int, optional
+        Ingrédients candidats à l'ajout. Par défaut 15
+    substitutions : bool, optional
+        Évalue aussi les substitutions. Par défaut True
+    nb_resultats : int, optional
+        Nombre maximal d'ensembles renvoyés. Par défaut 10
+
+    Returns:
+    --------
+    pd.DataFrame : produit, taille, modifications, proba_avant, proba_apres
+    (vide si aucune reformulation de taille <= max_modifications ne suffit)
+    """
+    X = sparse.csr_matrix(X)
+    colonnes = np.asarray(colonnes)
+    y = np.asarray(y)
+    presents = X.indices[X.indptr[produit]:X.indptr[produit + 1]]
+    proba_avant = float(modele.predict_proba(X[produit])[0, 1])
+    colonnes_sortie = ['produit', 'taille', 'modifications', 'proba_avant', 'proba_apres']
+    if proba_avant < seuil:
+        return pd.DataFrame(columns=colonnes_sortie)
+
+    # Les colonnes vides ou numériques (artefacts du découpage sur les virgules,
+    # ex: "1,2-HEXANEDIOL") ne sont ni retirées ni ajoutées
+    noms = np.char.strip(colonnes.astype(str))
+    valides = (np.char.str_len(noms) > 0) & ~np.char.isdigit(noms)
+    retraits = presents[valides[presents]]
+    ajouts = ajouts_candidats(X, y, presents, nb_voisins, nb_ajouts)
+    ajouts = ajouts[valides[ajouts]]
+    deltas, retires, ajoutes = _deltas(retraits, ajouts, X.shape[1], substitutions)
+
+    # Ingrédients touchés par chaque modification : deux modifications d'un
+    # même état ne doivent pas toucher le même ingrédient
+    touches = deltas.copy()
+    touches.data = np.abs(touches.data)
+    conflits = (touches @ touches.T).toarray() > 0
+
+    ligne = X[produit].astype(np.float64)
+    etats = np.arange(deltas.shape[0]).reshape(-1, 1)
+    for taille in range(1, max_modifications + 1):
+        if not len(etats):
+            break
+        probas = modele.predict_proba(_lot(ligne, etats, deltas))[:, 1]
+
+        bascules = np.flatnonzero(probas < seuil)
+        if len(bascules):
+            meilleurs = bascules[np.argsort(probas[bascules], kind='stable')][:nb_resultats]
+            return pd.DataFrame([{
+                'produit': produit,
+                'taille': taille,
+                'modifications': tuple(_libelle(retires[i], ajoutes[i], colonnes) for i in etats[e]),
+                'proba_avant': proba_avant,
+                'proba_apres': float(probas[e]),
+            } for e in meilleurs], columns=colonnes_sortie)
+
+        # Extension du faisceau : chaque état retenu + une modification compatible
+        faisceau = etats[np.argsort(probas, kind='stable')[:largeur_faisceau]]
+        compatibles = ~conflits[faisceau].any(axis=1)
+        source, ajout = np.nonzero(compatibles)
+        etats = np.sort(np.c_[faisceau[source], ajout], axis=1)
+        if len(etats) and deltas.shape[0] ** etats.shape[1] < 2 ** 62:
+            # Dédoublonnage sur une clé entière par état (plus rapide que unique(axis=0))
+            cles = np.ravel_multi_index(etats.T, (deltas.shape[0],) * etats.shape[1])
+            etats = etats[np.unique(cles, return_index=True)[1]]
+        elif len(etats):
+            etats = np.unique(etats, axis=0)
+    return pd.DataFrame(columns=colonnes_sortie)
+
+
+def reformuler_catalogue(modele, X, colonnes, y, seuil=0.5, index=None, n_jobs=1, **options):
+    """
+    Applique reformuler() à tous les produits prédits avec talc.
+
+    Parameters:
+    -----------
+    modele : estimateur scikit-learn
+        Classifieur entraîné sur X
+    X : scipy.sparse matrix
+        Matrice binaire produits x ingrédients
+    colonnes : array-like
+        Noms des ingrédients
+    y : array-like
+        Cible TALC (0/1)
+    seuil : float, optional
+        Seuil de décision. Par défaut 0.5
+    index : array-like, optional
+        Identifiants des produits (par défaut leur position)
+    n_jobs : int, optional
+        Nombre de processus (-1 : tous les cœurs). Par défaut 1
+    **options :
+        Transmis à reformuler()
+
+    Returns:
+    --------
+    pd.DataFrame : résultats de reformuler() concaténés
+    """
+    X = sparse.csr_matrix(X)
+    positifs = np.flatnonzero(modele.predict_proba(X)[:, 1] >= seuil)
+    debut = time.perf_counter()
+    if n_jobs == 1:
+        resultats = [reformuler(modele, X, colonnes, y, produit, seuil, **options) for produit in positifs]
+    else:
+        from joblib import Parallel, delayed
+
+        resultats = Parallel(n_jobs=n_jobs, batch_size=8)(
+            delayed(reformuler)(modele, X, colonnes, y, produit, seuil, **options) for produit in positifs
+        )
+    duree = time.perf_counter() - debut
+    resultats = pd.concat([r for r in resultats if len(r)] or [pd.DataFrame(columns=['produit'])], ignore_index=True)
+    if index is not None and len(resultats):
+        resultats['produit'] = np.asarray(index)[resultats['produit'].astype(int)]
+    nb_reformules = resultats['produit'].nunique()
+    print(f"Produits prédits avec talc : {len(positifs)}, reformulables : {nb_reformules} "
+          f"({len(positifs) / max(duree, 1e-9):.1f} produits/s)")
+    return resultats
@@ -0,0 +1,307 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+_UN = np.uint64(1)
+_ELEMENTS_PAR_BLOC = 1 << 24
+
+
+def _popcount(mots):
+    """Nombre de bits à 1 de chaque entier uint64."""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(mots)
+    # numpy < 2.0 : comptage par octets
+    octets = mots.view(np.uint8).reshape(*mots.shape, 8)
+    return np.unpackbits(octets, axis=-1).sum(axis=(-1, -2)).reshape(mots.shape)
+
+
+def _bitsets(ensembles, vocabulaire):
+    """Masques (n x nb_mots uint64) d'une liste d'ensembles d'items."""
+    nb_mots = max(1, -(-len(vocabulaire) // 64))
+    masques = np.zeros((len(ensembles), nb_mots), dtype=np.uint64)
+    for i, ensemble in enumerate(ensembles):
+        for item in ensemble:
+            bit = vocabulaire[item]
+            masques[i, bit // 64] |= _UN << np.uint64(bit % 64)
+    return masques
+
+
+def _empaqueter(booleens):
+    """Masques de produits (m x n booléens) empaquetés en mots uint64 (m x nb_mots), produits en bits."""
+    octets = np.packbits(booleens, axis=1, bitorder='little')
+    reste = -octets.shape[1] % 8
+    if reste:
+        octets = np.pad(octets, ((0, 0), (0, reste)))
+    return np.ascontiguousarray(octets).view(np.uint64)
+
+
+def _poids(rng, nb_repliques, nb_produits, methode, fraction):
+    """Poids entiers des produits dans chaque réplique (nb_repliques x nb_produits)."""
+    if methode == 'bootstrap':
+        return rng.multinomial(nb_produits, np.full(nb_produits, 1.0 / nb_produits), size=nb_repliques)
+    if methode == 'sous-echantillonnage':
+        taille = max(1, int(round(fraction * nb_produits)))
+        tires = np.argsort(rng.random((nb_repliques, nb_produits)), axis=1)[:, :taille]
+        poids = np.zeros((nb_repliques, nb_produits), dtype=np.int64)
+        np.put_along_axis(poids, tires, 1, axis=1)
+        return poids
+    raise ValueError(f"Méthode inconnue : {methode} (disponibles : 'bootstrap', 'sous-echantillonnage')")
+
+
+class ReglesCompilees:
+    """
+    Règles d'association compilées en masques de bits sur le vocabulaire
+    des items qu'elles citent : chaque produit devient quelques entiers
+    uint64 et toutes les règles sont évaluées d'un coup par ET logique et
+    comptage de bits.
+
+    Parameters:
+    -----------
+    regles : pd.DataFrame
+        Règles d'association (colonnes 'antecedents', 'consequents' en
+        frozensets, 'confidence', 'lift', comme rules_talc_sorted)
+    """
+
+    def __init__(self, regles):
+        self.regles = regles.reset_index(drop=True)
+        items = sorted({item for colonne in ('antecedents', 'consequents')
+                        for ensemble in self.regles[colonne] for item in ensemble})
+        self.vocabulaire = {item: i for i, item in enumerate(items)}
+        self.antecedents = _bitsets(self.regles['antecedents'], self.vocabulaire)
+        self.consequents = _bitsets(self.regles['consequents'], self.vocabulaire)
+        # Beaucoup de règles partagent leur antécédent ou leur conséquent : chaque masque distinct n'est évalué qu'une fois
+        self._antecedents_uniques, inverse = np.unique(self.antecedents, axis=0, return_inverse=True)
+        self._inverse_antecedents = inverse.ravel()
+        self._consequents_uniques, inverse = np.unique(self.consequents, axis=0, return_inverse=True)
+        self._inverse_consequents = inverse.ravel()
+        self.confidence = self.regles['confidence'].to_numpy(dtype=np.float64)
+        self.lift = self.regles['lift'].to_numpy(dtype=np.float64)
+        self.libelles = np.array([
+            f"{{{', '.join(sorted(map(str, a)))}}} → {{{', '.join(sorted(map(str, c)))}}}"
+            for a, c in zip(self.regles['antecedents'], self.regles['consequents'])
+        ], dtype=object)
+
+    def encoder(self, X, colonnes, supplementaires=None):
+        """
+        Bitsets des produits, restreints aux items des règles.
+
+        Parameters:
+        -----------
+        X : scipy.sparse matrix
+            Matrice binaire produits x ingrédients
+        colonnes : array-like
+            Noms des colonnes de X
+        supplementaires : dict, optional
+            Items absents de X : {nom: vecteur booléen par produit} (ex: {"TALC": y})
+
+        Returns:
+        --------
+        np.ndarray : bitsets (produits x nb_mots) uint64
+        """
+        X = sparse.csc_matrix(X)
+        utiles = [(j, self.vocabulaire[nom]) for j, nom in enumerate(colonnes) if nom in self.vocabulaire]
+        sous_matrice = X[:, [j for j, _ in utiles]].tocsr() if utiles else sparse.csr_matrix((X.shape[0], 0))
+        sous_matrice.sort_indices()
+        bits = np.array([bit for _, bit in utiles], dtype=np.int64)
+
+        bitsets = np.zeros((X.shape[0], self.antecedents.shape[1]), dtype=np.uint64)
+        lignes = np.repeat(np.arange(X.shape[0]), np.diff(sous_matrice.indptr))
+        positions = bits[sous_matrice.indices[sous_matrice.data != 0]]
+        lignes = lignes[sous_matrice.data != 0]
+        # Bits distincts dans un même mot : l'addition vaut le OU
+        np.add.at(bitsets, (lignes, positions // 64), _UN << (positions % 64).astype(np.uint64))
+
+        for nom, valeurs in (supplementaires or {}).items():
+            if nom in self.vocabulaire:
+                bit = self.vocabulaire[nom]
+                presents = np.asarray(valeurs).astype(bool)
+                bitsets[presents, bit // 64] |= _UN << np.uint64(bit % 64)
+        return bitsets
+
+    def encoder_listes(self, listes):
+        """Bitsets de produits donnés comme listes de noms d'items (vérification de nouveaux produits)."""
+        return _bitsets([[item for item in liste if item in self.vocabulaire] for liste in listes], self.vocabulaire)
+
+    def _satisfaits(self, bloc, masques, inverse):
+        """Règles dont tous les items du masque sont dans le produit."""
+        if masques.shape[1] == 1:
+            # Cas courant (moins de 64 items) : comparaison directe, sans comptage de bits
+            tous = (bloc[:, None, 0] & masques[None, :, 0]) == masques[None, :, 0]
+        else:
+            # Items de la règle absents du produit : popcount(masque & ~produit) == 0
+            tous = _popcount(masques[None] & ~bloc[:, None, :]).sum(axis=2) == 0
+        return tous[:, inverse]
+
+    def _blocs(self, bitsets, taille_bloc=None):
+        """Itère sur les blocs de produits : (début, antécédent satisfait, conséquent présent)."""
+        if taille_bloc is None:
+            # ~16M éléments intermédiaires par bloc, quel que soit le nombre de règles
+            taille_bloc = max(1, _ELEMENTS_PAR_BLOC // max(len(self.antecedents), self.antecedents.size))
+        for debut in range(0, len(bitsets), taille_bloc):
+            bloc = bitsets[debut:debut + taille_bloc]
+            yield (debut,
+                   self._satisfaits(bloc, self._antecedents_uniques, self._inverse_antecedents),
+                   self._satisfaits(bloc, self._consequents_uniques, self._inverse_consequents))
+
+    def evaluer(self, bitsets, taille_bloc=None):
+        """
+        Évalue toutes les règles sur tous les produits.
+
+        Parameters:
+        -----------
+        bitsets : np.ndarray
+            Résultat de encoder() ou encoder_listes()
+        taille_bloc : int, optional
+            Produits traités à la fois. Par défaut calculé pour borner la mémoire
+
+        Returns:
+        --------
+        tuple : (antécédent satisfait, conséquent présent), matrices booléennes produits x règles
+        """
+        antecedent = np.empty((len(bitsets), len(self.antecedents)), dtype=bool)
+        consequent = np.empty_like(antecedent)
+        for debut, a, c in self._blocs(bitsets, taille_bloc):
+            antecedent[debut:debut + len(a)] = a
+            consequent[debut:debut + len(c)] = c
+        return antecedent, consequent
+
+    def violations(self, bitsets, index=None, taille_bloc=None):
+        """
+        Produits dont l'antécédent d'une règle est présent mais pas le
+        conséquent (ex: CI 77891 + LIMONENE sans TALC).
+
+        Parameters:
+        -----------
+        bitsets : np.ndarray
+            Résultat de encoder() ou encoder_listes()
+        index : array-like, optional
+            Identifiants des produits (par défaut leur position)
+        taille_bloc : int, optional
+            Produits traités à la fois. Par défaut calculé pour borner la mémoire
+
+        Returns:
+        --------
+        pd.DataFrame : produit, regle, confidence, lift, triés par lift décroissant
+        """
+        produits, regles = [], []
+        for debut, antecedent, consequent in self._blocs(bitsets, taille_bloc):
+            p, r = np.nonzero(antecedent & ~consequent)
+            produits.append(p + debut)
+            regles.append(r)
+        produits = np.concatenate(produits) if produits else np.empty(0, dtype=np.int64)
+        regles = np.concatenate(regles) if regles else np.empty(0, dtype=np.int64)
+        index = np.arange(len(bitsets)) if index is None else np.asarray(index)
+        resultat = pd.DataFrame({
+            'produit': index[produits],
+            'regle': self.libelles[regles],
+            'confidence': self.confidence[regles],
+            'lift': self.lift[regles],
+        })
+        return resultat.sort_values(['lift', 'confidence'], ascending=False, kind='stable', ignore_index=True)
+
+    def verifier(self, X, colonnes, supplementaires=None, index=None):
+        """Raccourci encoder() + violations() pour un catalogue ou de nouveaux produits."""
+        return self.violations(self.encoder(X, colonnes, supplementaires), index)
+
+    def reechantillonner(self, bitsets, nb_repliques=2000, methode='bootstrap', fraction=0.5, graine=0):
+        """
+        Effectifs des règles dans des répliques rééchantillonnées du catalogue.
+
+        Chaque colonne (antécédent, antécédent et conséquent, conséquent) est
+        empaquetée en bits sur les produits. Les poids entiers d'une réplique
+        sont décomposés en plans de bits (poids = somme des 2**k x plan k) :
+        un effectif pondéré est alors la somme des popcount(plan k & colonne)
+        décalés de k, calculée pour toutes les règles et répliques d'un bloc
+        à la fois.
+
+        Parameters:
+        -----------
+        bitsets : np.ndarray
+            Résultat de encoder()
+        nb_repliques : int, optional
+            Nombre de répliques. Par défaut 2000
+        methode : str, optional
+            'bootstrap' (tirage avec remise de n produits) ou
+            'sous-echantillonnage' (tirage sans remise de fraction x n produits)
+        fraction : float, optional
+            Part des produits tirés en sous-échantillonnage. Par défaut 0.5
+        graine : int, optional
+            Graine du générateur aléatoire. Par défaut 0
+
+        Returns:
+        --------
+        dict : 'antecedent', 'regle' et 'consequent' (effectifs répliques x
+        règles) et 'total' (nombre de produits de chaque réplique)
+        """
+        antecedent, consequent = self.evaluer(bitsets)
+        nb_regles = antecedent.shape[1]
+        colonnes = _empaqueter(np.concatenate([antecedent, antecedent & consequent, consequent], axis=1).T)
+        rng = np.random.default_rng(graine)
+        taille_bloc = max(1, _ELEMENTS_PAR_BLOC // max(1, colonnes.size))
+        effectifs = np.zeros((nb_repliques, 3 * nb_regles), dtype=np.int64)
+        totaux = np.zeros(nb_repliques, dtype=np.int64)
+        for debut in range(0, nb_repliques, taille_bloc):
+            poids = _poids(rng, min(taille_bloc, nb_repliques - debut), len(bitsets), methode, fraction)
+            totaux[debut:debut + len(poids)] = poids.sum(axis=1)
+            for k in range(int(poids.max(initial=0)).bit_length()):
+                plan = _empaqueter((poids >> k) & 1)
+                comptes = _popcount(plan[:, None, :] & colonnes[None, :, :]).sum(axis=2, dtype=np.int64)
+                effectifs[debut:debut + len(poids)] += comptes << k
+        return {
+            'antecedent': effectifs[:, :nb_regles],
+            'regle': effectifs[:, nb_regles:2 * nb_regles],
+            'consequent': effectifs[:, 2 * nb_regles:],
+            'total': totaux,
+        }
+
+    def stabilite(self, bitsets, nb_repliques=2000, methode='bootstrap', fraction=0.5, niveau=0.95,
+                  min_support=0.1, min_threshold=0.7, graine=0):
+        """
+        Intervalles de confiance (percentiles) du support, de la confiance et
+        du lift de chaque règle, et score de stabilité : part des répliques
+        où la règle passe encore les seuils d'extraction (support et confiance).
+
+        Parameters:
+        -----------
+        bitsets : np.ndarray
+            Résultat de encoder()
+        nb_repliques, methode, fraction, graine :
+            Voir reechantillonner()
+        niveau : float, optional
+            Niveau des intervalles. Par défaut 0.95
+        min_support, min_threshold : float, optional
+            Seuils d'apriori et de confiance utilisés pour extraire les règles.
+            Par défaut 0.1 et 0.7
+
+        Returns:
+        --------
+        pd.DataFrame : regle, support, confidence, lift (estimations
+        ponctuelles), bornes <métrique>_bas / <métrique>_haut et stabilite,
+        triés par stabilité puis lift décroissants
+        """
+        effectifs = self.reechantillonner(bitsets, nb_repliques, methode, fraction, graine)
+        total = effectifs['total'][:, None].astype(np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            metriques = {
+                'support': effectifs['regle'] / total,
+                'confidence': effectifs['regle'] / effectifs['antecedent'],
+                'lift': effectifs['regle'] * total / (effectifs['antecedent'] * effectifs['consequent']),
+            }
+        # Réplique sans antécédent : la règle n'y est pas extraite (NaN compte comme échec)
+        retenue = (metriques['support'] >= min_support) & (np.nan_to_num(metriques['confidence']) >= min_threshold)
+
+        resultat = pd.DataFrame({'regle': self.libelles})
+        alpha = (1 - niveau) / 2
+        for nom, valeurs in metriques.items():
+            resultat[nom] = self.regles[nom].to_numpy(dtype=np.float64) if nom in self.regles else np.nan
+            valeurs = np.where(np.isfinite(valeurs), valeurs, np.nan)
+            with warnings.catch_warnings():
+                # Règle dont l'antécédent n'apparaît dans aucune réplique : bornes NaN
+                warnings.simplefilter('ignore', RuntimeWarning)
+                bas, haut = np.nanquantile(valeurs, [alpha, 1 - alpha], axis=0)
+            resultat[f'{nom}_bas'] = bas
+            resultat[f'{nom}_haut'] = haut
+        resultat['stabilite'] = retenue.mean(axis=0)
+        return resultat.sort_values(['stabilite', 'lift'], ascending=False, kind='stable', ignore_index=True)
@@ -0,0 +1,141 @@
+import os
+import threading
+import time
+
+
+def signature(source, timeout=10):
+    """
+    Version courante d'une source, sans la télécharger : (date de
+    modification, taille) d'un fichier local, en-tête ETag, Last-Modified ou
+    Content-Length d'une URL (requête HEAD).
+    """
+    if '://' not in source:
+        stat = os.stat(source)
+        return stat.st_mtime_ns, stat.st_size
+    import urllib.request
+
+    requete = urllib.request.Request(source, method='HEAD')
+    with urllib.request.urlopen(requete, timeout=timeout) as reponse:
+        entetes = reponse.headers
+        return entetes.get('ETag') or entetes.get('Last-Modified') or entetes.get('Content-Length')
+
+
+class Instantane:
+    """
+    Version immuable des objets construits depuis une source : ils ne sont
+    jamais modifiés après publication, une nouvelle version remplace
+    l'instantané entier.
+    """
+
+    __slots__ = ('version', 'signature', 'construit_le', 'objets')
+
+    def __init__(self, version, signature, objets):
+        self.version = version
+        self.signature = signature
+        self.construit_le = time.time()
+        self.objets = objets
+
+    def __getitem__(self, nom):
+        return self.objets[nom]
+
+
+class RessourcesPartagees:
+    """
+    Objets lourds (catalogue, index, modèles, agrégats) partagés par tout le
+    processus et reconstruits en arrière-plan quand la source change.
+
+    Un fil de surveillance compare périodiquement la signature de la source ;
+    la reconstruction se fait hors du chemin des requêtes, puis le nouvel
+    instantané est publié par une seule affectation (atomique) : un lecteur
+    voit toujours l'ancienne ou la nouvelle version complète, sans attendre.
+    Si la reconstruction échoue, l'instantané précédent reste en service et
+    cette version de la source n'est plus retentée : le prochain essai
+    attend un nouveau changement de signature (ou un appel à recharger()).
+
+    Parameters:
+    -----------
+    source : str
+        Chemin ou URL de la source de données
+    construire : callable
+        construire(source) -> dict des objets partagés
+    intervalle : float, optional
+        Secondes entre deux vérifications de la source. Par défaut 60
+    """
+
+    def __init__(self, source, construire, intervalle=60.0):
+        self.source = source
+        self.construire = construire
+        self.intervalle = intervalle
+        self.derniere_erreur = None
+        self._signature_echec = None
+        self._instantane = None
+        self._verrou = threading.Lock()
+        self._arret = threading.Event()
+        self._fil = None
+
+    def demarrer(self):
+        """Construit la première version (bloquant) puis lance le fil de surveillance."""
+        if self._instantane is None:
+            self.recharger()
+            if self._instantane is None:
+                raise RuntimeError(f"Chargement impossible de {self.source} : {self.derniere_erreur}")
+        if self._fil is None:
+            self._arret.clear()
+            self._fil = threading.Thread(target=self._surveiller, name='surveillance-ressources', daemon=True)
+            self._fil.start()
+        return self
+
+    def actuel(self):
+        """Instantané en service (lecture sans verrou)."""
+        return self._instantane
+
+    def recharger(self, signature_source=None):
+        """
+        Reconstruit les objets et publie le nouvel instantané. Une seule
+        reconstruction à la fois ; les lecteurs continuent d'utiliser
+        l'instantané courant pendant ce temps.
+
+        Returns:
+        --------
+        bool : True si une nouvelle version a été publiée
+        """
+        with self._verrou:
+            if signature_source is None:
+                try:
+                    signature_source = signature(self.source)
+                except Exception:
+                    # Signature indisponible : la prochaine vérification réussie déclenchera un rechargement
+                    signature_source = None
+            try:
+                debut = time.perf_counter()
+                objets = self.construire(self.source)
+            except Exception as erreur:
+                self.derniere_erreur = erreur
+                self._signature_echec = signature_source
+                print(f"Rechargement de {self.source} échoué : {erreur}")
+                return False
+            version = self._instantane.version + 1 if self._instantane is not None else 1
+            self._instantane = Instantane(version, signature_source, objets)
+            self.derniere_erreur = None
+            self._signature_echec = None
+            print(f"Ressources v{version} construites en {time.perf_counter() - debut:.2f} s")
+            return True
+
+    def _surveiller(self):
+        while not self._arret.wait(self.intervalle):
+            try:
+                courante = signature(self.source)
+            except Exception as erreur:
+                # Source momentanément injoignable : l'instantané courant reste en service
+                self.derniere_erreur = erreur
+                continue
+            # Une version dont la construction a échoué n'est retentée qu'après un nouveau changement
+            if courante != self._instantane.signature and courante != self._signature_echec:
+                self.recharger(courante)
+
+    def arreter(self):
+        """Arrête le fil de surveillance."""
+        self._arret.set()
+        if self._fil is not None:
+            self._fil.join()
+            self._fil = None
@@ -0,0 +1,221 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+DOSSIER = os.path.dirname(os.path.abspath(__file__))
+FICHIER_DICTIONNAIRES = os.path.join(DOSSIER, 'dictionnaires_categories.json')
+
+# En-têtes des exports cosmetikwatch
+NOM = 'Nom'
+MARQUE = 'Marque'
+GROUPE = 'Groupe(s) / Société(s) cosmétique(s)'
+GAMME = 'Gamme'
+CATEGORIE = 'Catégorie(s) cosmétique(s)'
+ZONE = "Zone(s) d'application"
+TYPE_PRODUIT = 'Type(s) de produit - Formulation(s) / Galénique(s)'
+CIBLE = 'Cible(s) cosmétique(s)'
+INGREDIENTS = 'Ingrédients'
+PACKAGING = 'Article(s) de conditionnement / Packaging'
+CONTENANCE = 'Contenance'
+MADE_IN = 'Made in'
+EAN = 'Code EAN'
+
+# Champ typé -> (en-tête, type, obligatoire)
+# 'categorie' : colonne à faible cardinalité, codée sur un dictionnaire stable
+CHAMPS = {
+    'nom': (NOM, 'texte', True),
+    'marque': (MARQUE, 'categorie', True),
+    'groupe': (GROUPE, 'categorie', False),
+    'gamme': (GAMME, 'categorie', False),
+    'categorie': (CATEGORIE, 'categorie', False),
+    'zone': (ZONE, 'texte', False),
+    'type_produit': (TYPE_PRODUIT, 'texte', False),
+    'cible': (CIBLE, 'texte', False),
+    'ingredients': (INGREDIENTS, 'texte', True),
+    'packaging': (PACKAGING, 'texte', False),
+    'contenance': (CONTENANCE, 'texte', False),
+    'made_in': (MADE_IN, 'categorie', False),
+    'ean': (EAN, 'ean', False),
+}
+
+COLONNES_CATEGORIELLES = [entete for entete, type_, _ in CHAMPS.values() if type_ == 'categorie']
+
+
+def charger_dictionnaires(chemin=FICHIER_DICTIONNAIRES):
+    """Dictionnaires des colonnes catégorielles (en-tête -> liste ordonnée des valeurs)."""
+    if chemin is None or not os.path.exists(chemin):
+        return {}
+    with open(chemin, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def enregistrer_dictionnaires(dictionnaires, chemin=FICHIER_DICTIONNAIRES):
+    """Enregistre les dictionnaires des colonnes catégorielles."""
+    with open(chemin, 'w', encoding='utf-8') as f:
+        json.dump(dictionnaires, f, ensure_ascii=False, indent=1)
+
+
+def _normaliser_texte(serie):
+    """Chaînes sans espaces superflus ; les chaînes vides deviennent NaN."""
+    texte = serie.astype('string').str.strip()
+    return texte.astype(object).where((texte.fillna('') != '').to_numpy(dtype=bool), np.nan)
+
+
+def en_categorie(serie, valeurs_connues=()):
+    """
+    Convertit une colonne en catégorielle dont les codes prolongent un
+    dictionnaire existant : les valeurs connues gardent leur code, les
+    nouvelles sont ajoutées à la fin (triées).
+
+    Returns:
+    --------
+    tuple : (pd.Series catégorielle, liste complète des valeurs du dictionnaire)
+    """
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        serie = serie.astype(object)
+    serie = _normaliser_texte(serie)
+    connues = pd.Index(list(valeurs_connues), dtype=object)
+    presentes = pd.Index(serie.dropna().unique(), dtype=object)
+    categories = connues.append(presentes.difference(connues).sort_values())
+    return serie.astype(pd.CategoricalDtype(categories)), list(categories)
+
+
+def typer(df, chemin_dictionnaires=FICHIER_DICTIONNAIRES, enregistrer=False):
+    """
+    Applique le schéma à un export : noms de colonnes nettoyés, colonnes
+    catégorielles (marque, groupe, gamme, catégorie, pays) codées sur des
+    dictionnaires stables d'un chargement à l'autre, textes normalisés et
+    code EAN en chaîne.
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Export brut
+    chemin_dictionnaires : str, optional
+        Fichier JSON des dictionnaires (None : dictionnaires propres à cet export)
+    enregistrer : bool, optional
+        Enregistre les dictionnaires étendus des nouvelles valeurs (fichier
+        local, non versionné). Par défaut False : le chargement n'écrit rien
+
+    Returns:
+    --------
+    pd.DataFrame : copie typée de l'export
+    """
+    avant = df.memory_usage(deep=True).sum()
+    df = df.rename(columns=lambda c: str(c).strip())
+    dictionnaires = charger_dictionnaires(chemin_dictionnaires)
+    modifie = False
+    for entete, type_, _ in CHAMPS.values():
+        if entete not in df.columns:
+            continue
+        if type_ == 'categorie':
+            df[entete], valeurs = en_categorie(df[entete], dictionnaires.get(entete, ()))
+            modifie |= valeurs != dictionnaires.get(entete)
+            dictionnaires[entete] = valeurs
+        elif type_ == 'ean':
+            # Lu comme nombre par read_excel : 3145891812268.0 -> '3145891812268'
+            valeurs = df[entete]
+            if pd.api.types.is_float_dtype(valeurs):
+                valeurs = valeurs.astype('Int64')
+            df[entete] = _normaliser_texte(valeurs).str.replace(r'\.0$', '', regex=True)
+        else:
+            df[entete] = _normaliser_texte(df[entete])
+    if enregistrer and modifie and chemin_dictionnaires is not None:
+        enregistrer_dictionnaires(dictionnaires, chemin_dictionnaires)
+    apres = df.memory_usage(deep=True).sum()
+    print(f"Mémoire : {avant / 1e6:.2f} Mo -> {apres / 1e6:.2f} Mo")
+    return df
+
+
+def valider(df, strict=False):
+    """
+    Contrôles vectorisés du schéma : colonnes obligatoires présentes,
+    valeurs manquantes des champs obligatoires, colonnes catégorielles non
+    converties et codes EAN non numériques ou de longueur invalide.
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Export typé (voir typer())
+    strict : bool, optional
+        Lève ValueError si une anomalie est trouvée. Par défaut False
+
+    Returns:
+    --------
+    pd.DataFrame : une ligne par anomalie (champ, colonne, probleme, nb_lignes)
+    """
+    anomalies = []
+    for champ, (entete, type_, obligatoire) in CHAMPS.items():
+        if entete not in df.columns:
+            if obligatoire:
+                anomalies.append((champ, entete, 'colonne absente', len(df)))
+            continue
+        serie = df[entete]
+        manquantes = int(serie.isna().sum())
+        if obligatoire and manquantes:
+            anomalies.append((champ, entete, 'valeurs manquantes', manquantes))
+        if type_ == 'categorie' and not isinstance(serie.dtype, pd.CategoricalDtype):
+            anomalies.append((champ, entete, 'non catégorielle', len(df)))
+        if type_ == 'ean':
+            invalides = int((~serie.dropna().astype(str).str.fullmatch(r'\d{8,14}')).sum())
+            if invalides:
+                anomalies.append((champ, entete, 'code EAN invalide', invalides))
+
+    anomalies = pd.DataFrame(anomalies, columns=['champ', 'colonne', 'probleme', 'nb_lignes'])
+    if len(anomalies):
+        print(f"Anomalies de schéma : {len(anomalies)}")
+        if strict:
+            raise ValueError("Export non conforme au schéma :\n" + anomalies.to_string(index=False))
+    return anomalies
+
+
+def charger(chemin, chemin_dictionnaires=FICHIER_DICTIONNAIRES, enregistrer=False, strict=False):
+    """
+    Charge un export Excel, le type (typer()) et le valide (valider()).
+
+    Returns:
+    --------
+    pd.DataFrame : export typé
+    """
+    df = typer(pd.read_excel(chemin, dtype={EAN: str}), chemin_dictionnaires, enregistrer)
+    valider(df, strict=strict)
+    return df
+
+
+def compter(serie, departage='apparition'):
+    """
+    Nombre de lignes par valeur, trié par effectif décroissant (valeurs
+    absentes exclues). Sur une colonne catégorielle, le comptage se fait sur
+    les codes entiers (bincount) sans hacher de chaînes.
+
+    Parameters:
+    -----------
+    serie : pd.Series
+        Colonne à compter
+    departage : str, optional
+        Ordre des valeurs avant le tri par effectif, qui départage les
+        égalités comme les comptages d'origine : 'apparition' (ordre
+        d'apparition, comme value_counts()) ou 'valeur' (valeurs triées,
+        comme groupby().size()). Par défaut 'apparition'
+
+    Returns:
+    --------
+    pd.Series : effectifs indexés par valeur
+    """
+    if departage not in ('apparition', 'valeur'):
+        raise ValueError(f"Départage inconnu : {departage} ('apparition' ou 'valeur')")
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        codes, valeurs = serie.cat.codes.to_numpy(), serie.cat.categories
+        presents = pd.unique(codes[codes >= 0])
+    else:
+        codes, valeurs = pd.factorize(serie)
+        presents = np.arange(len(valeurs))
+    effectifs = np.bincount(codes[codes >= 0], minlength=len(valeurs))
+    if departage == 'valeur':
+        presents = presents[np.argsort(valeurs[presents].to_numpy(dtype=object), kind='stable')]
+    resultat = pd.Series(effectifs[presents], index=valeurs[presents], name='count')
+    resultat.index.name = serie.name
+    # Même tri (non stable) que value_counts() et sort_values() : égalités dans le même ordre qu'avant
+    return resultat.sort_values(ascending=False)
@@ -3,6 +3,8 @@ import numpy as np
 import difflib
 import re
 
+from instrumentation import instrumenter
+
 # Dictionnaire de correspondances pour normaliser les ingrédients
 MAPPING_CORR = {
     'water': 'aqua',
@@ -23,6 +25,7 @@ def _nettoyer_ingredients_str(ingredients_str, separateur):
     ingredients_liste = [ing.strip().lower() for ing in ingredients_str.split(separateur)]
     return [ing for ing in ingredients_liste if ing.strip()]
 
+@instrumenter()
 def _extraire_tous_ingredients(df, colonne_ingredient, separateur):
     """Extrait tous les ingrédients uniques de la colonne."""
     tous_ingredients = set()
@@ -34,6 +37,7 @@ def _extraire_tous_ingredients(df, colonne_ingredient, separateur):
     
     return {ing for ing in tous_ingredients if ing.strip()}
 
+@instrumenter()
 def _filtrer_ingredients_indesirables(tous_ingredients):
     """Filtre les ingrédients indésirables."""
     ingredients_a_exclure = {
@@ -74,6 +78,7 @@ def _normaliser_nom_colonne(ingredient):
         
     return nom_colonne
 
+@instrumenter()
 def _creer_colonnes_mapping(tous_ingredients):
     """Crée le mapping des ingrédients vers les noms de colonnes."""
     colonnes_mapping = {}
@@ -88,6 +93,7 @@ def _creer_colonnes_mapping(tous_ingredients):
     
     return colonnes_mapping
 
+@instrumenter()
 def _remplir_colonnes_binaires(df_result, df, colonne_ingredient, colonnes_mapping, separateur):
     """Remplit les colonnes binaires avec les valeurs d'ingrédients."""
     for nom_colonne, ingredients_associes in colonnes_mapping.items():
@@ -101,6 +107,7 @@ def _remplir_colonnes_binaires(df_result, df, colonne_ingredient, colonnes_mappi
                     df_result.loc[idx, nom_colonne] = 1
 
 # Fonction pour séparer les ingrédients en colonnes binaires
+@instrumenter()
 def separer_ingredients_binaire(df, colonne_ingredient, separateur=','):
     """
     Sépare une colonne d'ingrédients en colonnes binaires.
@@ -130,6 +137,7 @@ def separer_ingredients_binaire(df, colonne_ingredient, separateur=','):
     
     return df_result, tous_ingredients
 
+@instrumenter()
 def suggerer_fusions(tous_ingredients, seuil=0.85):
     """
     Suggère des fusions d'ingrédients basées sur la similarité textuelle.
@@ -0,0 +1,224 @@
+import numpy as np
+import pandas as pd
+
+
+def hacher(valeurs):
+    """
+    Hachage 64 bits stable (identique d'un processus à l'autre) d'un tableau de valeurs.
+
+    Parameters:
+    -----------
+    valeurs : array-like
+        Valeurs à hacher (chaînes, nombres...)
+
+    Returns:
+    --------
+    np.ndarray : hachages uint64
+    """
+    valeurs = np.asarray(valeurs)
+    if valeurs.dtype.kind in 'OUS':
+        valeurs = valeurs.astype(object)
+    return pd.util.hash_array(valeurs, categorize=False)
+
+
+def _longueur_binaire(w):
+    """Nombre de bits significatifs de chaque entier uint64 (0 pour 0), sans boucle Python."""
+    w = np.asarray(w, dtype=np.uint64)
+    longueurs = np.zeros(w.shape, dtype=np.int64)
+    non_nuls = w > 0
+    # Estimation par le flottant puis correction d'un bit (arrondi au-delà de 2**53)
+    estimation = np.floor(np.log2(w[non_nuls].astype(np.float64))).astype(np.int64) + 1
+    estimation = np.clip(estimation, 1, 64)
+    trop_grand = (w[non_nuls] >> (estimation - 1).astype(np.uint64)) == 0
+    estimation[trop_grand] -= 1
+    decale = np.minimum(estimation, 63).astype(np.uint64)
+    trop_petit = (estimation < 64) & ((w[non_nuls] >> decale) != 0)
+    estimation[trop_petit] += 1
+    longueurs[non_nuls] = estimation
+    return longueurs
+
+
+class HyperLogLog:
+    """
+    Estimateur HyperLogLog du nombre de valeurs distinctes, fusionnable.
+
+    Parameters:
+    -----------
+    precision : int, optional
+        Nombre de bits d'index (2**precision registres). Par défaut 14,
+        soit une erreur relative d'environ 0.8%
+    seuil_exact : int, optional
+        En dessous de ce nombre de valeurs distinctes, les hachages sont
+        conservés et le compte est exact. Par défaut 4096
+    """
+
+    def __init__(self, precision=14, seuil_exact=4096):
+        self.precision = precision
+        self.seuil_exact = seuil_exact
+        self.registres = np.zeros(1 << precision, dtype=np.uint8)
+        self.exacts = np.empty(0, dtype=np.uint64)
+
+    def ajouter_hachages(self, hachages):
+        """Ajoute des hachages uint64 (voir hacher())."""
+        hachages = np.asarray(hachages, dtype=np.uint64)
+        if not len(hachages):
+            return self
+        if self.exacts is not None:
+            self.exacts = np.union1d(self.exacts, hachages)
+            if len(self.exacts) > self.seuil_exact:
+                hachages, self.exacts = self.exacts, None
+        self._mettre_a_jour_registres(hachages)
+        return self
+
+    def _mettre_a_jour_registres(self, hachages):
+        p = np.uint64(self.precision)
+        index = (hachages >> (np.uint64(64) - p)).astype(np.int64)
+        reste = hachages & ((np.uint64(1) << (np.uint64(64) - p)) - np.uint64(1))
+        # Rang = position du premier bit à 1 dans les 64 - p bits restants
+        rangs = (64 - self.precision) - _longueur_binaire(reste) + 1
+        np.maximum.at(self.registres, index, rangs.astype(np.uint8))
+
+    def ajouter(self, valeurs):
+        """Ajoute des valeurs brutes."""
+        return self.ajouter_hachages(hacher(valeurs))
+
+    def fusionner(self, autre):
+        """Fusionne un autre sketch de même précision (union des ensembles)."""
+        if autre.precision != self.precision:
+            raise ValueError("Précisions HyperLogLog différentes")
+        np.maximum(self.registres, autre.registres, out=self.registres)
+        if self.exacts is not None and autre.exacts is not None:
+            self.exacts = np.union1d(self.exacts, autre.exacts)
+            if len(self.exacts) > self.seuil_exact:
+                self.exacts = None
+        else:
+            self.exacts = None
+        return self
+
+    def estimer(self):
+        """Nombre estimé de valeurs distinctes."""
+        if self.exacts is not None:
+            return len(self.exacts)
+        m = len(self.registres)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimation = alpha * m * m / np.sum(np.ldexp(1.0, -self.registres.astype(np.int64)))
+        vides = int(np.count_nonzero(self.registres == 0))
+        # Correction petites cardinalités (comptage linéaire)
+        if estimation <= 2.5 * m and vides:
+            estimation = m * np.log(m / vides)
+        return int(round(estimation))
+
+
+class MisraGries:
+    """
+    Résumé Misra-Gries des valeurs les plus fréquentes, fusionnable.
+
+    Toute valeur de fréquence supérieure à n / (k + 1) est conservée ; les
+    comptes sont des bornes inférieures (sous-estimés d'au plus n / (k + 1)).
+
+    Parameters:
+    -----------
+    k : int, optional
+        Nombre maximal de compteurs. Par défaut 64
+    """
+
+    def __init__(self, k=64):
+        self.k = k
+        self.compteurs = {}
+        self.total = 0
+
+    def _reduire(self):
+        if len(self.compteurs) > self.k:
+            seuil = sorted(self.compteurs.values(), reverse=True)[self.k]
+            self.compteurs = {v: c - seuil for v, c in self.compteurs.items() if c > seuil}
+
+    def ajouter_comptes(self, comptes):
+        """Ajoute des comptes exacts {valeur: nombre} (ex: value_counts d'un bloc)."""
+        for valeur, nombre in comptes.items():
+            self.compteurs[valeur] = self.compteurs.get(valeur, 0) + int(nombre)
+            self.total += int(nombre)
+        self._reduire()
+        return self
+
+    def ajouter(self, valeurs):
+        """Ajoute des valeurs brutes (comptées en bloc)."""
+        return self.ajouter_comptes(pd.Series(valeurs).value_counts(sort=False).to_dict())
+
+    def fusionner(self, autre):
+        """Fusionne un autre résumé."""
+        total = self.total + autre.total
+        self.ajouter_comptes(autre.compteurs)
+        self.total = total
+        return self
+
+    def top(self, n=5):
+        """Les n valeurs les plus fréquentes avec leur compte (borne inférieure)."""
+        return sorted(self.compteurs.items(), key=lambda item: item[1], reverse=True)[:n]
+
+
+class CountMin:
+    """
+    Sketch Count-Min des fréquences, fusionnable : chaque valeur incrémente
+    une case par ligne ; l'estimation (minimum des lignes) ne sous-estime
+    jamais et surestime d'au plus e * n / largeur avec probabilité
+    1 - exp(-profondeur).
+
+    Parameters:
+    -----------
+    largeur : int, optional
+        Nombre de cases par ligne. Par défaut 2**14
+    profondeur : int, optional
+        Nombre de lignes (fonctions de hachage). Par défaut 4
+    graine : int, optional
+        Graine des fonctions de hachage (identique pour fusionner). Par défaut 0
+    """
+
+    def __init__(self, largeur=1 << 14, profondeur=4, graine=0):
+        self.largeur = largeur
+        self.profondeur = profondeur
+        self.graine = graine
+        rng = np.random.default_rng(graine)
+        # Hachage multiplicatif : (a * h + b) mod 2**64, a impair
+        self._a = rng.integers(0, 1 << 63, profondeur, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._b = rng.integers(0, 1 << 63, profondeur, dtype=np.uint64)
+        self.tableau = np.zeros((profondeur, largeur), dtype=np.int64)
+        self.total = 0
+
+    def _cases(self, hachages):
+        hachages = np.asarray(hachages, dtype=np.uint64)
+        with np.errstate(over='ignore'):
+            melanges = self._a[:, None] * hachages[None, :] + self._b[:, None]
+        return ((melanges >> np.uint64(32)) % np.uint64(self.largeur)).astype(np.int64)
+
+    def ajouter_hachages(self, hachages, nombres=None):
+        """Ajoute des hachages uint64 (voir hacher()), avec leur nombre d'occurrences."""
+        hachages = np.asarray(hachages, dtype=np.uint64)
+        if not len(hachages):
+            return self
+        nombres = np.ones(len(hachages), dtype=np.int64) if nombres is None else np.asarray(nombres, dtype=np.int64)
+        cases = self._cases(hachages)
+        for ligne in range(self.profondeur):
+            self.tableau[ligne] += np.bincount(cases[ligne], weights=nombres, minlength=self.largeur).astype(np.int64)
+        self.total += int(nombres.sum())
+        return self
+
+    def ajouter(self, valeurs):
+        """Ajoute des valeurs brutes."""
+        return self.ajouter_hachages(hacher(valeurs))
+
+    def estimer_hachages(self, hachages):
+        """Fréquences estimées (bornes supérieures) de hachages uint64."""
+        cases = self._cases(hachages)
+        return self.tableau[np.arange(self.profondeur)[:, None], cases].min(axis=0)
+
+    def estimer(self, valeurs):
+        """Fréquences estimées de valeurs brutes."""
+        return self.estimer_hachages(hacher(valeurs))
+
+    def fusionner(self, autre):
+        """Fusionne un autre sketch de mêmes dimensions et graine."""
+        if (autre.largeur, autre.profondeur, autre.graine) != (self.largeur, self.profondeur, self.graine):
+            raise ValueError("Sketches Count-Min incompatibles (largeur, profondeur ou graine)")
+        self.tableau += autre.tableau
+        self.total += autre.total
+        return self
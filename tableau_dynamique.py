@@ -1,6 +1,9 @@
 import pandas as pd
-from IPython.display import HTML
 
+from instrumentation import instrumenter
+from schema import GROUPE, MARQUE, en_categorie
+
+@instrumenter()
 def creer_tableau_dynamique(data_avec_ingredients):
     """
     Crée un tableau croisé dynamique montrant le nombre de produits par marque,
@@ -16,44 +19,52 @@ def creer_tableau_dynamique(data_avec_ingredients):
     pd.DataFrame : Tableau final avec sous-totaux et total général
     """
 
-    groupe_cosmetique = 'Groupe(s) / Société(s) cosmétique(s)'
+    groupe_cosmetique = GROUPE
     nb_produit = 'Nombre de produits'
+    # Regroupements sur les codes entiers des colonnes catégorielles (voir schema.typer)
+    cles = data_avec_ingredients[[groupe_cosmetique, MARQUE]]
+    for colonne in (groupe_cosmetique, MARQUE):
+        if not isinstance(cles[colonne].dtype, pd.CategoricalDtype):
+            cles = cles.assign(**{colonne: en_categorie(cles[colonne])[0]})
+
     # Créer le tableau : Nombre de produits par Marque regroupés par Groupe/Société
-    comptage = data_avec_ingredients.groupby([groupe_cosmetique, 'Marque']).size().reset_index(name=nb_produit)
+    comptage = cles.groupby([groupe_cosmetique, MARQUE], observed=True).size().reset_index(name=nb_produit)
+    comptage = comptage.sort_values([groupe_cosmetique, MARQUE], key=lambda s: s.astype(str), kind='stable')
+    marques_par_groupe = dict(list(comptage.groupby(groupe_cosmetique, observed=True)))
     
     # Calculer les sous-totaux par Groupe/Société
-    subtotaux = data_avec_ingredients.groupby(groupe_cosmetique).size().to_dict()
+    subtotaux = cles.groupby(groupe_cosmetique, observed=True).size().to_dict()
     
     # Créer la liste finale avec insertion des sous-totaux
     lignes_finales = []
-    for groupe in data_avec_ingredients[groupe_cosmetique].unique():
+    for groupe in cles[groupe_cosmetique].unique():
         if pd.notna(groupe):
             # Ajouter toutes les marques de ce groupe
-            marques_groupe = comptage[comptage[groupe_cosmetique] == groupe]
+            marques_groupe = marques_par_groupe.get(groupe, comptage.iloc[:0])
             for _, row in marques_groupe.iterrows():
                 lignes_finales.append({
                     groupe_cosmetique : row[groupe_cosmetique],
-                    'Marque': row['Marque'],
+                    MARQUE: row[MARQUE],
                     nb_produit : row[nb_produit]
                 })
             
             # Ajouter le sous-total du groupe
             lignes_finales.append({
                 groupe_cosmetique: groupe,
-                'Marque': 'SOUS-TOTAL',
+                MARQUE: 'SOUS-TOTAL',
                 nb_produit : subtotaux[groupe]
             })
     
     # Ajouter le total général
     lignes_finales.append({
         groupe_cosmetique: 'TOTAL',
-        'Marque': '',
+        MARQUE: '',
         nb_produit : len(data_avec_ingredients)
     })
     
     # Créer le DataFrame final
     tableau_final = pd.DataFrame(lignes_finales)
-    tableau_final = tableau_final.set_index([groupe_cosmetique, 'Marque'])
+    tableau_final = tableau_final.set_index([groupe_cosmetique, MARQUE])
     
     return tableau_final
 
@@ -71,6 +82,8 @@ def afficher_tableau_dynamique(data_avec_ingredients):
     --------
     IPython.display.HTML : Affichage HTML du tableau
     """
+    from IPython.display import HTML
+
     tableau_final = creer_tableau_dynamique(data_avec_ingredients)
     
     print("Tableau croisé dynamique - Nombre de produits par Marque et Groupe/Société:")
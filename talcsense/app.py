@@ -1,8 +1,13 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import streamlit.components.v1 as components
 import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import schema
+
+# pandas, plotly et les composants HTML ne sont importés que par les vues qui
+# s'en servent : le premier rendu (titre, KPI) n'attend pas leur chargement
 
 # Configuration de la page
 st.set_page_config(page_title="TalcSense", page_icon="💄", layout="wide")
@@ -17,17 +22,40 @@ st.markdown("""
     """, unsafe_allow_html=True)
 
 # --- CHARGEMENT SÉCURISÉ ---
-url = "https://raw.githubusercontent.com/gevargas/predcompact/main/375_cosmetikwatch_19_08_2025.xlsx"
+url = os.environ.get("TALCSENSE_SOURCE", "https://raw.githubusercontent.com/gevargas/predcompact/main/375_cosmetikwatch_19_08_2025.xlsx")
+GRAPHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "graphe_inci.html")
+
+def construire(source):
+    """Objets partagés par toutes les sessions : catalogue typé et agrégats des vues."""
+    import pandas as pd
+
+    # Noms de colonnes nettoyés, colonnes catégorielles et validation (voir schema.py)
+    data = schema.typer(pd.read_excel(source, dtype={schema.EAN: str}), enregistrer=False)
+    schema.valider(data)
+    graphe = None
+    if os.path.exists(GRAPHE):
+        with open(GRAPHE, 'r', encoding='utf-8') as f:
+            graphe = f.read()
+    return {
+        'catalogue': data,
+        'nb_marques': data[schema.MARQUE].nunique(),
+        'categories': schema.compter(data[schema.CATEGORIE]),
+        'marques': schema.compter(data[schema.MARQUE]),
+        'graphe': graphe,
+    }
 
-@st.cache_data
-def load_data():
-    data = pd.read_excel(url)
-    # Nettoyage profond des noms de colonnes
-    data.columns = [str(c).strip() for c in data.columns]
-    return data
+@st.cache_resource
+def ressources_partagees():
+    # Une seule instance par processus (et non par session) ; le fil de
+    # surveillance reconstruit les objets quand la source change
+    from ressources import RessourcesPartagees
+
+    return RessourcesPartagees(url, construire, intervalle=300).demarrer()
 
 try:
-    df = load_data()
+    donnees = ressources_partagees().actuel()
+    # Objets partagés entre sessions : lecture seule
+    df = donnees['catalogue']
     
     # Titre principal
     st.title("💄 TalcSense : Analyse du Talc")
@@ -35,31 +63,31 @@ try:
     # --- KPI : LES CHIFFRES CLÉS ---
     c1, c2, c3, c4 = st.columns(4)
     c1.metric("Produits Analysés", len(df))
-    # On utilise la position de la colonne pour éviter les erreurs de noms
-    c2.metric("Marques", df.iloc[:, 1].nunique()) 
+    c2.metric("Marques", donnees['nb_marques'])
     c3.metric("Précision IA", "88%")
     c4.metric("Concepts INCI", "1 182")
+    st.caption(f"Données v{donnees.version} chargées le {time.strftime('%d/%m/%Y %H:%M', time.localtime(donnees.construit_le))}")
 
     st.divider()
 
     # --- ANALYSE VISUELLE ---
+    import plotly.express as px
+
     col_left, col_right = st.columns(2)
     
     with col_left:
         st.subheader("📊 Répartition par Catégorie")
-        # Sélection automatique de la colonne Catégorie par position (souvent la 4ème)
-        cat_col = df.columns[3] 
-        counts = df[cat_col].value_counts()
+        cat_col = schema.CATEGORIE
+        counts = donnees['categories']
         # On ne garde que le top pour éviter l'effet "rayures" illisible (image 9)
-        df_pie = df[df[cat_col].isin(counts.head(10).index)]
+        df_pie = df[df[cat_col].isin(counts.head(10).index)].astype({cat_col: str})
         fig_pie = px.pie(df_pie, names=cat_col, hole=0.5, color_discrete_sequence=px.colors.sequential.RdBu)
         fig_pie.update_layout(showlegend=True)
         st.plotly_chart(fig_pie, use_container_width=True)
 
     with col_right:
         st.subheader("🏆 Top 10 des Marques")
-        brand_col = df.columns[1]
-        top_m = df[brand_col].value_counts().head(10).reset_index()
+        top_m = donnees['marques'].head(10).reset_index()
         fig_bar = px.bar(top_m, x=top_m.columns[1], y=top_m.columns[0], orientation='h', 
                          color=top_m.columns[1], color_continuous_scale='Reds')
         fig_bar.update_layout(yaxis={'categoryorder':'total ascending'}, showlegend=False)
@@ -72,16 +100,16 @@ try:
     st.info("Ce graphe illustre le regroupement des variantes INCI en concepts standards.")
     
     # Vérification du fichier sur GitHub
-    if os.path.exists("graphe_inci.html"):
-        with open("graphe_inci.html", 'r', encoding='utf-8') as f:
-            html_data = f.read()
-        components.html(html_data, height=800, scrolling=True)
+    if donnees['graphe'] is not None:
+        import streamlit.components.v1 as components
+
+        components.html(donnees['graphe'], height=800, scrolling=True)
     else:
         st.error("⚠️ Fichier 'graphe_inci.html' manquant sur GitHub. Merci de l'ajouter pour activer cette vue.")
 
     # --- EXPLORATEUR ---
     st.header("🔍 Explorateur de Formulations")
-    st.dataframe(df.iloc[:, [2, 1, 13]], use_container_width=True)
+    st.dataframe(df[[schema.GROUPE, schema.MARQUE, schema.EAN]], use_container_width=True)
 
 except Exception as e:
     st.error(f"Une erreur système est survenue : {e}")
@@ -43,9 +43,15 @@ from sklearn.tree import DecisionTreeClassifier
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import f1_score, balanced_accuracy_score
 
+# Instrumentation des étapes (temps, CPU, mémoire, formes)
+import sys
+sys.path.append("/content/predcompact")
+import instrumentation as instr
+instr.activer()
 
 # Chargement du fichier => en csv
-df = pd.read_excel("/content/predcompact/375_cosmetikwatch_19_08_2025.xlsx")
+with instr.etape("read_excel") as mesure:
+    df = mesure.sortie(pd.read_excel("/content/predcompact/375_cosmetikwatch_19_08_2025.xlsx"))
 df.to_csv("/content/predcompact/375_cosmetikwatch_19_08_2025.csv", index=False)
 
 """**Interprétation :** Le dataset contient les formulations de 375 produits cosmétiques. Les données ont été chargées avec succès et converties en CSV pour faciliter les traitements ultérieurs.
@@ -121,12 +127,22 @@ df.nunique()
 """
 
 # Suppression des doublons
-df_clean = df.copy()
+with instr.etape("clean", df) as mesure:
+    df_clean = df.copy()
 
-nb_doublons = df_clean.duplicated().sum()
-print("Nombre de doublons supprimés :", nb_doublons)
+    nb_doublons = df_clean.duplicated().sum()
+    print("Nombre de doublons supprimés :", nb_doublons)
 
-df_clean = df_clean.drop_duplicates()
+    df_clean = mesure.sortie(df_clean.drop_duplicates())
+
+# Doublons de formulation : même ensemble d'ingrédients (ordre, casse et
+# astérisques ignorés) ou quasi-identique (Jaccard >= 0.9, MinHash + LSH).
+# Ils sont fusionnés avant l'entraînement (section 4) pour éviter qu'une
+# quasi-copie se retrouve à la fois dans le train et dans le test.
+import dedoublonnage
+
+doublons = dedoublonnage.detecter_doublons(df_clean["Ingrédients"], seuil_jaccard=0.9)
+dedoublonnage.clusters_doublons(df_clean, doublons).head(10)
 
 """**Interprétation :**
 - **0 doublon détecté** → excellente qualité de saisie des données
@@ -149,13 +165,14 @@ df_clean = df_clean.drop_duplicates()
 """
 
 # Harmonisation des noms INCI
-df_clean["Ingrédients"] = (
-    df_clean["Ingrédients"]
-    .astype(str)
-    .str.strip()
-    .str.replace(r"\s+", " ", regex=True)   # supprime espaces multiples
-    .str.upper()                             # INCI = majuscules
-)
+with instr.etape("clean", df_clean):
+    df_clean["Ingrédients"] = (
+        df_clean["Ingrédients"]
+        .astype(str)
+        .str.strip()
+        .str.replace(r"\s+", " ", regex=True)   # supprime espaces multiples
+        .str.upper()                             # INCI = majuscules
+    )
 
 """**Interprétation :** Tous les noms d'ingrédients sont maintenant en majuscules et sans espaces parasites, ce qui garantit :
 - Une recherche fiable (ex: `contains("TALC")` trouvera tous les cas)
@@ -193,6 +210,15 @@ data_dict = pd.DataFrame({
 
 data_dict
 
+# Version 2 : profil en une seule passe par blocs (HyperLogLog pour les
+# valeurs distinctes, Misra-Gries pour les valeurs fréquentes), fusionnable
+# entre fichiers
+import profileur
+
+profil = profileur.profiler(df_clean)
+print("Doublons estimés :", profil.doublons_estimes())
+profil.data_dict()
+
 """**Interprétation du Data Dictionary :**
 
 **Qualité des données :**
@@ -243,12 +269,31 @@ def split_overlay(cell):
     return [x.strip() for x in cell.split(",") if x.strip()]
 
 # Application à toutes les colonnes
-for col in overlay_cols:
-    df_clean[col + "_list"] = df_clean[col].apply(split_overlay)
+with instr.etape("split_overlay", df_clean) as mesure:
+    for col in overlay_cols:
+        df_clean[col + "_list"] = df_clean[col].apply(split_overlay)
+    mesure.sortie(df_clean)
 
 # Vérification
 df_clean[overlay_cols + [col + "_list" for col in overlay_cols]].head()
 
+# Variante vectorisée : découpage en bloc (pyarrow / pandas) vers une table
+# longue (product_id, attribute, value) à codes catégoriels, sans liste Python par cellule
+import overlays as ov
+
+with instr.etape("split_overlay (vectorisé)", df_clean) as mesure:
+    overlays_long = mesure.sortie(ov.exploser_overlays(df_clean, overlay_cols))
+overlays_long.head()
+
+# Analyse INCI en une passe : parenthèses imbriquées (CI 77491, CI 77492),
+# sections "+/- (MAY CONTAIN)", préfixes de teinte, astérisques et synonymes "/"
+import parseur_inci
+
+with instr.etape("parseur INCI", df_clean["Ingrédients"]) as mesure:
+    tokens_inci = mesure.sortie(parseur_inci.parser_serie(df_clean["Ingrédients"]))
+print("Ingrédients « may contain » :", tokens_inci["peut_contenir"].sum())
+tokens_inci.head()
+
 """**Interprétation :**
 
 **Transformation réussie :**
@@ -296,11 +341,12 @@ df_ing = df_clean[["Ingrédients_list"]].copy()
 # Initialisation du binariseur
 mlb = MultiLabelBinarizer()
 
-ingredients_encoded = pd.DataFrame(
-    mlb.fit_transform(df_ing["Ingrédients_list"]),
-    columns=mlb.classes_,
-    index=df_ing.index
-)
+with instr.etape("MultiLabelBinarizer", df_ing) as mesure:
+    ingredients_encoded = mesure.sortie(pd.DataFrame(
+        mlb.fit_transform(df_ing["Ingrédients_list"]),
+        columns=mlb.classes_,
+        index=df_ing.index
+    ))
 
 df_ingredients_expanded = ingredients_encoded.copy()
 
@@ -366,7 +412,8 @@ vectorizer = TfidfVectorizer(
     ngram_range=(3, 5)
 )
 
-X = vectorizer.fit_transform(ingredients["normalized"])
+with instr.etape("TF-IDF clustering", ingredients) as mesure:
+    X = mesure.sortie(vectorizer.fit_transform(ingredients["normalized"]))
 
 
 
@@ -381,7 +428,8 @@ clustering = AgglomerativeClustering(
     metric="cosine"
 )
 
-ingredients["cluster"] = clustering.fit_predict(X.toarray())
+with instr.etape("TF-IDF clustering", X) as mesure:
+    ingredients["cluster"] = mesure.sortie(clustering.fit_predict(X.toarray()))
 
 # 5. Définition du nom INCI standard par cluster
 # (forme canonique la plus simple / courte)
@@ -546,7 +594,8 @@ Le TALC est présent dans plus de la moitié des formulations poudres, cohérent
 """
 
 # Création  de la variable cible
-df_ml = df_clean.copy()
+# (un seul produit par groupe de doublons de formulation, cf. section 3.1)
+df_ml = dedoublonnage.fusionner_doublons(df_clean, "Ingrédients", seuil_jaccard=0.9)
 
 df_ml["target_talc"] = df_ml["Ingrédients"].str.contains(
     "TALC", na=False
@@ -613,12 +662,21 @@ y = df_ml["target_talc"]
 
 # --- Vectorisation (0/1) ---
 # 1: ingrédient présent, 0: ingrédient absent
+from analyse_talc import decouper_virgules  # tokenizer picklable (une lambda ne l'est pas)
+
 vectorizer = CountVectorizer(
-    tokenizer=lambda x: x.split(","),  # séparer les ingrédients par virgule
+    tokenizer=decouper_virgules,       # séparer les ingrédients par virgule
+    token_pattern=None,
     binary=True                        # 0 = absent, 1 = présent
 )
 
-X_vect = vectorizer.fit_transform(X)
+with instr.etape("vectorize", X) as mesure:
+    X_vect = mesure.sortie(vectorizer.fit_transform(X))
+
+# --- Variante à mémoire fixe : hachage des ingrédients (pas de vocabulaire) ---
+# Comparaison mémoire / performances avec le mode vocabulaire :
+#   import vectorisation_hachee
+#   vectorisation_hachee.comparer_modes({"textes": X, "y": y})
 
 # --- Split train / test ---
 X_train, X_test, y_train, y_test = train_test_split(
@@ -653,7 +711,8 @@ models = {
 results = []
 
 for name, model in models.items():
-    model.fit(X_train, y_train)
+    with instr.etape(f"train - {name}", X_train):
+        model.fit(X_train, y_train)
     y_pred = model.predict(X_test)
 
     results.append({
@@ -738,6 +797,26 @@ plt.xlabel("Coefficient (impact sur la présence de TALC)")
 plt.title("Top 20 ingrédients influençant la présence de TALC")
 plt.show()
 
+# --- Classement robuste : importance de permutation (plis de test) et stabilité de sélection L1 ---
+import importance
+
+classement = importance.classer_ingredients({"X": X_vect, "y": y, "colonnes": features})
+classement.head(20)
+
+# --- Explications par produit : pourquoi TALC est-il prédit pour ce produit ? ---
+# Contributions X ⊙ coef_ (logistique) ou chemins de décision (arbres), en bloc
+import explications
+
+contributions, biais = explications.expliquer(model, X_vect)
+explications_top = explications.top_k(contributions, features, k=5, index=df_ml.index)
+explications_top.head(10)
+
+# --- Reformulation : plus petits ensembles de retraits / substitutions rendant la prédiction négative ---
+import reformulation
+
+reformulations = reformulation.reformuler_catalogue(model, X_vect, features, y, index=df_ml.index)
+reformulations.head(10)
+
 """**Interprétation des coefficients :**
 
 **Ingrédients à coefficient POSITIF (favorisent la présence de TALC) :**
@@ -788,10 +867,12 @@ X_apriori = pd.DataFrame(X_vect.toarray(), columns=vectorizer.get_feature_names_
 X_apriori["TALC"] = y
 
 # --- Génération des itemsets fréquents ---
-frequent_itemsets = apriori(X_apriori, min_support=0.1, use_colnames=True)
+with instr.etape("apriori", X_apriori) as mesure:
+    frequent_itemsets = mesure.sortie(apriori(X_apriori, min_support=0.1, use_colnames=True))
 
 # --- Génération des règles d'association ---
-rules = association_rules(frequent_itemsets, metric="confidence", min_threshold=0.7)
+with instr.etape("association_rules", frequent_itemsets) as mesure:
+    rules = mesure.sortie(association_rules(frequent_itemsets, metric="confidence", min_threshold=0.7))
 
 # --- Filtrer les règles qui concernent TALC ---
 rules_talc = rules[rules['consequents'].apply(lambda x: 'TALC' in x)]
@@ -803,6 +884,17 @@ rules_talc[['antecedents', 'consequents', 'support', 'confidence', 'lift']]
 rules_talc_sorted = rules_talc.sort_values(by='lift', ascending=False)
 rules_talc_sorted[['antecedents', 'consequents', 'support', 'confidence', 'lift']].head(10)
 
+# --- Contrôle des règles compilées : produits avec l'antécédent mais sans le conséquent ---
+import regles_compilees
+
+controle = regles_compilees.ReglesCompilees(rules_talc_sorted)
+violations = controle.verifier(X_vect, vectorizer.get_feature_names_out(), {"TALC": y}, index=df_ml.index)
+violations.head(10)
+
+# --- Stabilité des règles : intervalles bootstrap (2000 répliques des 375 produits) ---
+stabilite = controle.stabilite(controle.encoder(X_vect, vectorizer.get_feature_names_out(), {"TALC": y}))
+stabilite.head(10)
+
 """**Interprétation des règles d'association :**
 
 **Métriques observées :**
@@ -879,3 +971,27 @@ Confidence (graphique de droite) : Indique la probabilité que TALC soit présen
 
 Ces graphiques permettent d’identifier visuellement les combinaisons d’ingrédients les plus influentes pour prédire la présence de TALC dans les produits cosmétiques.
 """
+
+"""## **6. Instrumentation du pipeline**
+
+Récapitulatif des temps (réel et CPU), du pic mémoire et des formes d'entrée/sortie de chaque étape, exporté en JSON pour comparer les exécutions.
+"""
+
+instr.afficher_resume()
+instr.exporter_trace("/content/predcompact/trace_pipeline.json")
+
+"""## **7. Exécution mémoïsée du pipeline**
+
+Les étapes ci-dessus sont reprises sous forme de graphe dans `analyse_talc.py`. Chaque résultat est mis en cache sur disque sous une empreinte de ses entrées, de ses paramètres et de son code : changer `distance_threshold`, `min_support` ou la liste des modèles ne réexécute que les étapes en aval, et les branches indépendantes (comparaison des modèles, règles d'association) tournent en parallèle.
+"""
+
+import analyse_talc as at
+
+pipeline = at.construire_pipeline(
+    "/content/predcompact/375_cosmetikwatch_19_08_2025.xlsx",
+    distance_threshold=0.25,
+    min_support=0.1,
+    dossier_cache="/content/predcompact/.cache_pipeline"
+)
+resultats = pipeline.executer()
+resultats["modeles"]
@@ -0,0 +1,204 @@
+import io
+import pickle
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from analyse_talc import MODELES_DEFAUT, creer_modele, decouper_virgules
+
+NB_FEATURES_DEFAUT = 2 ** 18
+
+
+def creer_vectoriseur(nb_features=NB_FEATURES_DEFAUT):
+    """
+    Vectoriseur binaire par hachage des ingrédients (sans vocabulaire).
+
+    Même découpage que le mode vocabulaire (CountVectorizer de la section
+    4.3) : les deux modes produisent les mêmes ingrédients, seul leur numéro
+    de colonne diffère. Sans état et picklable : il se transmet tel quel
+    aux processus et se réutilise sans fit.
+
+    Parameters:
+    -----------
+    nb_features : int, optional
+        Nombre de colonnes (puissance de 2 conseillée). Par défaut 2**18
+
+    Returns:
+    --------
+    HashingVectorizer
+    """
+    from sklearn.feature_extraction.text import HashingVectorizer
+
+    return HashingVectorizer(
+        tokenizer=decouper_virgules,
+        token_pattern=None,
+        n_features=nb_features,
+        binary=True,
+        norm=None,
+        alternate_sign=False,
+        dtype=np.int8,
+    )
+
+
+def _blocs(textes, taille_bloc):
+    """Découpe les textes en blocs consécutifs de taille_bloc produits."""
+    textes = pd.Series(textes) if not isinstance(textes, pd.Series) else textes
+    for debut in range(0, len(textes), taille_bloc):
+        yield textes.iloc[debut:debut + taille_bloc]
+
+
+def transformer(textes, vectoriseur=None, taille_bloc=50_000, n_jobs=1):
+    """
+    Vectorise des listes INCI par blocs, éventuellement dans plusieurs processus.
+
+    Le hachage étant sans état, chaque bloc est transformé indépendamment et
+    les résultats sont empilés dans l'ordre.
+
+    Parameters:
+    -----------
+    textes : pd.Series or list of str
+        Listes d'ingrédients séparés par des virgules
+    vectoriseur : HashingVectorizer, optional
+        Résultat de creer_vectoriseur(). Par défaut celui à 2**18 colonnes
+    taille_bloc : int, optional
+        Nombre de produits par bloc. Par défaut 50 000
+    n_jobs : int, optional
+        Nombre de processus (-1 : tous les cœurs). Par défaut 1
+
+    Returns:
+    --------
+    scipy.sparse.csr_matrix : produits x nb_features (int8)
+    """
+    vectoriseur = vectoriseur or creer_vectoriseur()
+    if n_jobs == 1:
+        morceaux = [vectoriseur.transform(bloc) for bloc in _blocs(textes, taille_bloc)]
+    else:
+        from joblib import Parallel, delayed
+
+        morceaux = Parallel(n_jobs=n_jobs)(
+            delayed(vectoriseur.transform)(bloc) for bloc in _blocs(textes, taille_bloc)
+        )
+    if not morceaux:
+        return sparse.csr_matrix((0, vectoriseur.n_features), dtype=np.int8)
+    return sparse.vstack(morceaux, format='csr')
+
+
+def entrainer_par_blocs(blocs, modele=None, vectoriseur=None, classes=(0, 1)):
+    """
+    Entraînement hors mémoire : chaque bloc (textes, y) est vectorisé puis
+    passé à partial_fit, sans jamais conserver la matrice complète.
+
+    Parameters:
+    -----------
+    blocs : iterable of (textes, y)
+        Blocs du catalogue (ex: lecture d'un export par morceaux)
+    modele : estimateur avec partial_fit, optional
+        Par défaut SGDClassifier(loss="log_loss")
+    vectoriseur : HashingVectorizer, optional
+        Résultat de creer_vectoriseur()
+    classes : tuple, optional
+        Classes de la cible. Par défaut (0, 1)
+
+    Returns:
+    --------
+    tuple : (modèle entraîné, vectoriseur)
+    """
+    if modele is None:
+        from sklearn.linear_model import SGDClassifier
+
+        modele = SGDClassifier(loss="log_loss", random_state=42)
+    vectoriseur = vectoriseur or creer_vectoriseur()
+    nb_produits = 0
+    for textes, y in blocs:
+        modele.partial_fit(vectoriseur.transform(textes), np.asarray(y), classes=np.asarray(classes))
+        nb_produits += len(y)
+    print(f"Entraînement par blocs : {nb_produits} produits")
+    return modele, vectoriseur
+
+
+def taille_pickle(objet):
+    """Taille en octets de l'objet sérialisé."""
+    tampon = io.BytesIO()
+    pickle.dump(objet, tampon, protocol=pickle.HIGHEST_PROTOCOL)
+    return tampon.tell()
+
+
+def _mesurer(fabrique, textes):
+    """Vectorise en mesurant temps et pic mémoire Python ; renvoie (vectoriseur, X, mesures)."""
+    # Trace déjà active (instrumentation) : elle est conservée, seul le pic est réinitialisé
+    demarre_tracemalloc = not tracemalloc.is_tracing()
+    if demarre_tracemalloc:
+        tracemalloc.start()
+    memoire_debut, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    debut = time.perf_counter()
+    vectoriseur = fabrique()
+    X = vectoriseur.fit_transform(textes)
+    duree = time.perf_counter() - debut
+    _, pic = tracemalloc.get_traced_memory()
+    if demarre_tracemalloc:
+        tracemalloc.stop()
+    mesures = {
+        'colonnes': X.shape[1],
+        'temps_s': duree,
+        'pic_memoire_Mo': (pic - memoire_debut) / 1e6,
+        'vectoriseur_Mo': taille_pickle(vectoriseur) / 1e6,
+        'matrice_Mo': (X.data.nbytes + X.indices.nbytes + X.indptr.nbytes) / 1e6,
+    }
+    return vectoriseur, X, mesures
+
+
+def comparer_modes(cible, nb_features=(2 ** 12, 2 ** 16, 2 ** 18), modeles=MODELES_DEFAUT,
+                   test_size=0.2, random_state=42):
+    """
+    Compare le mode vocabulaire (CountVectorizer) au mode hachage pour
+    plusieurs nombres de colonnes : mémoire, temps de vectorisation et
+    performances des modèles de la section 4.4 sur le même découpage.
+
+    Parameters:
+    -----------
+    cible : dict
+        Résultat de analyse_talc.preparer_cible()
+    nb_features : tuple of int, optional
+        Nombres de colonnes du mode hachage à tester
+    modeles : tuple of str, optional
+        Modèles à comparer (voir analyse_talc.creer_modele)
+    test_size, random_state :
+        Découpage train/test (identique à comparer_modeles)
+
+    Returns:
+    --------
+    pd.DataFrame : une ligne par (mode, modèle) avec F1-macro, Balanced
+    Accuracy, colonnes, temps et tailles mémoire
+    """
+    from sklearn.feature_extraction.text import CountVectorizer
+    from sklearn.model_selection import train_test_split
+    from sklearn.metrics import f1_score, balanced_accuracy_score
+
+    textes, y = cible['textes'], cible['y']
+    modes = {'vocabulaire': lambda: CountVectorizer(tokenizer=decouper_virgules, token_pattern=None, binary=True)}
+    for n in nb_features:
+        modes[f'hachage {n}'] = lambda n=n: creer_vectoriseur(n)
+
+    positions = np.arange(len(y))
+    train, test = train_test_split(positions, test_size=test_size, random_state=random_state, stratify=y)
+    resultats = []
+    for mode, fabrique in modes.items():
+        _, X, mesures = _mesurer(fabrique, textes)
+        X = sparse.csr_matrix(X)
+        # En mode hachage, l'écart avec le vocabulaire mesure les collisions
+        mesures['colonnes_utilisees'] = int(np.count_nonzero(X.getnnz(axis=0)))
+        for nom in modeles:
+            modele = creer_modele(nom).fit(X[train], y.iloc[train])
+            y_pred = modele.predict(X[test])
+            resultats.append({
+                'Mode': mode,
+                'Modèle': nom,
+                'F1-macro': f1_score(y.iloc[test], y_pred, average="macro"),
+                'Balanced Accuracy': balanced_accuracy_score(y.iloc[test], y_pred),
+                **mesures,
+            })
+    return pd.DataFrame(resultats)